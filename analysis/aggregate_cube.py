@@ -0,0 +1,192 @@
+import os
+import json
+import logging
+import datetime
+import pandas as pd
+from config.paths import CUBE_DIR
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Dimensiones del cubo (además del día de publicación) y valor para los datos faltantes, igual que en el dashboard
+CUBE_DIMENSIONS = ['country', 'sector', 'seniority_level', 'source_platform', 'role_category']
+UNKNOWN_VALUE = 'Desconocido'
+# Empresas que se conservan por (día, país) en el sketch de top empresas
+COMPANY_SKETCH_K = 50
+# Columnas de 'jobs' necesarias para construir el cubo
+CUBE_SOURCE_COLUMNS = ['posted_date', 'scraped_at', 'company_name'] + CUBE_DIMENSIONS
+
+CUBE_COUNTS_FILE = 'cube_counts.parquet'
+CUBE_COMPANIES_FILE = 'cube_companies.parquet'
+CUBE_META_FILE = 'cube_meta.json'
+
+
+def _prepare_jobs(jobs_df):
+    """Normaliza vacantes (del dashboard o de Supabase): día de publicación y 'Desconocido' en dimensiones vacías."""
+    frame = jobs_df.reindex(columns=CUBE_SOURCE_COLUMNS)
+    frame = frame.assign(date=pd.to_datetime(frame['posted_date'], errors='coerce', utc=True).dt.tz_localize(None).dt.normalize())
+    for column in CUBE_DIMENSIONS + ['company_name']:
+        frame[column] = frame[column].astype(object).where(frame[column].notna() & (frame[column] != ''), UNKNOWN_VALUE)
+    # Igual que el filtro de fechas del dashboard: las vacantes sin fecha no entran en ningún rango
+    return frame[frame['date'].notna()]
+
+
+def _page_counts(frame):
+    """Conteos (celdas del cubo, empresas por día y país) de un DataFrame de vacantes ya normalizado."""
+    counts = frame.groupby(['date'] + CUBE_DIMENSIONS).size().reset_index(name='count')
+    companies = frame.groupby(['date', 'country', 'company_name']).size().reset_index(name='count')
+    return counts, companies
+
+
+def _max_scraped_at(frame):
+    if 'scraped_at' not in frame.columns:
+        return None
+    value = pd.to_datetime(frame['scraped_at'], errors='coerce', utc=True).max()
+    return value if pd.notna(value) else None
+
+
+def _top_companies_per_segment(companies, company_top_k):
+    return (companies.sort_values(['date', 'country', 'count', 'company_name'], ascending=[True, True, False, True])
+            .groupby(['date', 'country'], observed=True).head(company_top_k).reset_index(drop=True))
+
+
+def _as_categories(frame, columns):
+    return frame.astype({column: 'category' for column in columns})
+
+
+class AggregateCube:
+    """
+    Cubo de conteos de vacantes por día de publicación × país × sector × seniority × plataforma × categoría de rol,
+    más un sketch con las COMPANY_SKETCH_K empresas con más vacantes de cada (día, país).
+
+    Cualquier combinación de filtros (rango de fechas, países) y cualquier distribución por una o varias
+    dimensiones se responde filtrando y sumando filas del cubo, cuyo tamaño depende del número de
+    combinaciones distintas y no del número de vacantes. El top de empresas es aproximado: una empresa
+    puede quedar subestimada si algún día no estuvo entre las COMPANY_SKETCH_K primeras de su país.
+    """
+    def __init__(self, counts, companies, jobs_count=None, max_scraped_at=None, built_at=None):
+        self.counts = counts
+        self.companies = companies
+        self.jobs_count = int(counts['count'].sum()) if jobs_count is None else jobs_count
+        self.max_scraped_at = max_scraped_at
+        self.built_at = built_at or datetime.datetime.now().isoformat()
+
+    @classmethod
+    def from_jobs(cls, jobs_df, company_top_k=COMPANY_SKETCH_K):
+        """Construye el cubo a partir de un DataFrame de vacantes con (al menos) las columnas de CUBE_SOURCE_COLUMNS."""
+        return cls.from_pages([jobs_df], company_top_k)
+
+    @classmethod
+    def from_pages(cls, pages, company_top_k=COMPANY_SKETCH_K):
+        """
+        Construye el cubo a partir de páginas de vacantes (DataFrames o listas de filas de Supabase), agregando
+        cada página por separado para no tener todas las vacantes en memoria a la vez.
+        """
+        partial_counts, partial_companies = [], []
+        jobs_count, max_scraped_at = 0, None
+        for page in pages:
+            frame = page if isinstance(page, pd.DataFrame) else pd.DataFrame(page)
+            jobs_count += len(frame)
+            page_max = _max_scraped_at(frame)
+            if page_max is not None and (max_scraped_at is None or page_max > max_scraped_at):
+                max_scraped_at = page_max
+            page_counts, page_companies = _page_counts(_prepare_jobs(frame))
+            partial_counts.append(page_counts)
+            partial_companies.append(page_companies)
+
+        counts = cls._combine(partial_counts, ['date'] + CUBE_DIMENSIONS)
+        companies = _top_companies_per_segment(cls._combine(partial_companies, ['date', 'country', 'company_name']), company_top_k)
+        max_scraped_at = max_scraped_at.tz_localize(None).isoformat() if max_scraped_at is not None else None
+        cube = cls(counts, companies, jobs_count=jobs_count, max_scraped_at=max_scraped_at)
+        logging.info(f"Cubo de agregados construido: {jobs_count} vacantes en {len(counts)} celdas.")
+        return cube
+
+    def apply_delta(self, added_jobs, removed_jobs=None, company_top_k=COMPANY_SKETCH_K):
+        """
+        Nuevo cubo con las vacantes de `added_jobs` sumadas y las de `removed_jobs` restadas (p. ej. las versiones
+        anteriores de vacantes actualizadas), sin recorrer el resto de vacantes. Las celdas que quedan en cero se eliminan.
+        Una empresa que no estaba en el sketch no se descuenta; el top de empresas sigue siendo aproximado.
+        """
+        removed_jobs = removed_jobs if removed_jobs is not None else pd.DataFrame(columns=CUBE_SOURCE_COLUMNS)
+        if added_jobs.empty and removed_jobs.empty:
+            return self
+        added_counts, added_companies = _page_counts(_prepare_jobs(added_jobs))
+        removed_counts, removed_companies = _page_counts(_prepare_jobs(removed_jobs))
+        counts = self._combine([self.counts, added_counts, removed_counts.assign(count=-removed_counts['count'])], ['date'] + CUBE_DIMENSIONS)
+        companies = self._combine([self.companies, added_companies, removed_companies.assign(count=-removed_companies['count'])],
+                                  ['date', 'country', 'company_name'])
+        companies = _top_companies_per_segment(companies[companies['count'] > 0], company_top_k)
+
+        max_scraped_at = self.max_scraped_at
+        added_max = _max_scraped_at(added_jobs)
+        if added_max is not None:
+            added_max = added_max.tz_localize(None).isoformat()
+            max_scraped_at = max(max_scraped_at, added_max) if max_scraped_at is not None else added_max
+        jobs_count = self.jobs_count + len(added_jobs) - len(removed_jobs)
+        return AggregateCube(counts[counts['count'] > 0].reset_index(drop=True), companies,
+                             jobs_count=jobs_count, max_scraped_at=max_scraped_at)
+
+    @staticmethod
+    def _combine(frames, keys):
+        if not frames:
+            return pd.DataFrame(columns=keys + ['count'])
+        combined = pd.concat(frames, ignore_index=True)
+        combined = combined.groupby(keys, observed=True).agg(count=('count', 'sum')).reset_index()
+        return _as_categories(combined, [key for key in keys if key != 'date']).astype({'count': 'int64'})
+
+    def save(self, cube_dir=CUBE_DIR):
+        os.makedirs(cube_dir, exist_ok=True)
+        self.counts.to_parquet(os.path.join(cube_dir, CUBE_COUNTS_FILE), index=False)
+        self.companies.to_parquet(os.path.join(cube_dir, CUBE_COMPANIES_FILE), index=False)
+        meta_path = os.path.join(cube_dir, CUBE_META_FILE)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'jobs_count': self.jobs_count, 'max_scraped_at': self.max_scraped_at, 'built_at': self.built_at}, f, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        logging.info(f"Cubo de agregados guardado en {cube_dir}.")
+
+    @classmethod
+    def load(cls, cube_dir=CUBE_DIR):
+        """Carga el cubo guardado en `cube_dir`, o retorna None si no existe."""
+        meta_path = os.path.join(cube_dir, CUBE_META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        counts = pd.read_parquet(os.path.join(cube_dir, CUBE_COUNTS_FILE))
+        companies = pd.read_parquet(os.path.join(cube_dir, CUBE_COMPANIES_FILE))
+        return cls(counts, companies, jobs_count=meta['jobs_count'], max_scraped_at=meta.get('max_scraped_at'), built_at=meta.get('built_at'))
+
+    def matches(self, jobs_count, max_scraped_at):
+        """Indica si el cubo se construyó con las mismas vacantes (mismo total y misma última fecha de extracción)."""
+        return self.jobs_count == jobs_count and self.max_scraped_at == max_scraped_at
+
+    def countries(self):
+        return sorted(self.counts['country'].unique().tolist())
+
+    def filter(self, start_date=None, end_date=None, countries=None):
+        """Sub-cubo con los días entre `start_date` y `end_date` (inclusive) y, opcionalmente, solo los países dados."""
+        def mask(frame):
+            keep = pd.Series(True, index=frame.index)
+            if start_date is not None:
+                keep &= frame['date'] >= pd.Timestamp(start_date)
+            if end_date is not None:
+                keep &= frame['date'] <= pd.Timestamp(end_date)
+            if countries is not None:
+                keep &= frame['country'].isin(countries)
+            return frame[keep]
+        return AggregateCube(mask(self.counts), mask(self.companies), max_scraped_at=self.max_scraped_at, built_at=self.built_at)
+
+    def total(self):
+        return int(self.counts['count'].sum())
+
+    def value_counts(self, dimensions):
+        """Número de vacantes por cada combinación de `dimensions` (columnas + 'count'), de mayor a menor."""
+        dimensions = [dimensions] if isinstance(dimensions, str) else list(dimensions)
+        result = self.counts.groupby(dimensions, observed=True)['count'].sum().reset_index()
+        result = result[result['count'] > 0].astype({dimension: object for dimension in dimensions})
+        return result.sort_values(['count'] + dimensions, ascending=[False] + [True] * len(dimensions)).reset_index(drop=True)
+
+    def top_companies(self, top_n=15):
+        """Empresas con más vacantes en el sub-cubo (aproximado, ver el sketch de empresas)."""
+        companies = self.companies.groupby('company_name', observed=True)['count'].sum().reset_index()
+        companies = companies[companies['count'] > 0].astype({'company_name': object})
+        return companies.sort_values(['count', 'company_name'], ascending=[False, True]).head(top_n).reset_index(drop=True)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def build_incidence_matrix(skills_df):
+    """
+    Matriz dispersa binaria vacante × habilidad a partir de un DataFrame con 'job_id' y 'skill_name'.
+    Retorna (matriz CSR, array con el nombre de la habilidad de cada columna).
+    """
+    links = skills_df.dropna(subset=['job_id', 'skill_name']).drop_duplicates(['job_id', 'skill_name'])
+    job_codes, _ = pd.factorize(links['job_id'])
+    skill_codes, skill_names = pd.factorize(links['skill_name'])
+    incidence = sparse.csr_matrix(
+        (np.ones(len(links), dtype=np.int32), (job_codes, skill_codes)),
+        shape=(len(np.unique(job_codes)), len(skill_names)),
+    )
+    return incidence, np.asarray(skill_names, dtype=object)
+
+
+def cooccurrence_scores(incidence, skill_names, min_pair_count=5, top_k=None):
+    """
+    Co-ocurrencia de habilidades mediante el producto disperso Xᵀ·X (la diagonal es el número de vacantes
+    de cada habilidad). Para cada par dirigido (skill, related_skill) calcula:
+      - lift = P(a, b) / (P(a) · P(b)): cuántas veces más aparecen juntas que si fueran independientes.
+      - pmi = log2(lift).
+    Las probabilidades se calculan sobre las vacantes de la matriz (las que tienen al menos una habilidad).
+    Solo se conservan pares vistos en al menos `min_pair_count` vacantes; con `top_k` se dejan los
+    `top_k` pares de mayor lift por habilidad. Retorna un DataFrame ordenado por skill y lift descendente.
+    """
+    columns = ['skill_name', 'related_skill', 'pair_count', 'skill_count', 'related_count', 'lift', 'pmi']
+    jobs_count = incidence.shape[0]
+    if jobs_count == 0:
+        return pd.DataFrame(columns=columns)
+
+    cooccurrence = (incidence.T @ incidence).tocoo()
+    skill_counts = cooccurrence.diagonal()
+    keep = (cooccurrence.row != cooccurrence.col) & (cooccurrence.data >= min_pair_count)
+    rows, cols, pair_counts = cooccurrence.row[keep], cooccurrence.col[keep], cooccurrence.data[keep]
+
+    # En float64: pair_count · jobs_count desborda int32 con cientos de miles de vacantes
+    lift = pair_counts.astype(np.float64) * jobs_count / (skill_counts[rows].astype(np.float64) * skill_counts[cols])
+    pairs = pd.DataFrame({
+        'skill_name': skill_names[rows],
+        'related_skill': skill_names[cols],
+        'pair_count': pair_counts,
+        'skill_count': skill_counts[rows],
+        'related_count': skill_counts[cols],
+        'lift': lift,
+        'pmi': np.log2(lift),
+    }, columns=columns)
+
+    pairs = pairs.sort_values(['skill_name', 'lift', 'pair_count', 'related_skill'], ascending=[True, False, False, True])
+    if top_k:
+        pairs = pairs.groupby('skill_name').head(top_k)
+    return pairs.reset_index(drop=True)
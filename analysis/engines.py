@@ -0,0 +1,218 @@
+import os
+import logging
+import datetime
+import pandas as pd
+from config.paths import TREND_SNAPSHOT_DIR
+from analysis.metrics import ROLLUP_TABLES, SLICE_COLUMNS, simplify_role_title
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SNAPSHOT_JOBS_FILE = 'jobs.parquet'
+SNAPSHOT_SKILLS_FILE = 'skills.parquet'
+
+
+def write_snapshot(jobs_df, skills_df, snapshot_dir=TREND_SNAPSHOT_DIR):
+    """
+    Guarda vacantes (id, title, sector, country, posted_date, scraped_at) y habilidades (job_id, skill_name)
+    como Parquet, el formato que leen los motores columnares. 'posted_date' se guarda como fecha y 'scraped_at'
+    como timestamp UTC, no como texto, y los pares vacante/habilidad se guardan sin nulos ni duplicados para
+    no tener que depurarlos en cada consulta.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    jobs = jobs_df.assign(
+        posted_date=pd.to_datetime(jobs_df['date']).dt.date,
+        scraped_at=pd.to_datetime(jobs_df['scraped_at'], utc=True, format='ISO8601'),
+    ).drop(columns='date')
+    skills = skills_df.dropna(subset=['job_id', 'skill_name']).drop_duplicates(['job_id', 'skill_name'])
+    jobs.to_parquet(os.path.join(snapshot_dir, SNAPSHOT_JOBS_FILE), index=False)
+    skills.to_parquet(os.path.join(snapshot_dir, SNAPSHOT_SKILLS_FILE), index=False)
+    logging.info(f"Snapshot de tendencias guardado en {snapshot_dir}: {len(jobs)} vacantes, {len(skills)} habilidades.")
+
+
+def snapshot_taken_at(snapshot_dir=TREND_SNAPSHOT_DIR):
+    """Fecha y hora en que se escribió el snapshot (la del archivo de vacantes), o None si no existe."""
+    jobs_path = os.path.join(snapshot_dir, SNAPSHOT_JOBS_FILE)
+    if not os.path.exists(jobs_path):
+        return None
+    return datetime.datetime.fromtimestamp(os.path.getmtime(jobs_path))
+
+
+def scraped_dates_of(jobs_df):
+    """Días de publicación (ISO, ordenados) de las vacantes y su mayor 'scraped_at' (ISO, UTC), o ([], None)."""
+    if jobs_df.empty:
+        return [], None
+    scraped_at = pd.to_datetime(jobs_df['scraped_at'], utc=True, format='ISO8601').max()
+    return sorted(jobs_df['date'].unique()), scraped_at.isoformat()
+
+
+def build_daily_rollups(jobs_df, skills_df):
+    """
+    Agrega vacantes y habilidades por día para cada dimensión de ROLLUP_TABLES.
+    Habilidades y roles se agregan además por país y sector para poder calcular segmentos.
+    """
+    rollups = {}
+    jobs_df = jobs_df.assign(role=jobs_df['title'].map(simplify_role_title))
+    jobs_df[SLICE_COLUMNS] = jobs_df[SLICE_COLUMNS].fillna('')
+
+    job_attributes = jobs_df.set_index('id')[['date'] + SLICE_COLUMNS]
+    skills = skills_df.join(job_attributes, on='job_id')
+    skills = skills.dropna(subset=['date', 'skill_name']).drop_duplicates(['job_id', 'skill_name'])
+    rollups['skill'] = skills.groupby(['date', 'skill_name'] + SLICE_COLUMNS).size().reset_index(name='count')
+    rollups['role'] = jobs_df.groupby(['date', 'role'] + SLICE_COLUMNS).size().reset_index(name='count')
+
+    for dimension in ('sector', 'country'):
+        key_column = ROLLUP_TABLES[dimension][1]
+        frame = jobs_df[jobs_df[key_column] != '']
+        rollups[dimension] = frame.groupby(['date', key_column]).size().reset_index(name='count')
+    return rollups
+
+
+class PandasEngine:
+    """
+    Motor por defecto: agrega con pandas las vacantes que `load_frames(start_date=, end_date=, dates=,
+    scraped_since=)` lee de Supabase (retorna jobs_df y skills_df; ver `TrendAnalyzer._fetch_jobs_frames`).
+    """
+    name = 'pandas'
+
+    def __init__(self, load_frames):
+        self.load_frames = load_frames
+
+    def data_as_of(self):
+        """Lee de Supabase en cada consulta: sus datos siempre están al día (None)."""
+        return None
+
+    def scraped_dates(self, scraped_since=None):
+        """Días de publicación de las vacantes scrapeadas desde `scraped_since` (todas si es None) y su mayor scraped_at."""
+        jobs_df, _ = self.load_frames(scraped_since=scraped_since)
+        return scraped_dates_of(jobs_df)
+
+    def daily_rollups(self, start_date=None, end_date=None, dates=None):
+        """Agregados diarios por dimensión (ver `build_daily_rollups`), del rango o solo de los días `dates` (ISO)."""
+        jobs_df, skills_df = self.load_frames(start_date=start_date, end_date=end_date, dates=dates)
+        return build_daily_rollups(jobs_df, skills_df)
+
+    def job_skill_links(self, start_date=None, end_date=None):
+        """Pares (job_id, skill_name) de las vacantes publicadas en el rango."""
+        _, skills_df = self.load_frames(start_date=start_date, end_date=end_date)
+        return skills_df
+
+
+class DuckDBEngine:
+    """
+    Motor columnar: calcula los mismos agregados con DuckDB directamente sobre el snapshot Parquet
+    (ver `write_snapshot`), sin construir DataFrames de objetos a partir de JSON. Produce las mismas
+    filas que PandasEngine; el orden de las filas puede variar, ya que no importa para reemplazar agregados.
+    """
+    name = 'duckdb'
+
+    def __init__(self, snapshot_dir=TREND_SNAPSHOT_DIR):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("El motor 'duckdb' requiere el paquete opcional duckdb: pip install duckdb") from e
+        self.snapshot_dir = snapshot_dir
+        self.jobs_path = os.path.join(snapshot_dir, SNAPSHOT_JOBS_FILE)
+        self.skills_path = os.path.join(snapshot_dir, SNAPSHOT_SKILLS_FILE)
+        if not os.path.exists(self.jobs_path):
+            raise FileNotFoundError(f"No existe el snapshot de vacantes en {self.jobs_path}. Genéralo con TrendAnalyzer.refresh_snapshot().")
+        self.connection = duckdb.connect()
+
+    def data_as_of(self):
+        """Día en que se tomó el snapshot: las vacantes scrapeadas después no están en sus agregados."""
+        return snapshot_taken_at(self.snapshot_dir).date()
+
+    def _jobs_cte(self, start_date, end_date, dates=None):
+        """
+        CTE con las vacantes del rango (o de los días `dates`, ISO), con país/sector '' si faltan y la fecha
+        como texto ISO (igual que en pandas).
+        """
+        conditions = ["posted_date IS NOT NULL"]
+        params = [self.jobs_path]
+        if start_date:
+            conditions.append("posted_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("posted_date <= ?")
+            params.append(end_date)
+        if dates is not None:
+            conditions.append("list_contains(?, strftime(posted_date, '%Y-%m-%d'))")
+            params.append(list(dates))
+        cte = f"""
+            WITH jobs AS (
+                SELECT id, title, COALESCE(country, '') AS country, COALESCE(sector, '') AS sector,
+                       strftime(posted_date, '%Y-%m-%d') AS date
+                FROM read_parquet(?)
+                WHERE {' AND '.join(conditions)}
+            )
+        """
+        return cte, params
+
+    def _register_role_map(self):
+        """Aplica `simplify_role_title` una vez por título distinto, para no duplicar la regla en SQL."""
+        titles = self.connection.execute(
+            "SELECT DISTINCT title FROM read_parquet(?) WHERE title IS NOT NULL", [self.jobs_path]
+        ).df()['title']
+        self.connection.register('role_map', pd.DataFrame({'title': titles, 'role': titles.map(simplify_role_title)}))
+
+    def _query(self, sql, params):
+        return self.connection.execute(sql, params).df()
+
+    def scraped_dates(self, scraped_since=None):
+        """Días de publicación de las vacantes scrapeadas desde `scraped_since` (todas si es None) y su mayor scraped_at."""
+        condition, params = "posted_date IS NOT NULL", [self.jobs_path]
+        if scraped_since:
+            condition += " AND scraped_at >= CAST(? AS TIMESTAMPTZ)"
+            params.append(scraped_since)
+        jobs_df = self._query(f"""
+            SELECT strftime(posted_date, '%Y-%m-%d') AS date, scraped_at FROM read_parquet(?) WHERE {condition}
+        """, params)
+        return scraped_dates_of(jobs_df)
+
+    def daily_rollups(self, start_date=None, end_date=None, dates=None):
+        """Agregados diarios por dimensión, con las mismas columnas y filas que `build_daily_rollups`."""
+        cte, params = self._jobs_cte(start_date, end_date, dates)
+        self._register_role_map()
+
+        rollups = {
+            'skill': self._query(cte + """
+                SELECT j.date, s.skill_name, j.country, j.sector, COUNT(*) AS count
+                FROM read_parquet(?) s JOIN jobs j ON s.job_id = j.id
+                GROUP BY ALL
+            """, params + [self.skills_path]),
+            'role': self._query(cte + """
+                SELECT j.date, COALESCE(r.role, 'Other') AS role, j.country, j.sector, COUNT(*) AS count
+                FROM jobs j LEFT JOIN role_map r ON j.title = r.title
+                GROUP BY ALL
+            """, params),
+        }
+        for dimension in ('sector', 'country'):
+            key_column = ROLLUP_TABLES[dimension][1]
+            rollups[dimension] = self._query(cte + f"""
+                SELECT date, {key_column}, COUNT(*) AS count
+                FROM jobs WHERE {key_column} != ''
+                GROUP BY ALL
+            """, params)
+        logging.info(f"Agregados diarios calculados con DuckDB sobre el snapshot {self.snapshot_dir}.")
+        return rollups
+
+    def job_skill_links(self, start_date=None, end_date=None):
+        """Pares (job_id, skill_name) de las vacantes publicadas en el rango."""
+        cte, params = self._jobs_cte(start_date, end_date)
+        return self._query(cte + """
+            SELECT s.job_id, s.skill_name FROM read_parquet(?) s JOIN jobs j ON s.job_id = j.id
+        """, params + [self.skills_path])
+
+
+ENGINES = {
+    PandasEngine.name: PandasEngine,
+    DuckDBEngine.name: DuckDBEngine,
+}
+
+
+def create_engine(name, load_frames, snapshot_dir=None):
+    """Crea el motor `name` ('pandas' o 'duckdb'). `load_frames` solo lo usa el motor pandas."""
+    if name not in ENGINES:
+        raise ValueError(f"Motor de análisis desconocido: '{name}'. Opciones: {', '.join(ENGINES)}.")
+    if name == PandasEngine.name:
+        return PandasEngine(load_frames)
+    return ENGINES[name](snapshot_dir or TREND_SNAPSHOT_DIR)
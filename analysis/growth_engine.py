@@ -0,0 +1,88 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+
+class GrowthEngine:
+    """
+    Conteos diarios por clave (habilidad, rol...) en una matriz densa día × clave, guardada como
+    sumas acumuladas por columna. Con ellas el conteo de cualquier ventana es la resta de dos filas,
+    así que cada ventana o desfase adicional cuesta O(claves) sin volver a leer los datos.
+    """
+    def __init__(self, keys, matrix, first_day, key_column='key'):
+        self.keys = np.asarray(keys, dtype=object)
+        self.key_column = key_column
+        self.first_day = first_day
+        self.days_count = matrix.shape[0]
+        # Fila i = suma de los días [first_day, first_day + i); la fila 0 son ceros
+        self._cumulative = np.vstack([
+            np.zeros((1, matrix.shape[1]), dtype=np.int64),
+            np.asarray(matrix, dtype=np.int64).cumsum(axis=0),
+        ])
+
+    @classmethod
+    def from_rollups(cls, frame, key_column, first_day, last_day):
+        """
+        Construye el motor a partir de agregados diarios (columnas 'date' como datetime.date, la clave y 'count').
+        Los días sin filas cuentan como cero; las claves quedan ordenadas alfabéticamente.
+        """
+        days = pd.date_range(first_day, last_day, freq='D').date
+        matrix = frame.pivot_table(index='date', columns=key_column, values='count', aggfunc='sum', fill_value=0)
+        matrix = matrix.reindex(index=days, fill_value=0).sort_index(axis=1)
+        return cls(matrix.columns.to_numpy(dtype=object), matrix.to_numpy(dtype=np.int64), first_day, key_column)
+
+    @property
+    def last_day(self):
+        return self.first_day + datetime.timedelta(days=self.days_count - 1)
+
+    def _day_index(self, day):
+        index = (day - self.first_day).days
+        if not 0 <= index < self.days_count:
+            raise ValueError(f"La fecha {day} está fuera del rango del motor ({self.first_day} a {self.last_day}).")
+        return index
+
+    def window_counts(self, end_day, window_days, offset_days=0):
+        """
+        Conteo por clave en los `window_days` días que terminan `offset_days` días antes de `end_day` (inclusive).
+        Los días anteriores a `first_day` cuentan como cero.
+        """
+        stop = min(max(self._day_index(end_day) - offset_days + 1, 0), self.days_count)
+        start = max(stop - window_days, 0)
+        return self._cumulative[stop] - self._cumulative[start]
+
+    def rolling_counts(self, window_days, offset_days=0):
+        """`window_counts` para todos los días del motor a la vez: matriz día × clave."""
+        stops = np.clip(np.arange(self.days_count) - offset_days + 1, 0, self.days_count)
+        starts = np.clip(stops - window_days, 0, None)
+        return self._cumulative[stops] - self._cumulative[starts]
+
+    def growth(self, end_day, window_days, offset_days=None):
+        """
+        Compara la ventana de `window_days` días que termina en `end_day` con la misma ventana desplazada
+        `offset_days` días hacia atrás (por defecto, la ventana inmediatamente anterior).
+        Retorna un DataFrame con la clave, current_count, previous_count, change y growth_rate (%).
+        """
+        offset_days = window_days if offset_days is None else offset_days
+        current = self.window_counts(end_day, window_days)
+        previous = self.window_counts(end_day, window_days, offset_days)
+        change = current - previous
+        return pd.DataFrame({
+            self.key_column: self.keys,
+            'current_count': current,
+            'previous_count': previous,
+            'change': change,
+            # Evitar división por cero si previous_count es 0
+            'growth_rate': change / np.where(previous == 0, 1, previous) * 100,
+        })
+
+    def growth_table(self, end_day, windows=(7, 30, 90), offsets=None):
+        """
+        Crecimiento de varias ventanas lado a lado, una fila por clave. `offsets` (opcional) da el desfase
+        de comparación de cada ventana. Las columnas llevan el sufijo de la ventana: current_count_7d, growth_rate_30d...
+        """
+        offsets = offsets or [None] * len(windows)
+        table = pd.DataFrame({self.key_column: self.keys})
+        for window_days, offset_days in zip(windows, offsets):
+            growth = self.growth(end_day, window_days, offset_days).drop(columns=self.key_column)
+            table = table.join(growth.add_suffix(f"_{window_days}d"))
+        return table
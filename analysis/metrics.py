@@ -0,0 +1,42 @@
+# Definiciones de métricas compartidas por TrendAnalyzer y sus motores de cálculo (pandas, DuckDB)
+
+# Tablas de agregados diarios: dimensión -> (tabla en Supabase, columna clave)
+ROLLUP_TABLES = {
+    'skill': ('daily_skill_counts', 'skill_name'),
+    'role': ('daily_role_counts', 'role'),
+    'sector': ('daily_sector_counts', 'sector'),
+    'country': ('daily_country_counts', 'country'),
+}
+# Dimensiones cuyos agregados se desglosan además por país y sector ('' = sin dato)
+SLICED_DIMENSIONS = ('skill', 'role')
+SLICE_COLUMNS = ['country', 'sector']
+
+
+def rollup_key_columns(dimension):
+    """Columnas de la clave primaria de la tabla de agregados diarios de una dimensión."""
+    key_column = ROLLUP_TABLES[dimension][1]
+    return ['date', key_column] + (SLICE_COLUMNS if dimension in SLICED_DIMENSIONS else [])
+
+
+def simplify_role_title(title):
+    """Clasifica heurísticamente el título de la vacante en un rol simplificado."""
+    title_lower = str(title).lower()
+    if 'software engineer' in title_lower or 'ingeniero de software' in title_lower or 'desarrollador' in title_lower:
+        return 'Software Engineer / Developer'
+    elif 'data scientist' in title_lower or 'científico de datos' in title_lower:
+        return 'Data Scientist'
+    elif 'product manager' in title_lower or 'gerente de producto' in title_lower:
+        return 'Product Manager'
+    elif 'devops' in title_lower or 'ingeniero devops' in title_lower:
+        return 'DevOps Engineer'
+    elif 'frontend' in title_lower:
+        return 'Frontend Developer'
+    elif 'backend' in title_lower:
+        return 'Backend Developer'
+    elif 'full stack' in title_lower:
+        return 'Full Stack Developer'
+    elif 'qa' in title_lower or 'quality assurance' in title_lower:
+        return 'QA Engineer'
+    elif 'analista de datos' in title_lower or 'data analyst' in title_lower:
+        return 'Data Analyst'
+    return 'Other' # Simplificado a 'Other' en lugar del título original sin simplificar para roles menos comunes
@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import uuid
+import logging
+import datetime
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROFILE_COLUMNS = ['phase', 'seconds', 'memory_delta_mb', 'depth']
+
+
+class PhaseProfiler:
+    """
+    Mide el tiempo y la variación de memoria (tracemalloc) de las fases de una ejecución, p. ej. un rerun del dashboard.
+    Deshabilitado, `phase` no hace nada, así que las fases se pueden dejar instrumentadas sin costo.
+
+    Las fases pueden anidarse: el tiempo de una fase incluye el de sus fases internas ('depth' indica el nivel).
+    tracemalloc es global al proceso y ralentiza todas las asignaciones mientras está activo; se inicia con el
+    primer PhaseProfiler habilitado y se detiene con `stop_memory_tracking`.
+    """
+    def __init__(self, enabled=True, track_memory=True):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.datetime.now().isoformat()
+        self.records = []
+        self._depth = 0
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        memory_before = tracemalloc.get_traced_memory()[0] if self.track_memory else None
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._depth -= 1
+            memory_delta = None
+            if memory_before is not None:
+                memory_delta = (tracemalloc.get_traced_memory()[0] - memory_before) / (1024 * 1024)
+            self.records.append({'phase': name, 'seconds': seconds, 'memory_delta_mb': memory_delta, 'depth': self._depth})
+
+    def to_frame(self):
+        """Fases medidas, en el orden en que terminaron."""
+        return pd.DataFrame(self.records, columns=PROFILE_COLUMNS)
+
+    def append_log(self, log_path, context=None):
+        """Añade una línea JSON por fase al log local (con el id y la hora de la ejecución) para seguir la evolución."""
+        if not self.records:
+            return
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                entry = {'run_id': self.run_id, 'started_at': self.started_at, **(context or {}), **record}
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+
+def stop_memory_tracking():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def load_profile_log(log_path):
+    """Log de perfilado como DataFrame (vacío si no existe), para graficar regresiones entre ejecuciones."""
+    if not os.path.exists(log_path):
+        return pd.DataFrame(columns=['run_id', 'started_at'] + PROFILE_COLUMNS)
+    return pd.read_json(log_path, lines=True)
@@ -1,240 +1,505 @@
 import pandas as pd
+import numpy as np
 import datetime
 import logging
+import time
 from database.supabase_client import SupabaseClient # Importar SupabaseClient
+from analysis.growth_engine import GrowthEngine
+from analysis.cooccurrence import build_incidence_matrix, cooccurrence_scores
+from analysis.metrics import ROLLUP_TABLES, SLICE_COLUMNS, rollup_key_columns
+from analysis.engines import create_engine, write_snapshot
+from config.paths import TREND_SNAPSHOT_DIR
+from runner.run_ledger import RunLedger
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def trend_record(date_str, metric_name, metric_value, count, previous_value=None, change_rate=None, sector=None, country=None, value=None):
+    """
+    Fila de la tabla 'trends'. `value` repite el conteo como número salvo que se indique otro (ej. el lift
+    de un par de habilidades); las métricas de crecimiento guardan además el valor de la ventana anterior
+    y la variación porcentual en columnas numéricas.
+    """
+    count = int(count) if pd.notna(count) else 0
+    return {
+        'date': date_str,
+        'metric_name': metric_name,
+        'metric_value': metric_value if pd.notna(metric_value) else "Unknown",
+        'count': count,
+        'value': round(float(value), 4) if value is not None and pd.notna(value) else count,
+        'previous_value': int(previous_value) if previous_value is not None and pd.notna(previous_value) else None,
+        'change_rate': round(float(change_rate), 4) if change_rate is not None and pd.notna(change_rate) else None,
+        'sector': sector,
+        'country': country
+    }
+
+
+def _ranked(keys, values, counts, top_n=None):
+    """Índices de las claves con conteo > 0, ordenadas por `values` descendente y luego por clave (columnas ya ordenadas)."""
+    order = np.argsort(-values, kind='stable')
+    order = order[counts[order] > 0]
+    return order[:top_n] if top_n else order
+
+
 class TrendAnalyzer:
-    def __init__(self):
+    # Columnas de 'jobs' (y de sus habilidades) que se leen para calcular los agregados diarios
+    ROLLUP_SOURCE_COLUMNS = "id, title, sector, country, posted_date, scraped_at, skills(skill_name)"
+    # Días de publicación por petición al leer de Supabase solo las vacantes de ciertos días
+    POSTED_DATES_CHUNK = 100
+    # Filas de tendencias por petición al escribir un backfill completo
+    BACKFILL_WRITE_CHUNK = 2000
+    # Vacantes mínimas en la ventana actual para publicar las métricas de un segmento país/sector
+    MIN_SLICE_SUPPORT = 20
+    SLICE_TOP_N = 10
+    # Vacantes mínimas en que deben coincidir dos habilidades y pares guardados por habilidad
+    COOCCURRENCE_MIN_PAIRS = 5
+    COOCCURRENCE_TOP_K = 5
+
+    def __init__(self, engine='pandas', snapshot_dir=None, run_ledger=None):
+        """
+        `engine` elige cómo se calculan los agregados a partir de las vacantes: 'pandas' (lee de Supabase)
+        o 'duckdb' (consulta el snapshot Parquet local; ver `refresh_snapshot`).
+        `run_ledger` es el historial de ejecuciones (por defecto RunLedger()).
+        """
         self.db = SupabaseClient()
-        logging.info("TrendAnalyzer inicializado con SupabaseClient.")
-
-    def _fetch_all_jobs_with_skills(self, start_date=None, end_date=None):
-        """
-        Obtiene todos los trabajos y sus habilidades asociadas dentro de un rango de fechas.
-        Retorna un DataFrame de Pandas.
-        """
-        logging.info(f"Fetching jobs from Supabase for trend analysis (start_date={start_date}, end_date={end_date})...")
-        # Asegurarse de que las fechas se pasen como string en formato 'YYYY-MM-DD' si SupabaseClient lo espera así
-        start_date_str = start_date.isoformat() if start_date else None
-        end_date_str = end_date.isoformat() if end_date else None
-
-        response = self.db.get_jobs(limit=None, start_date=start_date_str, end_date=end_date_str)
-        jobs_data = response.data if response and response.data else []
-
-        if not jobs_data:
-            logging.warning("No se encontraron datos de trabajos en Supabase para el análisis de tendencias en el período.")
-            return pd.DataFrame()
-
-        # Normalizar datos: convertir posted_date a datetime
-        df = pd.DataFrame(jobs_data)
-        if 'posted_date' in df.columns:
-            df['posted_date'] = pd.to_datetime(df['posted_date'], errors='coerce')
-        if 'scraped_at' in df.columns:
-            df['scraped_at'] = pd.to_datetime(df['scraped_at'], errors='coerce')
-
-        # Procesar habilidades anidadas
-        all_records = []
-        for index, row in df.iterrows():
-            # Obtener job_id de la tabla jobs (que es 'id')
-            job_db_id = row['id'] 
-            # Asegurarse de que 'skills' es una lista o iterable.
-            # Supabase devuelve skills como una lista de diccionarios si se usa "*, skills(*)"
-            skills_list = row.get('skills', []) 
-            
-            if skills_list:
-                for skill_entry in skills_list:
-                    # Crear un diccionario temporal para la fila
-                    record_dict = row.to_dict() # Convertir la serie a diccionario
-                    record_dict['job_id'] = job_db_id # Asegurar que job_id se mapea correctamente
-                    record_dict['skill_id'] = skill_entry.get('id')
-                    record_dict['skill_name'] = skill_entry.get('skill_name')
-                    record_dict['skill_category'] = skill_entry.get('skill_category')
-                    all_records.append(record_dict)
-            
-        # Crear un DataFrame con una fila por cada habilidad de cada trabajo
-        df_flat = pd.DataFrame(all_records)
-        logging.info(f"Loaded {len(df_flat)} flattened job/skill records.")
-        # Filtrar solo si 'posted_date' existe y no es nulo, y 'skill_name' existe y no es nulo
-        if 'posted_date' in df_flat.columns and 'skill_name' in df_flat.columns:
-            return df_flat.dropna(subset=['posted_date', 'skill_name'])
+        self.snapshot_dir = snapshot_dir
+        self.run_ledger = run_ledger or RunLedger()
+        self.engine = create_engine(engine, load_frames=self._fetch_jobs_frames, snapshot_dir=snapshot_dir)
+        logging.info(f"TrendAnalyzer inicializado con SupabaseClient (motor: {self.engine.name}).")
+
+    def _fetch_jobs_frames(self, start_date=None, end_date=None, dates=None, scraped_since=None):
+        """
+        Lee de Supabase, página a página, solo las columnas necesarias para los agregados: las vacantes publicadas
+        en el rango (o en los días `dates`, fechas ISO) y, con `scraped_since`, solo las scrapeadas desde entonces.
+        Retorna (jobs_df con id/title/sector/country/date/scraped_at, skills_df con job_id/skill_name).
+        """
+        logging.info(f"Fetching jobs from Supabase for daily rollups (start_date={start_date}, end_date={end_date}, "
+                     f"dates={len(dates) if dates is not None else 'all'}, scraped_since={scraped_since})...")
+        filters = {
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'scraped_since': scraped_since,
+        }
+        if dates is None:
+            pages = self.db.iter_jobs(columns=self.ROLLUP_SOURCE_COLUMNS, **filters)
         else:
-            return pd.DataFrame(columns=['skill_name', 'posted_date']) # Devolver un DF vacío con columnas esperadas si no hay datos
+            pages = (
+                page
+                for i in range(0, len(dates), self.POSTED_DATES_CHUNK)
+                for page in self.db.iter_jobs(columns=self.ROLLUP_SOURCE_COLUMNS, posted_dates=list(dates[i:i + self.POSTED_DATES_CHUNK]), **filters)
+            )
+
+        job_rows = []
+        skill_rows = []
+        for page in pages:
+            for job in page:
+                job_rows.append({
+                    'id': job['id'],
+                    'title': job.get('title'),
+                    'sector': job.get('sector'),
+                    'country': job.get('country'),
+                    'date': str(job['posted_date'])[:10] if job.get('posted_date') else None,
+                    'scraped_at': job.get('scraped_at'),
+                })
+                skill_rows.extend(
+                    {'job_id': job['id'], 'skill_name': skill.get('skill_name')}
+                    for skill in job.get('skills') or []
+                )
+
+        jobs_df = pd.DataFrame(job_rows, columns=['id', 'title', 'sector', 'country', 'date', 'scraped_at']).dropna(subset=['date'])
+        skills_df = pd.DataFrame(skill_rows, columns=['job_id', 'skill_name'])
+        logging.info(f"Loaded {len(jobs_df)} jobs and {len(skills_df)} job/skill records.")
+        return jobs_df, skills_df
+
+    def refresh_snapshot(self, snapshot_dir=None):
+        """Descarga todas las vacantes y habilidades de Supabase y las guarda como snapshot Parquet para el motor columnar."""
+        jobs_df, skills_df = self._fetch_jobs_frames()
+        write_snapshot(jobs_df, skills_df, snapshot_dir or self.snapshot_dir or TREND_SNAPSHOT_DIR)
+
+    def update_rollups(self, up_to_date=None):
+        """
+        Incorpora a los agregados diarios las vacantes scrapeadas desde la última actualización. Cada tabla guarda
+        en 'rollup_watermarks' el mayor `scraped_at` que ya tiene incorporado; se recalculan exactamente los días
+        (`posted_date`) de las vacantes scrapeadas desde entonces, aunque se hayan publicado hace meses. Una tabla
+        sin marca (nueva o vaciada) se reconstruye con todo el historial.
+        Falla sin escribir nada si el motor lee un snapshot tomado antes de `up_to_date` (por defecto, hoy).
+        """
+        if up_to_date is None:
+            up_to_date = datetime.date.today()
+        data_as_of = self.engine.data_as_of()
+        if data_as_of is not None and data_as_of < up_to_date:
+            # Reemplazar el rango con un snapshot viejo borraría de Supabase los agregados de los últimos días
+            raise RuntimeError(
+                f"El snapshot del motor '{self.engine.name}' es del {data_as_of} y los agregados se piden hasta el {up_to_date}. "
+                "Actualízalo antes con `refresh_snapshot` (`--refresh-snapshot`)."
+            )
+
+        watermarks = self.db.get_rollup_watermarks()
+        rebuild = [dimension for dimension, (table, _) in ROLLUP_TABLES.items() if not watermarks.get(table)]
+        incremental = [dimension for dimension in ROLLUP_TABLES if dimension not in rebuild]
+
+        total_rows = 0
+        if rebuild:
+            # La marca se lee antes que las vacantes: lo scrapeado mientras tanto se vuelve a leer en la próxima
+            _, scraped_through = self.engine.scraped_dates()
+            if scraped_through is None:
+                logging.info("No hay vacantes para construir los agregados diarios.")
+                return 0
+            total_rows += self._replace_rollups(self.engine.daily_rollups(), rebuild, None, scraped_through)
+            logging.info(f"Agregados diarios reconstruidos con todo el historial: {', '.join(rebuild)}.")
+        if incremental:
+            scraped_since = min((watermarks[ROLLUP_TABLES[dimension][0]] for dimension in incremental), key=pd.Timestamp)
+            dates, scraped_through = self.engine.scraped_dates(scraped_since)
+            if not dates:
+                logging.info(f"No hay vacantes scrapeadas desde {scraped_since}: agregados diarios al día.")
+                return total_rows
+            total_rows += self._replace_rollups(self.engine.daily_rollups(dates=dates), incremental, dates, scraped_through)
+            logging.info(f"Agregados diarios recalculados en {len(dates)} días ({dates[0]} a {dates[-1]}) con las vacantes scrapeadas desde {scraped_since}.")
+        return total_rows
+
+    def _replace_rollups(self, rollups, dimensions, dates, scraped_through):
+        """Reemplaza los agregados de `dimensions` en los días `dates` (todos con None) y luego avanza su marca."""
+        total_rows = 0
+        for dimension in dimensions:
+            table = ROLLUP_TABLES[dimension][0]
+            columns = rollup_key_columns(dimension)
+            rows = [
+                {**dict(zip(columns, values[:-1])), 'count': int(values[-1])}
+                for values in rollups[dimension][columns + ['count']].itertuples(index=False)
+            ]
+            total_rows += self.db.replace_rollups(table, rows, key_columns=columns, dates=dates)
+            self.db.set_rollup_watermark(table, scraped_through)
+        return total_rows
+
+    def _load_rollups(self, dimension, start_date=None, end_date=None):
+        """
+        Lee los agregados diarios de una dimensión. Retorna un DataFrame con 'date' (datetime.date), la clave,
+        'country' y 'sector' (solo en SLICED_DIMENSIONS) y 'count'.
+        """
+        table = ROLLUP_TABLES[dimension][0]
+        key_columns = rollup_key_columns(dimension)
+        rows = self.db.get_rollups(
+            table,
+            key_columns=key_columns,
+            start_date=start_date.isoformat() if start_date else None,
+            end_date=end_date.isoformat() if end_date else None,
+        )
+        columns = key_columns + ['count']
+        frame = pd.DataFrame(rows, columns=columns)
+        frame['date'] = pd.to_datetime(frame['date']).dt.date
+        frame['count'] = frame['count'].astype(int)
+        return frame
+
+    def _sum_rollups(self, dimension, start_date=None, end_date=None):
+        """Suma los agregados diarios de una dimensión en la ventana y los ordena de mayor a menor."""
+        key_column = ROLLUP_TABLES[dimension][1]
+        frame = self._load_rollups(dimension, start_date, end_date)
+        totals = frame.groupby(key_column)['count'].sum().reset_index()
+        return totals.sort_values(['count', key_column], ascending=[False, True])
 
     def get_most_demanded_skills(self, top_n=10, start_date=None, end_date=None):
         """Calcula las N habilidades más demandadas en el período."""
-        df_jobs_skills = self._fetch_all_jobs_with_skills(start_date, end_date)
-        if df_jobs_skills.empty:
+        demanded_skills = self._sum_rollups('skill', start_date, end_date)
+        if demanded_skills.empty:
             logging.info("No hay datos de habilidades para calcular las más demandadas.")
-            return pd.DataFrame(columns=['skill_name', 'count']) # Devolver DF vacío con columnas esperadas
+        return demanded_skills.head(top_n).reset_index(drop=True)
 
-        demanded_skills = df_jobs_skills.groupby('skill_name').size().reset_index(name='count')
-        demanded_skills = demanded_skills.sort_values('count', ascending=False).head(top_n)
-        return demanded_skills
+    def growth_engine(self, dimension, first_day, last_day):
+        """Lee una sola vez los agregados de una dimensión entre dos fechas y construye su GrowthEngine."""
+        key_column = ROLLUP_TABLES[dimension][1]
+        return GrowthEngine.from_rollups(self._load_rollups(dimension, first_day, last_day), key_column, first_day, last_day)
 
     def get_skills_growth_trend(self, period_days=30, top_n=10, end_date=None):
         """
-        Identifica las habilidades con mayor crecimiento/decrecimiento en los últimos `period_days`.
+        Identifica las habilidades con mayor crecimiento/decrecimiento en los últimos `period_days` (incluyendo `end_date`).
         Compara el período actual con el período anterior de la misma duración.
         """
         if end_date is None:
             end_date = datetime.date.today()
-        
-        current_period_start = end_date - datetime.timedelta(days=period_days)
-        previous_period_start = current_period_start - datetime.timedelta(days=period_days)
-        
-        df_current = self._fetch_all_jobs_with_skills(current_period_start, end_date)
-        df_previous = self._fetch_all_jobs_with_skills(previous_period_start, current_period_start - datetime.timedelta(days=1)) # Excluir el día de inicio del periodo actual
-
-        if df_current.empty and df_previous.empty:
-            logging.info("No hay datos de habilidades en ninguno de los períodos para calcular tendencias de crecimiento.")
-            return pd.DataFrame(columns=['skill_name', 'current_count', 'previous_count', 'change', 'growth_rate'])
 
-        # Asegurarse de que los DataFrames tengan la columna 'skill_name' antes de value_counts
-        current_skills_counts = pd.Series(dtype='int').rename('current_count')
-        if not df_current.empty and 'skill_name' in df_current.columns:
-            current_skills_counts = df_current['skill_name'].value_counts().rename('current_count')
-        
-        previous_skills_counts = pd.Series(dtype='int').rename('previous_count')
-        if not df_previous.empty and 'skill_name' in df_previous.columns:
-            previous_skills_counts = df_previous['skill_name'].value_counts().rename('previous_count')
-        
-        # Unir las series de conteo para formar un DataFrame, asegurando 'skill_name' como índice/columna
-        merged_skills = pd.DataFrame({
-            'current_count': current_skills_counts,
-            'previous_count': previous_skills_counts
-        }).reset_index()
-        merged_skills = merged_skills.rename(columns={'index': 'skill_name'}).fillna(0) # Asegurar que skill_name existe
-
-        merged_skills['change'] = merged_skills['current_count'] - merged_skills['previous_count']
-        # Evitar división por cero si previous_count es 0
-        merged_skills['growth_rate'] = (merged_skills['change'] / (merged_skills['previous_count'].replace(0, 1))) * 100 
-        
+        # Una sola lectura de agregados cubre ambos períodos
+        first_day = end_date - datetime.timedelta(days=2 * period_days - 1)
+        merged_skills = self.growth_engine('skill', first_day, end_date).growth(end_date, period_days)
         merged_skills = merged_skills[merged_skills['current_count'] > 0]
-        
-        growing_skills = merged_skills.sort_values('growth_rate', ascending=False).head(top_n)
-        return growing_skills[['skill_name', 'current_count', 'previous_count', 'change', 'growth_rate']]
+        if merged_skills.empty:
+            logging.info("No hay datos de habilidades en el período actual para calcular tendencias de crecimiento.")
 
+        growing_skills = merged_skills.sort_values(['growth_rate', 'skill_name'], ascending=[False, True]).head(top_n)
+        return growing_skills[['skill_name', 'current_count', 'previous_count', 'change', 'growth_rate']].reset_index(drop=True)
+
+    def get_skills_growth_table(self, windows=(7, 30, 90), end_date=None, offsets=None):
+        """
+        Crecimiento de todas las habilidades para varias ventanas lado a lado (por defecto 7, 30 y 90 días),
+        con una sola lectura de agregados. Ver `GrowthEngine.growth_table` para el formato de columnas.
+        """
+        if end_date is None:
+            end_date = datetime.date.today()
+        offsets = offsets or list(windows)
+        lookback_days = max(window_days + offset_days for window_days, offset_days in zip(windows, offsets))
+        engine = self.growth_engine('skill', end_date - datetime.timedelta(days=lookback_days - 1), end_date)
+        return engine.growth_table(end_date, windows=windows, offsets=offsets)
+
+    def get_skill_cooccurrence(self, start_date=None, end_date=None, min_pair_count=None, top_k=None):
+        """
+        Habilidades que se piden junto a cada habilidad ("¿qué más piden las vacantes de Kafka?"), con lift y PMI.
+        Construye una matriz dispersa vacante × habilidad y obtiene la co-ocurrencia con un producto de matrices
+        dispersas, sin auto-joins de DataFrames. Retorna los `top_k` pares de mayor lift por habilidad.
+        """
+        min_pair_count = min_pair_count or self.COOCCURRENCE_MIN_PAIRS
+        top_k = top_k or self.COOCCURRENCE_TOP_K
+        incidence, skill_names = build_incidence_matrix(self.engine.job_skill_links(start_date, end_date))
+        skill_pairs = cooccurrence_scores(incidence, skill_names, min_pair_count=min_pair_count, top_k=top_k)
+        logging.info(f"Co-ocurrencia de habilidades calculada: {incidence.shape[0]} vacantes, {len(skill_names)} habilidades, {len(skill_pairs)} pares.")
+        return skill_pairs
 
     def get_most_demanded_roles(self, top_n=10, start_date=None, end_date=None):
         """Calcula los N roles más demandados (basado en el título de la vacante, clasificado heurísticamente)."""
-        df_jobs = self._fetch_all_jobs_with_skills(start_date, end_date) 
-        if df_jobs.empty:
+        demanded_roles = self._sum_rollups('role', start_date, end_date).rename(columns={'role': 'simplified_role'})
+        if demanded_roles.empty:
             logging.info("No hay datos de trabajos para calcular los roles más demandados.")
-            return pd.DataFrame(columns=['simplified_role', 'count'])
-
-        def simplify_role_title(title):
-            title_lower = str(title).lower()
-            if 'software engineer' in title_lower or 'ingeniero de software' in title_lower or 'desarrollador' in title_lower:
-                return 'Software Engineer / Developer'
-            elif 'data scientist' in title_lower or 'científico de datos' in title_lower:
-                return 'Data Scientist'
-            elif 'product manager' in title_lower or 'gerente de producto' in title_lower:
-                return 'Product Manager'
-            elif 'devops' in title_lower or 'ingeniero devops' in title_lower:
-                return 'DevOps Engineer'
-            elif 'frontend' in title_lower:
-                return 'Frontend Developer'
-            elif 'backend' in title_lower:
-                return 'Backend Developer'
-            elif 'full stack' in title_lower:
-                return 'Full Stack Developer'
-            elif 'qa' in title_lower or 'quality assurance' in title_lower:
-                return 'QA Engineer'
-            elif 'analista de datos' in title_lower or 'data analyst' in title_lower:
-                return 'Data Analyst'
-            return 'Other' # Simplificado a 'Other' en lugar del título original sin simplificar para roles menos comunes
-
-        df_jobs['simplified_role'] = df_jobs['title'].apply(simplify_role_title)
-        demanded_roles = df_jobs.groupby('simplified_role').size().reset_index(name='count')
-        demanded_roles = demanded_roles.sort_values('count', ascending=False).head(top_n)
-        return demanded_roles
+        return demanded_roles.head(top_n).reset_index(drop=True)
 
     def get_sector_distribution(self, start_date=None, end_date=None):
         """Calcula la distribución de vacantes por sector."""
-        df_jobs = self._fetch_all_jobs_with_skills(start_date, end_date)
-        if df_jobs.empty:
+        sector_distribution = self._sum_rollups('sector', start_date, end_date)
+        if sector_distribution.empty:
             logging.info("No hay datos de trabajos para calcular la distribución por sector.")
-            return pd.DataFrame(columns=['sector', 'count'])
+        return sector_distribution.reset_index(drop=True)
 
-        sector_distribution = df_jobs.groupby('sector').size().reset_index(name='count')
-        sector_distribution = sector_distribution.sort_values('count', ascending=False)
-        return sector_distribution
+    def _track(self, kind, params):
+        """Registra la ejecución en el historial, con el motor entre sus parámetros."""
+        return self.run_ledger.track(kind, {**params, 'engine': self.engine.name})
 
-    def analyze_and_store_trends(self, analysis_date=None):
+    def analyze_and_store_trends(self, analysis_date=None, refresh_rollups=True):
         """
         Ejecuta el análisis de tendencias para una fecha específica y las almacena en Supabase.
         Por defecto, analiza el día actual y compara con el mes anterior para algunas métricas.
+        Con `refresh_rollups=False` no se actualizan antes los agregados diarios (p. ej. si el pipeline ya lo hizo).
+        El tiempo de cada fase y la latencia de escritura quedan en el historial de ejecuciones ('trends').
         """
         if analysis_date is None:
             analysis_date = datetime.date.today()
         
         logging.info(f"Iniciando análisis y almacenamiento de tendencias para la fecha: {analysis_date}")
 
-        # Rango de tiempo para análisis (últimos 30 días para muchas métricas)
-        last_month_start = analysis_date - datetime.timedelta(days=30)
-
-        # 1. Habilidades más demandadas (para el último mes)
-        demanded_skills = self.get_most_demanded_skills(top_n=15, start_date=last_month_start, end_date=analysis_date)
-        for _, row in demanded_skills.iterrows():
-            trend_data = {
-                'date': analysis_date.isoformat(),
-                'metric_name': 'most_demanded_skill',
-                'metric_value': row['skill_name'],
-                'count': int(row['count']),
-                'sector': None, 
-                'country': None
-            }
-            self.db.upsert_trend(trend_data)
-        logging.info(f"Tendencias de habilidades más demandadas almacenadas: {len(demanded_skills)} registros.")
-
-        # 2. Habilidades en crecimiento (comparando el último mes con el anterior)
-        growing_skills = self.get_skills_growth_trend(period_days=30, top_n=15, end_date=analysis_date)
-        for _, row in growing_skills.iterrows():
-            # Ajuste para el esquema existente: concatenar en metric_value
-            skill_name = row['skill_name'] if pd.notna(row['skill_name']) else "Unknown Skill"
-            growth_rate = row['growth_rate'] if pd.notna(row['growth_rate']) else 0.0
-            current_count = row['current_count'] if pd.notna(row['current_count']) else 0
-
-            trend_data_simplified = {
-                'date': analysis_date.isoformat(),
-                'metric_name': 'growing_skill',
-                'metric_value': f"{skill_name} ({'+' if growth_rate >= 0 else ''}{growth_rate:.2f}%)", # Concatenar para mostrar tasa
-                'count': int(current_count), 
-                'sector': None,
-                'country': None
-            }
-            self.db.upsert_trend(trend_data_simplified)
-        logging.info(f"Tendencias de habilidades en crecimiento almacenadas: {len(growing_skills)} registros.")
-
-        # 3. Roles más demandados (para el último mes)
-        demanded_roles = self.get_most_demanded_roles(top_n=15, start_date=last_month_start, end_date=analysis_date)
-        for _, row in demanded_roles.iterrows():
-            trend_data = {
-                'date': analysis_date.isoformat(),
-                'metric_name': 'most_demanded_role',
-                'metric_value': row['simplified_role'],
-                'count': int(row['count']),
-                'sector': None,
-                'country': None
-            }
-            self.db.upsert_trend(trend_data)
-        logging.info(f"Tendencias de roles más demandados almacenadas: {len(demanded_roles)} registros.")
-
-        # 4. Distribución por sector (para el último mes)
-        sector_distribution = self.get_sector_distribution(start_date=last_month_start, end_date=analysis_date)
-        for _, row in sector_distribution.iterrows():
-            trend_data = {
-                'date': analysis_date.isoformat(),
-                'metric_name': 'sector_distribution',
-                'metric_value': row['sector'],
-                'count': int(row['count']),
-                'sector': row['sector'], 
-                'country': None
-            }
-            self.db.upsert_trend(trend_data)
-        logging.info(f"Tendencias de distribución por sector almacenadas: {len(sector_distribution)} registros.")
+        with self._track('trends', {'analysis_date': analysis_date, 'refresh_rollups': refresh_rollups}) as recorder:
+            # Solo se agregan los días nuevos; las métricas siguientes suman estos agregados
+            if refresh_rollups:
+                with recorder.timed('rollups'):
+                    self.update_rollups(up_to_date=analysis_date)
+
+            # Rango de tiempo para análisis (últimos 30 días, incluyendo analysis_date, para muchas métricas)
+            last_month_start = analysis_date - datetime.timedelta(days=29)
+
+            # 1. Habilidades más demandadas (para el último mes)
+            with recorder.timed('demanded_skills'):
+                demanded_skills = self.get_most_demanded_skills(top_n=15, start_date=last_month_start, end_date=analysis_date)
+            logging.info(f"Tendencias de habilidades más demandadas calculadas: {len(demanded_skills)} registros.")
+
+            # 2. Habilidades en crecimiento (comparando el último mes con el anterior)
+            with recorder.timed('growing_skills'):
+                growing_skills = self.get_skills_growth_trend(period_days=30, top_n=15, end_date=analysis_date)
+            logging.info(f"Tendencias de habilidades en crecimiento calculadas: {len(growing_skills)} registros.")
+
+            # 3. Roles más demandados (para el último mes)
+            with recorder.timed('demanded_roles'):
+                demanded_roles = self.get_most_demanded_roles(top_n=15, start_date=last_month_start, end_date=analysis_date)
+            logging.info(f"Tendencias de roles más demandados calculadas: {len(demanded_roles)} registros.")
+
+            # 4. Distribución por sector (para el último mes)
+            with recorder.timed('sector_distribution'):
+                sector_distribution = self.get_sector_distribution(start_date=last_month_start, end_date=analysis_date)
+            logging.info(f"Tendencias de distribución por sector calculadas: {len(sector_distribution)} registros.")
+
+            trend_records = self._trend_records(
+                analysis_date.isoformat(),
+                demanded_skills=zip(demanded_skills['skill_name'], demanded_skills['count']),
+                growing_skills=zip(growing_skills['skill_name'], growing_skills['growth_rate'], growing_skills['current_count'], growing_skills['previous_count']),
+                demanded_roles=zip(demanded_roles['simplified_role'], demanded_roles['count']),
+                sector_distribution=zip(sector_distribution['sector'], sector_distribution['count']),
+            )
+
+            # 5. Las mismas métricas por país, sector y país+sector
+            with recorder.timed('slices'):
+                trend_records.extend(self._slice_trend_records(analysis_date, period_days=30))
+
+            # 6. Habilidades que suelen pedirse juntas (para el último mes)
+            with recorder.timed('cooccurrence'):
+                skill_pairs = self.get_skill_cooccurrence(start_date=last_month_start, end_date=analysis_date)
+            trend_records.extend(
+                trend_record(analysis_date.isoformat(), 'skill_cooccurrence', f"{skill_name} → {related_skill}", pair_count, value=lift)
+                for skill_name, related_skill, pair_count, lift in zip(skill_pairs['skill_name'], skill_pairs['related_skill'], skill_pairs['pair_count'], skill_pairs['lift'])
+            )
 
+            with recorder.timed('store'):
+                write_latency = self._store_trends(trend_records)
+            recorder.record('trends', self._write_metrics(trend_records, write_latency))
         logging.info("Análisis y almacenamiento de tendencias completado.")
         return True
+
+    def _trend_records(self, date_str, demanded_skills, growing_skills, demanded_roles, sector_distribution):
+        """
+        Construye las filas de 'trends' de un día a partir de tuplas: (skill, count),
+        (skill, growth_rate, current_count, previous_count), (role, count) y (sector, count).
+        """
+        trend_records = [
+            trend_record(date_str, 'most_demanded_skill', skill_name, count)
+            for skill_name, count in demanded_skills
+        ]
+        trend_records.extend(
+            trend_record(date_str, 'growing_skill', skill_name, current_count, previous_value=previous_count, change_rate=growth_rate)
+            for skill_name, growth_rate, current_count, previous_count in growing_skills
+        )
+        trend_records.extend(
+            trend_record(date_str, 'most_demanded_role', role, count)
+            for role, count in demanded_roles
+        )
+        trend_records.extend(
+            trend_record(date_str, 'sector_distribution', sector, count, sector=sector)
+            for sector, count in sector_distribution
+        )
+        return trend_records
+
+    def _slice_totals(self, dimension, previous_start, current_start, end_date):
+        """
+        Suma los agregados de una dimensión por segmento con un único groupby (país, sector, clave, período).
+        Los segmentos de solo país y solo sector se derivan de ese resultado sumando la otra columna.
+        Retorna un DataFrame con country, sector ('' = todos), la clave, 'current' y 'previous'.
+        """
+        key_column = ROLLUP_TABLES[dimension][1]
+        columns = SLICE_COLUMNS + [key_column, 'current', 'previous']
+        frame = self._load_rollups(dimension, previous_start, end_date)
+        if frame.empty:
+            return pd.DataFrame(columns=columns)
+
+        frame['period'] = np.where(frame['date'] >= current_start, 'current', 'previous')
+        totals = frame.groupby(SLICE_COLUMNS + [key_column, 'period'])['count'].sum().unstack('period', fill_value=0)
+        totals = totals.reindex(columns=['current', 'previous'], fill_value=0).reset_index()
+
+        # '' en el agregado significa "sin dato": esas vacantes no forman segmento propio
+        known_country = totals['country'] != ''
+        known_sector = totals['sector'] != ''
+        by_country = totals[known_country].groupby(['country', key_column], as_index=False)[['current', 'previous']].sum().assign(sector='')
+        by_sector = totals[known_sector].groupby(['sector', key_column], as_index=False)[['current', 'previous']].sum().assign(country='')
+        return pd.concat([totals[known_country & known_sector], by_country, by_sector], ignore_index=True)[columns]
+
+    def _slice_trend_records(self, analysis_date, period_days=30, top_n=None):
+        """
+        Calcula habilidades más demandadas, habilidades en crecimiento y roles más demandados para cada
+        segmento (país), (sector) y (país, sector) con al menos MIN_SLICE_SUPPORT vacantes en la ventana actual.
+        """
+        top_n = top_n or self.SLICE_TOP_N
+        current_start = analysis_date - datetime.timedelta(days=period_days - 1)
+        previous_start = current_start - datetime.timedelta(days=period_days)
+
+        skills = self._slice_totals('skill', previous_start, current_start, analysis_date)
+        roles = self._slice_totals('role', previous_start, current_start, analysis_date)
+
+        # Cada vacante tiene exactamente un rol: la suma de roles de un segmento es su número de vacantes
+        support = roles.groupby(SLICE_COLUMNS)['current'].sum()
+        supported = support[support >= self.MIN_SLICE_SUPPORT].index
+        skills = skills[skills.set_index(SLICE_COLUMNS).index.isin(supported)]
+        roles = roles[roles.set_index(SLICE_COLUMNS).index.isin(supported)]
+
+        skills = skills[skills['current'] > 0].assign(
+            growth_rate=lambda df: (df['current'] - df['previous']) / df['previous'].replace(0, 1) * 100
+        )
+        top_skills = skills.sort_values(['current', 'skill_name'], ascending=[False, True]).groupby(SLICE_COLUMNS).head(top_n)
+        top_growing = skills.sort_values(['growth_rate', 'skill_name'], ascending=[False, True]).groupby(SLICE_COLUMNS).head(top_n)
+        top_roles = roles[roles['current'] > 0].sort_values(['current', 'role'], ascending=[False, True]).groupby(SLICE_COLUMNS).head(top_n)
+
+        date_str = analysis_date.isoformat()
+        trend_records = []
+        for metric_name, frame, value_column in (
+            ('most_demanded_skill', top_skills, 'skill_name'),
+            ('growing_skill', top_growing, 'skill_name'),
+            ('most_demanded_role', top_roles, 'role'),
+        ):
+            is_growth = metric_name == 'growing_skill'
+            trend_records.extend(
+                trend_record(
+                    date_str, metric_name, row[value_column], row['current'],
+                    previous_value=row['previous'] if is_growth else None,
+                    change_rate=row['growth_rate'] if is_growth else None,
+                    sector=row['sector'] or None, country=row['country'] or None,
+                )
+                for row in frame.to_dict('records')
+            )
+        logging.info(f"Tendencias por segmento calculadas: {len(supported)} segmentos país/sector, {len(trend_records)} registros.")
+        return trend_records
+
+    def backfill_trends(self, start_date, end_date, window_days=30, top_n=15):
+        """
+        Recalcula las tendencias de cada día entre `start_date` y `end_date` (inclusive) en una sola pasada:
+        lee los agregados una vez, calcula las ventanas móviles de todos los días con sumas acumuladas
+        y escribe todas las filas en upserts masivos. Produce las mismas métricas globales que `analyze_and_store_trends`
+        día a día; los segmentos por país/sector y la co-ocurrencia de habilidades solo se calculan en el análisis diario.
+        """
+        if start_date > end_date:
+            raise ValueError(f"La fecha de inicio del backfill ({start_date}) es posterior a la de fin ({end_date}).")
+
+        logging.info(f"Iniciando backfill de tendencias del {start_date} al {end_date}...")
+        with self._track('backfill', {'start_date': start_date, 'end_date': end_date, 'window_days': window_days, 'top_n': top_n}) as recorder:
+            with recorder.timed('rollups'):
+                self.update_rollups(up_to_date=end_date)
+
+            # Los primeros días del motor solo alimentan las ventanas de los primeros días del rango
+            first_day = start_date - datetime.timedelta(days=2 * window_days - 1)
+            with recorder.timed('load_rollups'):
+                skill_engine = self.growth_engine('skill', first_day, end_date)
+                role_engine = self.growth_engine('role', first_day, end_date)
+                sector_engine = self.growth_engine('sector', first_day, end_date)
+            skill_keys, role_keys, sector_keys = skill_engine.keys, role_engine.keys, sector_engine.keys
+
+            with recorder.timed('compute'):
+                skill_current = skill_engine.rolling_counts(window_days)
+                skill_previous = skill_engine.rolling_counts(window_days, offset_days=window_days)
+                role_current = role_engine.rolling_counts(window_days)
+                sector_current = sector_engine.rolling_counts(window_days)
+                # Evitar división por cero si el período anterior no tiene vacantes
+                growth_rate = (skill_current - skill_previous) / np.where(skill_previous == 0, 1, skill_previous) * 100
+
+                trend_records = []
+                for day_index in range((start_date - first_day).days, skill_engine.days_count):
+                    day = first_day + datetime.timedelta(days=day_index)
+                    demanded = _ranked(skill_keys, skill_current[day_index], skill_current[day_index], top_n)
+                    growing = _ranked(skill_keys, growth_rate[day_index], skill_current[day_index], top_n)
+                    roles = _ranked(role_keys, role_current[day_index], role_current[day_index], top_n)
+                    sectors = _ranked(sector_keys, sector_current[day_index], sector_current[day_index])
+                    trend_records.extend(self._trend_records(
+                        day.isoformat(),
+                        demanded_skills=zip(skill_keys[demanded], skill_current[day_index, demanded]),
+                        growing_skills=zip(skill_keys[growing], growth_rate[day_index, growing], skill_current[day_index, growing], skill_previous[day_index, growing]),
+                        demanded_roles=zip(role_keys[roles], role_current[day_index, roles]),
+                        sector_distribution=zip(sector_keys[sectors], sector_current[day_index, sectors]),
+                    ))
+
+            days_count = (end_date - start_date).days + 1
+            logging.info(f"Backfill calculado: {len(trend_records)} tendencias para {days_count} días.")
+            with recorder.timed('store'):
+                write_latency = self._store_trends(trend_records, chunk_size=self.BACKFILL_WRITE_CHUNK)
+            recorder.record('trends', self._write_metrics(trend_records, write_latency, chunk_size=self.BACKFILL_WRITE_CHUNK))
+        logging.info("Backfill de tendencias completado.")
+        return len(trend_records)
+
+    @staticmethod
+    def _write_metrics(trend_records, write_latency, chunk_size=None):
+        """Métricas de escritura de una ejecución para el historial (mismos nombres que las de los spiders)."""
+        calls = -(-len(trend_records) // (chunk_size or len(trend_records))) if trend_records else 0
+        return {'records': len(trend_records), 'db_write/calls': calls, 'db_write/seconds': write_latency}
+
+    def _store_trends(self, trend_records, chunk_size=None):
+        """
+        Guarda las tendencias con upserts masivos y mide su latencia. Sin `chunk_size`,
+        todas las filas de la ejecución van en un único upsert.
+        """
+        if not trend_records:
+            logging.info("No hay tendencias para almacenar.")
+            return 0.0
+        chunk_size = chunk_size or len(trend_records)
+        write_start = time.perf_counter()
+        for i in range(0, len(trend_records), chunk_size):
+            self.db.upsert_trends(trend_records[i:i + chunk_size])
+        write_latency = time.perf_counter() - write_start
+        requests_count = -(-len(trend_records) // chunk_size)
+        logging.info(f"{len(trend_records)} tendencias almacenadas en {requests_count} upsert(s) masivo(s). Latencia total de escritura: {write_latency:.3f}s.")
+        return write_latency
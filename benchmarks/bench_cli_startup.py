@@ -0,0 +1,89 @@
+"""
+Benchmark del arranque en frío de main.py: tiempo desde que se lanza el proceso hasta que termina para
+subcomandos que no hacen trabajo real (`--help` de cada uno y `runs`), es decir, el costo de importar lo
+que cada subcomando necesita. Es lo que se paga en cada ejecución que lanzan el dashboard y el scheduler.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_cli_startup.py --repeat 10
+    python benchmarks/bench_cli_startup.py --budget 0.5        # falla (código 1) si algún caso supera 0.5 s
+    python benchmarks/bench_cli_startup.py --importtime scrape  # módulos que más tardan en importar
+
+Cada caso se ejecuta en un proceso nuevo `--repeat` veces y se reporta el mínimo y la mediana; la primera
+ejecución (que calienta la caché de disco y los .pyc) no se cuenta.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MAIN = os.path.join(PROJECT_ROOT, 'main.py')
+
+CASES = {
+    'help': ['--help'],
+    'scrape': ['scrape', '--help'],
+    'analyze': ['analyze', '--help'],
+    'export': ['export', '--help'],
+    'runs': ['runs', '--last', '1'],
+}
+
+
+def run_once(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, MAIN, *args], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"`main.py {' '.join(args)}` terminó con código {result.returncode}:\n{result.stderr}")
+    return elapsed
+
+
+def measure(args, repeat):
+    run_once(args)
+    return [run_once(args) for _ in range(repeat)]
+
+
+def show_importtime(args, top=15):
+    """Módulos con mayor tiempo acumulado de importación (python -X importtime) para un caso."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', MAIN, *args], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative_us, module = line[len('import time:'):].split('|')
+        if cumulative_us.strip().isdigit():
+            rows.append((int(cumulative_us), module.strip()))
+    for cumulative_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>9.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="Ejecuciones medidas por caso (por defecto: 5).")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help="Casos a medir (por defecto: todos).")
+    parser.add_argument('--budget', type=float, default=None, help="Segundos máximos de la mediana de cada caso; si alguno lo supera, termina con código 1.")
+    parser.add_argument('--importtime', choices=list(CASES), default=None, help="Muestra los módulos más lentos de importar en este caso y termina.")
+    args = parser.parse_args()
+
+    if args.importtime:
+        show_importtime(CASES[args.importtime])
+        return 0
+
+    print(f"{'caso':<10} {'comando':<26} {'mín (s)':>9} {'mediana (s)':>12}")
+    over_budget = []
+    for case in args.cases:
+        timings = measure(CASES[case], args.repeat)
+        median = statistics.median(timings)
+        print(f"{case:<10} {' '.join(CASES[case]):<26} {min(timings):>9.3f} {median:>12.3f}")
+        if args.budget is not None and median > args.budget:
+            over_budget.append(case)
+
+    if over_budget:
+        print(f"Superan el presupuesto de {args.budget:.3f} s: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Benchmark de la carga de datos del dashboard: conversión anterior (JSON stringify por fila + astype(str)
++ json.loads de las habilidades en cada rerun) frente a database/dashboard_loader.py.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_dashboard_loader.py --jobs 50000
+
+Genera filas sintéticas con la forma que devuelve Supabase (vacantes con sus habilidades anidadas,
+en páginas de 1000) y mide para cada cargador el tiempo y el pico de memoria de Python (tracemalloc)
+desde las filas ya descargadas hasta los DataFrames listos para los gráficos, más la memoria que
+ocupan esos DataFrames. El cargador anterior recibe description/requirements porque los pedía con
+el resto de columnas; el nuevo no, porque solo se piden al abrir la pestaña de datos crudos.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.dashboard_loader import build_job_frames  # noqa: E402
+
+COUNTRIES = ['Colombia', 'México', 'Argentina', 'Chile', 'Perú', 'Brasil', None]
+SECTORS = ['Fintech', 'Edtech', 'Healthtech', 'E-commerce', 'Consultoría', None]
+SENIORITIES = ['Junior', 'Mid', 'Senior', 'Lead', None]
+PLATFORMS = ['LinkedIn', 'Computrabajo']
+SKILLS_PER_JOB = 6
+VOCABULARY_SIZE = 400
+PAGE_SIZE = 1000
+
+
+def make_pages(jobs_count, with_texts, seed=42):
+    """Páginas de filas tipo Supabase. Con `with_texts` incluye description y requirements (~2 KB por vacante)."""
+    rng = np.random.default_rng(seed)
+    description = "Buscamos una persona con experiencia en el área. " * 30
+    pages, page = [], []
+    for i in range(jobs_count):
+        day = int(rng.integers(1, 28))
+        row = {
+            'id': f"job-{i}", 'job_id': f"ext-{i}", 'title': f"Vacante {i % 500}",
+            'company_name': f"Empresa {i % 2000}", 'location': f"Ciudad {i % 50}",
+            'country': COUNTRIES[i % len(COUNTRIES)], 'sector': SECTORS[i % len(SECTORS)],
+            'job_type': 'Full-time', 'seniority_level': SENIORITIES[i % len(SENIORITIES)],
+            'source_platform': PLATFORMS[i % len(PLATFORMS)], 'role_category': 'Data',
+            'salary_range': None, 'company_size': None, 'company_industry': None, 'company_hq_country': None,
+            'company_type': None, 'company_website': None, 'source_url': f"https://example.com/{i}", 'company_id': None,
+            'posted_date': f"2024-03-{day:02d}", 'scraped_at': f"2024-03-{day:02d}T10:00:00+00:00", 'is_active': True,
+            'skills': [{'skill_name': f"skill-{code}", 'skill_category': 'Técnica'}
+                       for code in rng.zipf(1.3, SKILLS_PER_JOB) % VOCABULARY_SIZE],
+        }
+        if with_texts:
+            row['description'] = description
+            row['requirements'] = description[:500]
+        page.append(row)
+        if len(page) == PAGE_SIZE:
+            pages.append(page)
+            page = []
+    if page:
+        pages.append(page)
+    return pages
+
+
+def legacy_load(pages):
+    """Conversión que hacía dashboard.py antes de dashboard_loader (sin las tendencias)."""
+    jobs = [row for page in pages for row in page]
+    cleaned_jobs = []
+    for job in jobs:
+        cleaned_job = {}
+        for key, value in job.items():
+            if isinstance(value, (list, dict)):
+                cleaned_job[key] = json.dumps(value, ensure_ascii=False)
+            elif pd.isna(value) or value is None:
+                cleaned_job[key] = None
+            else:
+                cleaned_job[key] = value
+        cleaned_jobs.append(cleaned_job)
+    df = pd.DataFrame(cleaned_jobs)
+    for col in ['posted_date', 'scraped_at']:
+        df[col] = pd.to_datetime(df[col], errors='coerce', utc=True).dt.tz_localize(None)
+    text_cols = [
+        'title', 'company_name', 'location', 'country', 'sector', 'job_type',
+        'seniority_level', 'source_platform', 'role_category', 'salary_range',
+        'company_size', 'company_industry', 'company_hq_country', 'company_type', 'company_website',
+        'id', 'job_id', 'source_url', 'company_id',
+        'description', 'requirements', 'skills'
+    ]
+    for col in text_cols:
+        df[col] = df[col].astype(str).replace('nan', 'Desconocido').replace('None', 'Desconocido')
+    df['is_active'] = df['is_active'].fillna(False).astype(bool)
+    df = df.sort_values('scraped_at', ascending=False)
+    # Deserialización de 'skills' que el dashboard repetía en cada rerun
+    df['skills'] = df['skills'].apply(lambda x: json.loads(x) if x != 'Desconocido' else [])
+    return (df,)
+
+
+def new_load(pages):
+    return build_job_frames(pages)
+
+
+def measure(loader, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    frames = loader(pages)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frames_bytes = sum(frame.memory_usage(deep=True).sum() for frame in frames)
+    return seconds, peak, frames_bytes
+
+
+def run(jobs_count):
+    mb = 1024 * 1024
+    print(f"{'cargador':>10} | {'tiempo (s)':>10} | {'pico (MB)':>9} | {'DataFrames (MB)':>15}")
+    print("-" * 55)
+    for name, loader, with_texts in (('anterior', legacy_load, True), ('nuevo', new_load, False)):
+        pages = make_pages(jobs_count, with_texts)
+        seconds, peak, frames_bytes = measure(loader, pages)
+        print(f"{name:>10} | {seconds:>10.2f} | {peak / mb:>9.1f} | {frames_bytes / mb:>15.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara la carga de datos del dashboard antes y después de dashboard_loader.")
+    parser.add_argument("--jobs", type=int, default=50_000, help="Número de vacantes sintéticas.")
+    run(parser.parse_args().jobs)
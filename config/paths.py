@@ -0,0 +1,38 @@
+# FILE: Proyecto/job-market-intelligence/config/paths.py
+import os
+
+# Raíz del proyecto y directorio de datos locales (no versionado)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+
+# Spool de escrituras fallidas a Supabase (JSONL, solo se añaden líneas)
+WRITE_SPOOL_PATH = os.path.join(DATA_DIR, 'spool', 'failed_writes.jsonl')
+
+# Snapshot columnar (Parquet) de vacantes y habilidades para los motores analíticos de TrendAnalyzer
+TREND_SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots', 'trends')
+
+# Exportación Parquet de vacantes y habilidades, particionada por mes de publicación y país
+PARQUET_EXPORT_DIR = os.path.join(DATA_DIR, 'exports', 'parquet')
+
+# Cubo de conteos precalculado que usa el dashboard para responder a los filtros sin recorrer las vacantes
+CUBE_DIR = os.path.join(DATA_DIR, 'cube')
+
+# Cola persistente (SQLite) y logs de las ejecuciones de main.py lanzadas desde el dashboard
+JOB_RUNNER_DB_PATH = os.path.join(DATA_DIR, 'runner', 'runs.sqlite3')
+JOB_RUNNER_LOG_DIR = os.path.join(DATA_DIR, 'runner', 'logs')
+
+# Archivos CSV/Excel que arma el dashboard en segundo plano para descargar
+DASHBOARD_EXPORT_DIR = os.path.join(DATA_DIR, 'exports', 'dashboard')
+
+# Log local (JSONL) con los tiempos de cada fase del dashboard cuando el perfilado está activo
+PROFILING_LOG_PATH = os.path.join(DATA_DIR, 'profiling', 'dashboard_timings.jsonl')
+
+# Registro (SQLite) de las ejecuciones del pipeline diario y logs de sus pasos
+PIPELINE_DB_PATH = os.path.join(DATA_DIR, 'runner', 'pipeline.sqlite3')
+PIPELINE_LOG_DIR = os.path.join(DATA_DIR, 'runner', 'pipeline_logs')
+
+# Reportes de IA generados por el pipeline (Markdown)
+REPORTS_DIR = os.path.join(DATA_DIR, 'reports')
+
+# Historial (SQLite) de las ejecuciones de scraping y de análisis con sus métricas de rendimiento
+RUN_HISTORY_DB_PATH = os.path.join(DATA_DIR, 'runner', 'run_history.sqlite3')
@@ -2,18 +2,24 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
-import subprocess
 import time
 import logging
 from dotenv import load_dotenv
-import sys # <--- ¡AÑADIDO! Esto es crucial.
 from database.supabase_client import SupabaseClient
 from analysis.report_generator import ReportGenerator
 from analysis.trend_analyzer import TrendAnalyzer
+from analysis.aggregate_cube import AggregateCube
+from database.dashboard_loader import (
+    DASHBOARD_CACHE_VERSION, JOB_LIST_COLUMNS, SKILL_COLUMNS,
+    load_dashboard_frames, refresh_dashboard_frames, load_job_texts, load_trend_series, MAX_CHART_POINTS,
+)
 import datetime
 from config.geo import COMMON_GEO_DATA
-from io import BytesIO
-import json
+from database.dashboard_export import export_rows, page_count, page_rows, remove_export
+from runner.job_runner import JobQueue, JobRunner, QUEUED, RUNNING, SUCCEEDED, FAILED, main_command, tail_log
+from concurrent.futures import ThreadPoolExecutor
+from analysis.profiling import PhaseProfiler, stop_memory_tracking, load_profile_log
+from config.paths import PROFILING_LOG_PATH
 
 # --- CONFIGURACIÓN INICIAL ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,6 +31,25 @@ st.set_page_config(
     page_icon="📈"
 )
 
+# --- EJECUTOR EN SEGUNDO PLANO (uno por proceso de Streamlit, compartido por todas las sesiones) ---
+@st.cache_resource
+def get_job_queue():
+    queue = JobQueue()
+    JobRunner(queue).start()
+    return queue
+
+job_queue = get_job_queue()
+
+@st.cache_resource
+def get_export_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="dashboard-export")
+
+export_executor = get_export_executor()
+if 'raw_exports' not in st.session_state:
+    st.session_state.raw_exports = {}
+if 'seen_succeeded_run_id' not in st.session_state:
+    st.session_state.seen_succeeded_run_id = max((run['id'] for run in job_queue.list_runs(statuses=(SUCCEEDED,), limit=1)), default=0)
+
 # --- CACHE PARA REPORTES DE IA ---
 if 'ai_report_cache' not in st.session_state:
     st.session_state.ai_report_cache = None
@@ -100,6 +125,17 @@ gemini_api_key = os.getenv("GEMINI_API_KEY")
 # --- SIDEBAR & CONTROLES ---
 st.sidebar.header("⚙️ Panel de Control")
 
+# Perfilado opcional del renderizado: mide cada fase del rerun (tiempo y memoria) y lo registra en un log local
+profiling_enabled = st.sidebar.toggle(
+    "🔬 Perfilado de Renderizado",
+    key="profiling_enabled",
+    help="Mide el tiempo y la memoria de la carga, los filtros y cada vista, y los guarda en un log local."
+)
+if not profiling_enabled and st.session_state.get('profiling_was_enabled'):
+    stop_memory_tracking()
+st.session_state.profiling_was_enabled = profiling_enabled
+profiler = PhaseProfiler(enabled=profiling_enabled)
+
 with st.sidebar:
     st.subheader("⚡ Acciones Rápidas")
     
@@ -135,16 +171,8 @@ with st.sidebar:
         help="El número máximo de vacantes que cada scraper intentará obtener."
     )
 
-    def execute_scraper(selected_spiders, continent, country, start_date, end_date, max_jobs):
-        env = os.environ.copy()
-        
-        cmd = [sys.executable, "main.py"] # <--- ¡CAMBIO CRÍTICO APLICADO AQUÍ!
-        
-        if selected_spiders:
-            cmd.extend(["--spiders", ",".join(selected_spiders)])
-        else:
-            st.error("Por favor, selecciona al menos un scraper para ejecutar.")
-            return None
+    def build_scraper_args(selected_spiders, continent, country, start_date, end_date, max_jobs):
+        args = ["scrape", "--spiders", ",".join(selected_spiders)]
         
         continent_arg = str(continent).strip() if continent is not None else ""
         country_arg = str(country).strip() if country is not None else ""
@@ -152,31 +180,29 @@ with st.sidebar:
         end_date_arg = end_date.strftime("%Y-%m-%d") if end_date is not None else ""
 
         if continent_arg and continent_arg != "Selecciona un Continente":
-            cmd.extend(["--continent", continent_arg])
+            args.extend(["--continent", continent_arg])
         
         if country_arg and country_arg != "Todos los Países":
-            cmd.extend(["--country", country_arg])
+            args.extend(["--country", country_arg])
         elif country_arg == "Todos los Países" and continent_arg != "Selecciona un Continente":
-            cmd.extend(["--country", "Todos los Países"])
+            args.extend(["--country", "Todos los Países"])
         
         if start_date_arg:
-            cmd.extend(["--start_date", start_date_arg])
+            args.extend(["--start_date", start_date_arg])
         
         if end_date_arg:
-            cmd.extend(["--end_date", end_date_arg])
+            args.extend(["--end_date", end_date_arg])
 
-        cmd.extend(["--max_jobs", str(max_jobs)])
-        
-        logging.info(f"Comando subprocess a ejecutar: {cmd}")
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            env=env,
-            check=False
-        )
-        return result
+        args.extend(["--max_jobs", str(max_jobs)])
+        return args
+
+    def submit_run(kind, args, label):
+        """Encola una ejecución de main.py en el ejecutor en segundo plano (una sola activa por tipo)."""
+        run, created = job_queue.submit(kind, main_command(*args), dedup_key=kind)
+        if created:
+            st.success(f"✅ {label} encolado (ejecución #{run['id']}). Puedes seguir usando el dashboard mientras corre.")
+        else:
+            st.info(f"⏳ Ya hay un {label.lower()} en curso (ejecución #{run['id']}); no se lanzó otro.")
 
     if st.button("🔄 Ejecutar Scrapers", type="primary", use_container_width=True, key='run_scraper_btn'):
         if selected_continent_scrape == "Selecciona un Continente":
@@ -184,69 +210,60 @@ with st.sidebar:
         elif not selected_spiders_scrape:
             st.error("Por favor, selecciona al menos un scraper para ejecutar.")
         else:
-            with st.spinner(f"Extrayendo vacantes ({', '.join(selected_spiders_scrape)})... (Esto puede tardar varios minutos por scraper/seguridad)"):
-                try:
-                    result = execute_scraper(
-                        selected_spiders_scrape,
-                        selected_continent_scrape,
-                        selected_country_scrape,
-                        start_date_scrape,
-                        end_date_scrape,
-                        max_jobs_scrape
-                    )
-                    
-                    if result and result.returncode == 0:
-                        st.success("✅ Proceso de scraping finalizado")
-                        logs = result.stderr + "\n" + result.stdout
-                        if "Vacante" in logs and "guardada con éxito" in logs:
-                            st.info("📊 Nuevos datos guardados en Supabase.")
-                        else:
-                            st.warning("⚠️ El scraper terminó, pero no se encontraron logs de datos guardados. Revisa los detalles.")
-                        
-                        with st.expander("Ver Detalles del Proceso"):
-                            st.code(logs)
-                        
-                        time.sleep(1)
-                        st.session_state.data_cache = None  # Limpiar cache manual
-                        st.rerun()
-                    else:
-                        st.error("❌ Error en el proceso de scraping")
-                        if result:
-                            st.text_area("Log de Error", result.stderr + "\n" + result.stdout, height=200)
-                        else:
-                            st.warning("El proceso de scraping no devolvió un resultado válido.")
-                except Exception as e:
-                    st.error(f"Error ejecutando el scraper: {e}")
+            scraper_args = build_scraper_args(
+                selected_spiders_scrape,
+                selected_continent_scrape,
+                selected_country_scrape,
+                start_date_scrape,
+                end_date_scrape,
+                max_jobs_scrape
+            )
+            submit_run("scrape", scraper_args, "Scraping")
 
     st.markdown("---")
     st.subheader("📈 Generar Análisis de Tendencias")
     st.write("Calcula métricas de tendencias (habilidades, roles, etc.) y las almacena en la base de datos.")
     if st.button("✨ Ejecutar Análisis de Tendencias", type="secondary", use_container_width=True, key='run_trend_analysis_btn'):
-        with st.spinner("Analizando tendencias y almacenando en Supabase..."):
-            try:
-                result = subprocess.run(
-                    [sys.executable, "main.py", "--analyze-trends"], # <--- También aplicando sys.executable aquí para consistencia
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
-                if result.returncode == 0:
-                    st.success("✅ Análisis de tendencias finalizado y almacenado.")
-                    st.info("Refresca el dashboard para ver las nuevas visualizaciones de tendencias.")
-                    with st.expander("Ver Logs del Análisis"):
-                        st.code(result.stdout + result.stderr)
-                    st.session_state.data_cache = None  # Limpiar cache manual
-                    time.sleep(1)
-                    st.rerun()
-                else:
-                    st.error("❌ Error al ejecutar el análisis de tendencias.")
-                    st.text_area("Log de Error del Análisis", result.stderr, height=200)
-            except Exception as e:
-                st.error(f"Error ejecutando el análisis de tendencias: {e}")
+        submit_run("analyze", ["analyze"], "Análisis de tendencias")
+
+    st.markdown("---")
+    st.subheader("🛰️ Ejecuciones en Segundo Plano")
+
+    @st.fragment(run_every=2)
+    def show_background_runs():
+        """Se actualiza sola cada 2 segundos sin volver a ejecutar el resto del dashboard."""
+        runs = job_queue.list_runs(limit=10)
+        if not runs:
+            st.caption("Aún no se ha lanzado ninguna ejecución.")
+            return
+        status_labels = {QUEUED: "⏳ En cola", RUNNING: "🏃 Corriendo", SUCCEEDED: "✅ Finalizada", FAILED: "❌ Fallida"}
+        kind_labels = {"scrape": "Scraping", "analyze": "Análisis de tendencias"}
+        runs_by_id = {run['id']: run for run in runs}
+        selected_id = st.selectbox(
+            "Ejecución", list(runs_by_id.keys()), key="background_run_select",
+            format_func=lambda run_id: f"#{run_id} · {kind_labels.get(runs_by_id[run_id]['kind'], runs_by_id[run_id]['kind'])} · "
+                                       f"{status_labels.get(runs_by_id[run_id]['status'], runs_by_id[run_id]['status'])}",
+        )
+        selected_run = runs_by_id.get(selected_id, runs[0])
+        st.code(tail_log(selected_run['log_path'], max_bytes=8000) or "(sin salida todavía)")
+
+        # Cuando termina bien una ejecución que esta sesión aún no vio, se refrescan los datos (solo el delta)
+        latest_succeeded = max((run['id'] for run in runs if run['status'] == SUCCEEDED), default=0)
+        if latest_succeeded > st.session_state.seen_succeeded_run_id:
+            st.session_state.seen_succeeded_run_id = latest_succeeded
+            st.session_state.data_refresh_pending = True
+            st.rerun(scope="app")
+
+    show_background_runs()
 
     st.markdown("---")
     st.subheader("⚠️ Mantenimiento de Datos")
 
+    # La caché se actualiza de forma incremental; una recarga completa también descarta vacantes borradas en Supabase
+    if st.button("🔁 Recargar Todos los Datos", type="secondary", use_container_width=True, key="full_reload_btn"):
+        st.session_state.data_cache = None
+        st.rerun()
+
     if st.button("🗑️ Limpiar Base de Datos", type="secondary", use_container_width=True, key="clear_db_only_btn"):
         st.session_state['confirm_clear_only_db'] = True 
 
@@ -296,181 +313,150 @@ if filter_start_date > filter_end_date:
     st.sidebar.error("La fecha de inicio no puede ser posterior a la fecha de fin.")
     
 # --- DATA LOADING (Sin hash de DataFrame, usando timestamp como key) ---
-def load_and_process_data_from_supabase():
+def load_data_from_supabase():
+    """Vacantes (sin textos largos), sus habilidades como tabla aparte y tendencias; ver database/dashboard_loader.py."""
     try:
-        db = SupabaseClient()
-        response_jobs = db.get_jobs(limit=None)
-        jobs = response_jobs.data if response_jobs and response_jobs.data else []
-        
-        response_trends = db.get_trends(limit=None)
-        trends_data = response_trends.data if response_trends and response_trends.data else []
-
-        df_loaded_jobs = pd.DataFrame()
-        if jobs:
-            # SOLUCIÓN DEFINITIVA: Convertir todos los valores ANTES de crear el DataFrame
-            cleaned_jobs = []
-            for job in jobs:
-                cleaned_job = {}
-                for key, value in job.items():
-                    if isinstance(value, (list, dict)):
-                        # Convertir listas/dicts a JSON string
-                        cleaned_job[key] = json.dumps(value, ensure_ascii=False)
-                    elif pd.isna(value) or value is None:
-                        cleaned_job[key] = None
-                    else:
-                        cleaned_job[key] = value
-                cleaned_jobs.append(cleaned_job)
-            
-            # Crear DataFrame con datos ya limpios
-            df_loaded_jobs = pd.DataFrame(cleaned_jobs)
-            
-            # Procesar fechas
-            date_cols = ['posted_date', 'scraped_at']
-            for col in date_cols:
-                if col in df_loaded_jobs.columns:
-                    temp_series = pd.to_datetime(df_loaded_jobs[col], errors='coerce', utc=True)
-                    if pd.api.types.is_datetime64_any_dtype(temp_series) and temp_series.dt.tz is not None:
-                        df_loaded_jobs[col] = temp_series.dt.tz_localize(None)
-                    else:
-                        df_loaded_jobs[col] = temp_series
-            
-            # Columnas de texto: convertir a string
-            text_cols = [
-                'title', 'company_name', 'location', 'country', 'sector', 'job_type', 
-                'seniority_level', 'source_platform', 'role_category', 'salary_range',
-                'company_size', 'company_industry', 'company_hq_country', 'company_type', 'company_website',
-                'id', 'job_id', 'source_url', 'company_id',
-                'description', 'requirements', 'skills'
-            ]
-            for col in text_cols:
-                if col in df_loaded_jobs.columns:
-                    df_loaded_jobs[col] = df_loaded_jobs[col].astype(str).replace('nan', 'Desconocido').replace('None', 'Desconocido')
-                else:
-                    df_loaded_jobs[col] = 'Desconocido'
-            
-            # Columnas clave
-            for col in ['seniority_level', 'role_category', 'sector']:
-                if col not in df_loaded_jobs.columns:
-                    df_loaded_jobs[col] = 'Desconocido'
-
-            # Booleanos
-            if 'is_active' in df_loaded_jobs.columns:
-                df_loaded_jobs['is_active'] = df_loaded_jobs['is_active'].fillna(False).astype(bool)
-            else:
-                df_loaded_jobs['is_active'] = False
-
-            df_loaded_jobs = df_loaded_jobs.sort_values('scraped_at', ascending=False)
-        
-        df_loaded_trends = pd.DataFrame()
-        if trends_data:
-            # Limpiar datos de trends ANTES de crear DataFrame
-            cleaned_trends = []
-            for trend in trends_data:
-                cleaned_trend = {}
-                for key, value in trend.items():
-                    if isinstance(value, (list, dict)):
-                        cleaned_trend[key] = json.dumps(value, ensure_ascii=False)
-                    elif pd.isna(value) or value is None:
-                        cleaned_trend[key] = None
-                    else:
-                        cleaned_trend[key] = value
-                cleaned_trends.append(cleaned_trend)
-            
-            df_loaded_trends = pd.DataFrame(cleaned_trends)
-            
-            required_trend_cols = ['date', 'metric_name', 'metric_value', 'count', 'sector', 'country']
-            for col in required_trend_cols:
-                if col not in df_loaded_trends.columns:
-                    df_loaded_trends[col] = None
-            
-            trend_text_cols = ['metric_name', 'metric_value', 'sector', 'country']
-            for col in trend_text_cols:
-                if col in df_loaded_trends.columns:
-                    df_loaded_trends[col] = df_loaded_trends[col].astype(str).replace('nan', 'Desconocido').replace('None', 'Desconocido')
-
-            if 'date' in df_loaded_trends.columns:
-                df_loaded_trends['date'] = pd.to_datetime(df_loaded_trends['date'], errors='coerce')
-            if 'count' in df_loaded_trends.columns:
-                df_loaded_trends['count'] = pd.to_numeric(df_loaded_trends['count'], errors='coerce').fillna(0).astype(int)
-
-            df_loaded_trends = df_loaded_trends.sort_values('date', ascending=False)
-
-        return df_loaded_jobs, df_loaded_trends
+        return load_dashboard_frames(SupabaseClient())
     except Exception as e:
         st.error(f"❌ Error al conectar o cargar datos de Supabase: {e}")
-        return pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(columns=JOB_LIST_COLUMNS), pd.DataFrame(columns=SKILL_COLUMNS), pd.DataFrame()
 
 # --- CACHE MANUAL CON SESSION_STATE ---
 if 'data_cache' not in st.session_state:
     st.session_state.data_cache = None
     st.session_state.cache_timestamp = None
+    st.session_state.data_cache_version = None
+    st.session_state.data_refresh_pending = False
 
-# Verificar si necesitamos recargar (cache expirado o vacío)
+# Verificar si necesitamos refrescar (cache expirado) o recargar todo (cache vacío o de otra versión)
 cache_ttl = 3600  # 1 hora en segundos
+# Máximo de vistas (gráficos ya construidos) memorizadas por sesión
+VIEW_CACHE_SIZE = 32
 current_time = time.time()
 cache_expired = (
     st.session_state.cache_timestamp is None or 
     (current_time - st.session_state.cache_timestamp) > cache_ttl
 )
+full_reload_needed = (
+    st.session_state.data_cache is None or
+    st.session_state.get('data_cache_version') != DASHBOARD_CACHE_VERSION
+)
 
-if st.session_state.data_cache is None or cache_expired:
-    df, df_trends = load_and_process_data_from_supabase()
-    st.session_state.data_cache = (df, df_trends)
-    st.session_state.cache_timestamp = current_time
-else:
-    df, df_trends = st.session_state.data_cache
+def load_aggregate_cube(jobs_df):
+    """
+    Cubo de conteos para los gráficos de distribución. Se reutiliza el guardado en disco (lo reconstruye
+    main.py tras cada scraping) si corresponde a las mismas vacantes; si no, se reconstruye y se guarda.
+    """
+    max_scraped_at = None
+    if 'scraped_at' in jobs_df.columns and jobs_df['scraped_at'].notna().any():
+        max_scraped_at = jobs_df['scraped_at'].max().isoformat()
+    try:
+        cube = AggregateCube.load()
+        if cube is not None and cube.matches(len(jobs_df), max_scraped_at):
+            return cube
+    except Exception as e:
+        logging.warning(f"⚠️ No se pudo leer el cubo de agregados guardado: {e}")
+    cube = AggregateCube.from_jobs(jobs_df)
+    try:
+        cube.save()
+    except OSError as e:
+        logging.warning(f"⚠️ No se pudo guardar el cubo de agregados: {e}")
+    return cube
+
+def refresh_data_from_supabase(jobs_df, skills_df, trends_df, cube):
+    """Incorpora a la caché solo las vacantes extraídas desde la última carga y actualiza el cubo con ellas."""
+    try:
+        jobs_df, skills_df, trends_df, new_jobs_df, replaced_jobs_df = refresh_dashboard_frames(SupabaseClient(), jobs_df, skills_df)
+    except Exception as e:
+        st.error(f"❌ Error al actualizar los datos desde Supabase: {e}")
+        return jobs_df, skills_df, trends_df, cube
+    texts_cache = st.session_state.get('job_texts_cache')
+    if texts_cache is not None and not replaced_jobs_df.empty:
+        st.session_state.job_texts_cache = texts_cache.drop(index=replaced_jobs_df['id'], errors='ignore')
+    return jobs_df, skills_df, trends_df, cube.apply_delta(new_jobs_df, replaced_jobs_df)
+
+if 'view_cache' not in st.session_state:
+    st.session_state.view_cache = {}
+    st.session_state.data_version = 0
+
+with profiler.phase("Carga de datos"):
+    if full_reload_needed:
+        df, df_skills, df_trends = load_data_from_supabase()
+        with profiler.phase("Cubo de agregados"):
+            cube = load_aggregate_cube(df)
+        st.session_state.data_cache = (df, df_skills, df_trends, cube)
+        st.session_state.data_cache_version = DASHBOARD_CACHE_VERSION
+        st.session_state.cache_timestamp = current_time
+        st.session_state.data_refresh_pending = False
+        st.session_state.job_texts_cache = None
+        st.session_state.data_version += 1
+        st.session_state.view_cache = {}
+    elif cache_expired or st.session_state.get('data_refresh_pending'):
+        df, df_skills, df_trends, cube = refresh_data_from_supabase(*st.session_state.data_cache)
+        st.session_state.data_cache = (df, df_skills, df_trends, cube)
+        st.session_state.cache_timestamp = current_time
+        st.session_state.data_refresh_pending = False
+        st.session_state.data_version += 1
+        st.session_state.view_cache = {}
+    else:
+        df, df_skills, df_trends, cube = st.session_state.data_cache
 
 # --- APLICAR FILTROS GLOBALES ---
-filtered_df = df.copy()
+with profiler.phase("Filtros"):
+    filtered_df = df
 
-if not filtered_df.empty:
-    # Deserializar la columna 'skills' DESPUÉS de cargar desde cache
-    if 'skills' in filtered_df.columns:
-        def safe_json_loads(x):
-            try:
-                if isinstance(x, str) and x.strip() and x != 'Desconocido':
-                    parsed = json.loads(x)
-                    return parsed if isinstance(parsed, list) else []
-                return []
-            except (json.JSONDecodeError, ValueError):
-                return []
-        
-        filtered_df['skills'] = filtered_df['skills'].apply(safe_json_loads)
-        
-    # Filtrar por continente
-    if selected_filter_continent != "Todos":
-        countries_in_continent = COMMON_GEO_DATA.get(selected_filter_continent, [])
-        if 'country' in filtered_df.columns:
-            continent_filter_mask = filtered_df['country'].str.lower().isin([c.lower() for c in countries_in_continent])
-            filtered_df = filtered_df[continent_filter_mask]
-        else:
-            st.warning("La columna 'country' no está disponible en los datos para filtrar por continente.")
+    if not filtered_df.empty:
+        # Filtrar por continente
+        if selected_filter_continent != "Todos":
+            countries_in_continent = COMMON_GEO_DATA.get(selected_filter_continent, [])
+            if 'country' in filtered_df.columns:
+                continent_filter_mask = filtered_df['country'].str.lower().isin([c.lower() for c in countries_in_continent])
+                filtered_df = filtered_df[continent_filter_mask]
+            else:
+                st.warning("La columna 'country' no está disponible en los datos para filtrar por continente.")
     
-    # Filtrar por país
-    if selected_filter_country != "Todos":
-        if 'country' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['country'].str.contains(selected_filter_country, case=False, na=False)]
+        # Filtrar por país
+        if selected_filter_country != "Todos":
+            if 'country' in filtered_df.columns:
+                filtered_df = filtered_df[filtered_df['country'].str.contains(selected_filter_country, case=False, na=False)]
+            else:
+                st.warning("La columna 'country' no está disponible en los datos para filtrar por país.")
+
+        # Filtrar por rango de fechas de publicación
+        if 'posted_date' in filtered_df.columns and pd.api.types.is_datetime64_any_dtype(filtered_df['posted_date']):
+            filtered_df = filtered_df[
+                (filtered_df['posted_date'].dt.date >= filter_start_date) & 
+                (filtered_df['posted_date'].dt.date <= filter_end_date)
+            ]
         else:
-            st.warning("La columna 'country' no está disponible en los datos para filtrar por país.")
+            st.warning("La columna 'posted_date' no es de tipo fecha o no existe, el filtro de rango de fechas no se aplicará.")
 
-    # Filtrar por rango de fechas de publicación
-    if 'posted_date' in filtered_df.columns and pd.api.types.is_datetime64_any_dtype(filtered_df['posted_date']):
-        filtered_df = filtered_df[
-            (filtered_df['posted_date'].dt.date >= filter_start_date) & 
-            (filtered_df['posted_date'].dt.date <= filter_end_date)
-        ]
-    else:
-        st.warning("La columna 'posted_date' no es de tipo fecha o no existe, el filtro de rango de fechas no se aplicará.")
-
-# --- FILTRAR LAS TENDENCIAS POR LA FECHA MÁS RECIENTE ---
-filtered_df_trends = df_trends.copy()
-latest_analysis_date = None
-if not filtered_df_trends.empty:
-    if 'date' in filtered_df_trends.columns and not filtered_df_trends['date'].empty:
-        latest_analysis_date = filtered_df_trends['date'].max()
-        filtered_df_trends = filtered_df_trends[filtered_df_trends['date'] == latest_analysis_date]
-    else:
-        st.warning("La columna 'date' no está disponible en los datos de tendencias para filtrar por la fecha más reciente.")
+    # --- MISMOS FILTROS SOBRE EL CUBO DE AGREGADOS (para los gráficos de distribución) ---
+    cube_countries = None
+    if selected_filter_continent != "Todos":
+        countries_in_continent = [c.lower() for c in COMMON_GEO_DATA.get(selected_filter_continent, [])]
+        cube_countries = [c for c in cube.countries() if c.lower() in countries_in_continent]
+    if selected_filter_country != "Todos":
+        cube_countries = [c for c in (cube.countries() if cube_countries is None else cube_countries) if selected_filter_country.lower() in c.lower()]
+    filtered_cube = cube.filter(filter_start_date, filter_end_date, cube_countries)
+
+    # --- FILTRAR LAS TENDENCIAS POR LA FECHA MÁS RECIENTE ---
+    filtered_df_trends = df_trends.copy()
+    latest_analysis_date = None
+    if not filtered_df_trends.empty:
+        if 'date' in filtered_df_trends.columns and not filtered_df_trends['date'].empty:
+            latest_analysis_date = filtered_df_trends['date'].max()
+            filtered_df_trends = filtered_df_trends[filtered_df_trends['date'] == latest_analysis_date]
+            # Habilidades y roles también se guardan por país/sector: se usa el segmento del país
+            # filtrado si el análisis lo generó (tuvo suficientes vacantes) y, si no, las métricas globales
+            segment_metrics = ['most_demanded_skill', 'growing_skill', 'most_demanded_role']
+            is_segment_metric = filtered_df_trends['metric_name'].isin(segment_metrics)
+            global_segment = (filtered_df_trends['country'] == 'Desconocido') & (filtered_df_trends['sector'] == 'Desconocido')
+            country_segment = (filtered_df_trends['country'] == selected_filter_country) & (filtered_df_trends['sector'] == 'Desconocido')
+            selected_segment = country_segment if (is_segment_metric & country_segment).any() else global_segment
+            filtered_df_trends = filtered_df_trends[~is_segment_metric | selected_segment]
+        else:
+            st.warning("La columna 'date' no está disponible en los datos de tendencias para filtrar por la fecha más reciente.")
 
 
 # --- MAIN DASHBOARD CONTENT ---
@@ -641,335 +627,553 @@ else:
 
     vibrant_colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#FFA07A', '#DDA0DD', '#20B2AA', '#F0E68C', '#FFB6C1']
     
-    tab_sector, tab_company, tab_country, tab_seniority, tab_roles, tab_skills_demand, tab_skills_growth, tab_platform_sector, tab_source_platform, tab_raw_data = st.tabs([
-        "🏢 Por Sector", 
-        "👥 Por Empresa", 
-        "🌍 Por País", 
-        "📶 Por Seniority",
-        "👔 Top Roles",
-        "💡 Skills Demandadas",
-        "📈 Skills en Crecimiento",
-        "🔌 Plataforma vs. Sector",
-        "📱 Distribución por Plataforma",
-        "📋 Datos Crudos"
-    ])
-
-    with tab_sector:
+    # Solo se calcula la vista seleccionada (st.tabs ejecuta el contenido de todas las pestañas en cada rerun).
+    # Los gráficos de cada vista se memorizan por (vista, filtros, versión de los datos, parámetros de la vista).
+    dashboard_views = {
+        "sector": "🏢 Por Sector",
+        "company": "👥 Por Empresa",
+        "country": "🌍 Por País",
+        "seniority": "📶 Por Seniority",
+        "roles": "👔 Top Roles",
+        "skills_demand": "💡 Skills Demandadas",
+        "skills_growth": "📈 Skills en Crecimiento",
+        "trend_series": "📉 Evolución Histórica",
+        "platform_sector": "🔌 Plataforma vs. Sector",
+        "source_platform": "📱 Distribución por Plataforma",
+        "raw_data": "📋 Datos Crudos",
+    }
+    active_view = st.radio(
+        "Vista", list(dashboard_views.keys()), format_func=dashboard_views.get,
+        horizontal=True, label_visibility="collapsed", key="active_dashboard_view"
+    )
+    filter_state = (selected_filter_continent, selected_filter_country, filter_start_date, filter_end_date)
+
+    def forget_view(view):
+        """Descarta los resultados memorizados de una vista (p. ej. si falló una consulta y se debe reintentar)."""
+        for key in [key for key in st.session_state.view_cache if key[0] == view]:
+            del st.session_state.view_cache[key]
+
+    def memoized_view(view, aggregate, make_figures, *params):
+        """
+        Gráficos de la vista (`make_figures(aggregate())`, o None si la agregación no retorna datos), recalculados
+        solo si cambian los filtros, los datos o `params`. Con el perfilado activo se miden ambos pasos por separado.
+        """
+        key = (view, filter_state, st.session_state.data_version, params)
+        view_cache = st.session_state.view_cache
+        if key not in view_cache:
+            if len(view_cache) >= VIEW_CACHE_SIZE:
+                view_cache.pop(next(iter(view_cache)))
+            with profiler.phase(f"{dashboard_views[view]} · agregación"):
+                view_data = aggregate()
+            with profiler.phase(f"{dashboard_views[view]} · gráficos"):
+                view_cache[key] = make_figures(view_data) if view_data is not None else None
+        return view_cache[key]
+
+    def aggregate_sector():
+        sector_counts = filtered_cube.value_counts('sector')
+        return None if sector_counts.empty else sector_counts.set_axis(['Sector', 'Número de Vacantes'], axis=1)
+
+    def sector_figures(sector_counts):
+        fig_sector = px.bar(
+            sector_counts.head(15),
+            x='Número de Vacantes',
+            y='Sector',
+            orientation='h',
+            title='<b>Top Sectores con Vacantes</b>',
+            color='Número de Vacantes',
+            color_continuous_scale=px.colors.sequential.Viridis,
+            labels={'Número de Vacantes': 'Vacantes', 'Sector': 'Sector'},
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_sector.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_sector
+
+    def render_sector():
         st.subheader("📊 Distribución de Vacantes por Sector")
-        if 'sector' in filtered_df.columns and not filtered_df['sector'].empty:
-            sector_counts = filtered_df['sector'].value_counts().reset_index()
-            sector_counts.columns = ['Sector', 'Número de Vacantes']
-            fig_sector = px.bar(
-                sector_counts.head(15), 
-                x='Número de Vacantes', 
-                y='Sector', 
-                orientation='h', 
-                title='<b>Top Sectores con Vacantes</b>',
-                color='Número de Vacantes',
-                color_continuous_scale=px.colors.sequential.Viridis,
-                labels={'Número de Vacantes': 'Vacantes', 'Sector': 'Sector'},
-                color_discrete_sequence=vibrant_colors
-            )
-            fig_sector.update_layout(
-                yaxis={'categoryorder':'total ascending'},
-                font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
+        fig_sector = memoized_view("sector", aggregate_sector, sector_figures)
+        if fig_sector is not None:
             st.plotly_chart(fig_sector, width='stretch')
         else:
             st.info("No hay datos de sector disponibles para mostrar.")
 
-    with tab_company:
+    def aggregate_company(top_n_companies):
+        return filtered_cube.top_companies(top_n_companies).set_axis(['Empresa', 'Número de Vacantes'], axis=1)
+
+    def company_figures(company_counts):
+        top_n_companies = len(company_counts)
+        fig_company = px.bar(
+            company_counts,
+            x='Número de Vacantes',
+            y='Empresa',
+            orientation='h',
+            title=f'<b>Top {top_n_companies} Compañías Contratando</b>',
+            color='Número de Vacantes',
+            color_continuous_scale=px.colors.sequential.Plasma,
+            labels={'Número de Vacantes': 'Vacantes', 'Empresa': 'Empresa'}
+        )
+        fig_company.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_company
+
+    def render_company():
         st.subheader("🏆 Top Empresas con Vacantes")
-        if 'company_name' in filtered_df.columns and not filtered_df['company_name'].empty: 
+        if filtered_cube.total() > 0:
             top_n_companies = st.slider("Top N Compañías", 5, 30, 15, key="top_companies_slider_tab")
-            company_counts = filtered_df['company_name'].value_counts().head(top_n_companies).reset_index()
-            company_counts.columns = ['Empresa', 'Número de Vacantes']
-            fig_company = px.bar(
-                company_counts, 
-                x='Número de Vacantes', 
-                y='Empresa', 
-                orientation='h', 
-                title=f'<b>Top {top_n_companies} Compañías Contratando</b>',
-                color='Número de Vacantes',
-                color_continuous_scale=px.colors.sequential.Plasma,
-                labels={'Número de Vacantes': 'Vacantes', 'Empresa': 'Empresa'}
-            )
-            fig_company.update_layout(
-                yaxis={'categoryorder':'total ascending'},
-                font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
-            st.plotly_chart(fig_company, width='stretch')
+            st.plotly_chart(memoized_view("company", lambda: aggregate_company(top_n_companies), company_figures, top_n_companies), width='stretch')
         else:
             st.info("No hay datos de empresa disponibles para mostrar.")
 
-    with tab_country:
+    def aggregate_country():
+        country_counts = filtered_cube.value_counts('country')
+        return None if country_counts.empty else country_counts.set_axis(['País', 'Número de Vacantes'], axis=1)
+
+    def country_figures(country_counts):
+        fig_country_pie = px.pie(
+            country_counts.head(10),
+            values='Número de Vacantes',
+            names='País',
+            title='<b>Top 10 Países (Gráfico de Pie)</b>',
+            hole=0.4,
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_country_pie.update_layout(
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig_country_bar = px.bar(
+            country_counts.head(15),
+            x='Número de Vacantes',
+            y='País',
+            orientation='h',
+            title='<b>Top 15 Países (Gráfico de Barras)</b>',
+            color='Número de Vacantes',
+            color_continuous_scale=px.colors.sequential.Cividis,
+            labels={'Número de Vacantes': 'Vacantes', 'País': 'País'}
+        )
+        fig_country_bar.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_country_pie, fig_country_bar
+
+    def render_country():
         st.subheader("🌍 Distribución de Vacantes por País")
-        if 'country' in filtered_df.columns and not filtered_df['country'].empty:
-            country_counts = filtered_df['country'].value_counts().reset_index()
-            country_counts.columns = ['País', 'Número de Vacantes']
-            
+        figures = memoized_view("country", aggregate_country, country_figures)
+        if figures is not None:
             col_pie, col_bar = st.columns(2)
-            
             with col_pie:
-                fig_country_pie = px.pie(
-                    country_counts.head(10), 
-                    values='Número de Vacantes', 
-                    names='País', 
-                    title='<b>Top 10 Países (Gráfico de Pie)</b>',
-                    hole=0.4,
-                    color_discrete_sequence=vibrant_colors
-                )
-                fig_country_pie.update_layout(
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_country_pie, width='stretch')
-            
+                st.plotly_chart(figures[0], width='stretch')
             with col_bar:
-                fig_country_bar = px.bar(
-                    country_counts.head(15), 
-                    x='Número de Vacantes', 
-                    y='País', 
-                    orientation='h', 
-                    title='<b>Top 15 Países (Gráfico de Barras)</b>',
-                    color='Número de Vacantes',
-                    color_continuous_scale=px.colors.sequential.Cividis,
-                    labels={'Número de Vacantes': 'Vacantes', 'País': 'País'}
-                )
-                fig_country_bar.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_country_bar, width='stretch')
+                st.plotly_chart(figures[1], width='stretch')
         else:
             st.info("No hay datos de país disponibles para mostrar.")
 
-    with tab_seniority:
+    def aggregate_seniority():
+        seniority_counts = filtered_cube.value_counts('seniority_level')
+        return None if seniority_counts.empty else seniority_counts.set_axis(['Nivel de Seniority', 'Conteo'], axis=1)
+
+    def seniority_figures(seniority_counts):
+        fig_seniority_pie = px.pie(
+            seniority_counts,
+            values='Conteo',
+            names='Nivel de Seniority',
+            title='<b>Distribución por Seniority (Pie)</b>',
+            hole=0.4,
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_seniority_pie.update_layout(
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig_seniority_bar = px.bar(
+            seniority_counts,
+            x='Conteo',
+            y='Nivel de Seniority',
+            orientation='h',
+            title='<b>Distribución por Seniority (Barras)</b>',
+            color='Conteo',
+            color_continuous_scale=px.colors.sequential.Pinkyl,
+            labels={'Conteo': 'Vacantes', 'Nivel de Seniority': 'Seniority'}
+        )
+        fig_seniority_bar.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_seniority_pie, fig_seniority_bar
+
+    def render_seniority():
         st.subheader("📶 Distribución de Nivel de Experiencia")
-        if 'seniority_level' in filtered_df.columns and not filtered_df['seniority_level'].empty:
-            seniority_counts = filtered_df['seniority_level'].value_counts().reset_index()
-            seniority_counts.columns = ['Nivel de Seniority', 'Conteo']
-            
+        figures = memoized_view("seniority", aggregate_seniority, seniority_figures)
+        if figures is not None:
             col_pie_sen, col_bar_sen = st.columns(2)
-            
             with col_pie_sen:
-                fig_seniority_pie = px.pie(
-                    seniority_counts, 
-                    values='Conteo', 
-                    names='Nivel de Seniority', 
-                    title='<b>Distribución por Seniority (Pie)</b>',
-                    hole=0.4,
-                    color_discrete_sequence=vibrant_colors
-                )
-                fig_seniority_pie.update_layout(
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_seniority_pie, width='stretch')
-            
+                st.plotly_chart(figures[0], width='stretch')
             with col_bar_sen:
-                fig_seniority_bar = px.bar(
-                    seniority_counts, 
-                    x='Conteo', 
-                    y='Nivel de Seniority', 
-                    orientation='h', 
-                    title='<b>Distribución por Seniority (Barras)</b>',
-                    color='Conteo',
-                    color_continuous_scale=px.colors.sequential.Pinkyl,
-                    labels={'Conteo': 'Vacantes', 'Nivel de Seniority': 'Seniority'}
-                )
-                fig_seniority_bar.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_seniority_bar, width='stretch')
+                st.plotly_chart(figures[1], width='stretch')
         else:
             st.info("No hay datos de nivel de experiencia disponibles para mostrar.")
 
-    with tab_roles:
+    def aggregate_roles():
+        demanded_roles_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'most_demanded_role']
+        return None if demanded_roles_trends.empty else demanded_roles_trends.sort_values('count', ascending=False).head(15)
+
+    def roles_figures(top_roles_data):
+        fig_roles = px.bar(
+            top_roles_data,
+            x='count',
+            y='metric_value',
+            orientation='h',
+            title=f'<b>Top Roles Más Demandados</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")}</sub>',
+            color='count',
+            color_continuous_scale=px.colors.sequential.Sunset,
+            labels={'count': 'Vacantes', 'metric_value': 'Rol'}
+        )
+        fig_roles.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_roles
+
+    def render_roles():
         st.subheader("👔 Roles Más Demandados (Tendencias)")
         if not filtered_df_trends.empty and latest_analysis_date:
-            demanded_roles_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'most_demanded_role']
-            if not demanded_roles_trends.empty:
-                top_roles_data = demanded_roles_trends.sort_values('count', ascending=False).head(15)
-                fig_roles = px.bar(
-                    top_roles_data, 
-                    x='count', 
-                    y='metric_value', 
-                    orientation='h',
-                    title=f'<b>Top Roles Más Demandados</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")}</sub>',
-                    color='count',
-                    color_continuous_scale=px.colors.sequential.Sunset,
-                    labels={'count': 'Vacantes', 'metric_value': 'Rol'}
-                )
-                fig_roles.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
+            fig_roles = memoized_view("roles", aggregate_roles, roles_figures)
+            if fig_roles is not None:
                 st.plotly_chart(fig_roles, width='stretch')
             else:
                 st.info("No hay datos de tendencias de roles demandados. Ejecuta el análisis de tendencias.")
         else:
             st.info("No hay datos de tendencias disponibles o están incompletos. Ejecuta el análisis de tendencias.")
 
-    with tab_skills_demand:
+    def aggregate_skills_demand():
+        demanded_skills_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'most_demanded_skill']
+        return None if demanded_skills_trends.empty else demanded_skills_trends.sort_values('count', ascending=False).head(15)
+
+    def skills_demand_figures(top_skills_data):
+        fig_skills = px.bar(
+            top_skills_data,
+            x='count',
+            y='metric_value',
+            orientation='h',
+            title=f'<b>Top Habilidades Más Demandadas</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")}</sub>',
+            color='count',
+            color_continuous_scale=px.colors.sequential.Aggrnyl,
+            labels={'count': 'Vacantes', 'metric_value': 'Habilidad'}
+        )
+        fig_skills.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_skills
+
+    def render_skills_demand():
         st.subheader("💡 Habilidades Más Demandadas")
         if not filtered_df_trends.empty and latest_analysis_date:
-            demanded_skills_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'most_demanded_skill']
-            if not demanded_skills_trends.empty:
-                top_skills_data = demanded_skills_trends.sort_values('count', ascending=False).head(15)
-                fig_skills = px.bar(
-                    top_skills_data, 
-                    x='count', 
-                    y='metric_value', 
-                    orientation='h',
-                    title=f'<b>Top Habilidades Más Demandadas</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")}</sub>',
-                    color='count',
-                    color_continuous_scale=px.colors.sequential.Aggrnyl,
-                    labels={'count': 'Vacantes', 'metric_value': 'Habilidad'}
-                )
-                fig_skills.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
+            fig_skills = memoized_view("skills_demand", aggregate_skills_demand, skills_demand_figures)
+            if fig_skills is not None:
                 st.plotly_chart(fig_skills, width='stretch')
             else:
                 st.info("No hay datos de tendencias de habilidades demandadas. Ejecuta el análisis de tendencias.")
         else:
             st.info("No hay datos de tendencias disponibles o están incompletos. Ejecuta el análisis de tendencias.")
 
-    with tab_skills_growth:
+    def aggregate_skills_growth():
+        """Retorna (top de crecimiento, evolución o None, error al leer la evolución o None), o None sin datos."""
+        growing_skills_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'growing_skill']
+        if growing_skills_trends.empty:
+            return None
+        top_growing_skills_data = growing_skills_trends.sort_values(['change_rate', 'count'], ascending=False).head(15)
+
+        # Evolución del crecimiento: solo el tramo de las 5 primeras habilidades, agregado en el servidor
+        segment_country = top_growing_skills_data['country'].iloc[0]
+        try:
+            df_growth_series, _ = load_trend_series(
+                SupabaseClient(),
+                'growing_skill',
+                start_date=latest_analysis_date - pd.DateOffset(months=6),
+                end_date=latest_analysis_date,
+                metric_values=top_growing_skills_data['metric_value'].head(5).tolist(),
+                country=None if segment_country == 'Desconocido' else segment_country,
+            )
+        except Exception as e:
+            return top_growing_skills_data, None, str(e)
+        if df_growth_series.empty:
+            return top_growing_skills_data, None, None
+        return top_growing_skills_data, df_growth_series, None
+
+    def skills_growth_figures(growth_data):
+        """Retorna (gráfico de crecimiento, gráfico de evolución o None, error al leer la evolución o None)."""
+        top_growing_skills_data, df_growth_series, series_error = growth_data
+        fig_growing_skills = px.bar(
+            top_growing_skills_data,
+            x='change_rate',
+            y='metric_value',
+            orientation='h',
+            title=f'<b>Top Habilidades en Crecimiento</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")} · últimos 30 días vs. 30 días anteriores</sub>',
+            color='count',
+            color_continuous_scale=px.colors.sequential.Blugrn,
+            hover_data={'count': True, 'previous_value': True},
+            labels={'change_rate': 'Crecimiento (%)', 'metric_value': 'Habilidad', 'count': 'Vacantes Actuales', 'previous_value': 'Vacantes Período Anterior'}
+        )
+        fig_growing_skills.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        if df_growth_series is None:
+            return fig_growing_skills, None, series_error
+        fig_growth_series = px.line(
+            df_growth_series,
+            x='date',
+            y='change_rate',
+            color='metric_value',
+            markers=True,
+            labels={'date': 'Fecha de Análisis', 'change_rate': 'Crecimiento (%)', 'metric_value': 'Habilidad'},
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_growth_series.update_layout(
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_growing_skills, fig_growth_series, None
+
+    def render_skills_growth():
         st.subheader("📈 Habilidades en Crecimiento")
         if not filtered_df_trends.empty and latest_analysis_date:
-            growing_skills_trends = filtered_df_trends[filtered_df_trends['metric_name'] == 'growing_skill']
-            if not growing_skills_trends.empty:
-                top_growing_skills_data = growing_skills_trends.sort_values('count', ascending=False).head(15)
-                fig_growing_skills = px.bar(
-                    top_growing_skills_data, 
-                    x='count', 
-                    y='metric_value', 
-                    orientation='h',
-                    title=f'<b>Top Habilidades en Crecimiento</b><br><sub>{latest_analysis_date.strftime("%Y-%m-%d")}</sub>',
-                    color='count',
-                    color_continuous_scale=px.colors.sequential.Blugrn,
-                    labels={'count': 'Vacantes Actuales', 'metric_value': 'Habilidad'}
-                )
-                fig_growing_skills.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
+            growth_view = memoized_view("skills_growth", aggregate_skills_growth, skills_growth_figures)
+            if growth_view is not None:
+                fig_growing_skills, fig_growth_series, series_error = growth_view
                 st.plotly_chart(fig_growing_skills, width='stretch')
+                st.markdown("#### 📅 Evolución del Crecimiento (últimos 6 meses)")
+                if series_error:
+                    st.warning(f"⚠️ No se pudo cargar la evolución del crecimiento: {series_error}")
+                    forget_view("skills_growth")
+                if fig_growth_series is not None:
+                    st.plotly_chart(fig_growth_series, width='stretch')
+                else:
+                    st.info("Aún no hay historial de crecimiento. Usa `python main.py backfill INICIO FIN` para generarlo.")
             else:
                 st.info("No hay datos de tendencias de habilidades en crecimiento. Ejecuta el análisis de tendencias.")
         else:
             st.info("No hay datos de tendencias disponibles o están incompletos. Ejecuta el análisis de tendencias.")
 
-    with tab_platform_sector:
-        st.subheader("🔌 Distribución por Plataforma y Sector")
-        if 'source_platform' in filtered_df.columns and 'sector' in filtered_df.columns and not filtered_df.empty:
-            platform_sector_counts = filtered_df.groupby(['source_platform', 'sector']).size().reset_index(name='Conteo')
-            fig_platform_sector = px.bar(
-                platform_sector_counts, 
-                x='Conteo', 
-                y='sector', 
-                color='source_platform',
-                title='<b>Vacantes por Plataforma y Sector</b>',
-                orientation='h',
-                labels={'Conteo': 'Vacantes', 'sector': 'Sector', 'source_platform': 'Plataforma'},
-                color_discrete_sequence=vibrant_colors
+    # Métricas con historial diario en 'trends' y la columna que se grafica de cada una
+    trend_series_metrics = {
+        'most_demanded_skill': ("Demanda de habilidades", 'count', 'Vacantes'),
+        'growing_skill': ("Crecimiento de habilidades", 'change_rate', 'Crecimiento (%)'),
+        'most_demanded_role': ("Demanda de roles", 'count', 'Vacantes'),
+    }
+    series_bucket_labels = {'day': "diario", 'week': "semanal", 'month': "mensual"}
+
+    def aggregate_trend_series(metric_name, start_date, end_date, metric_values, segment_country):
+        """Retorna (serie agregada en el servidor, granularidad, error o None)."""
+        try:
+            series_df, bucket = load_trend_series(
+                SupabaseClient(), metric_name, start_date, end_date, metric_values=list(metric_values),
+                country=None if segment_country == 'Desconocido' else segment_country,
             )
-            fig_platform_sector.update_layout(
-                yaxis={'categoryorder':'total ascending'},
-                font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
+        except Exception as e:
+            return None, None, str(e)
+        return series_df, bucket, None
+
+    def trend_series_figures(metric_name, series_data):
+        """Retorna (gráfico o None si no hay puntos, granularidad, error o None)."""
+        series_df, bucket, series_error = series_data
+        if series_error or series_df.empty:
+            return None, bucket, series_error
+        metric_label, value_column, value_label = trend_series_metrics[metric_name]
+        fig_series = px.line(
+            series_df,
+            x='date',
+            y=value_column,
+            color='metric_value',
+            markers=bucket != 'day',
+            title=f'<b>{metric_label}</b><br><sub>Promedio {series_bucket_labels[bucket]}</sub>',
+            hover_data={'points': True},
+            labels={'date': 'Fecha', value_column: value_label, 'metric_value': 'Valor', 'points': 'Días con datos'},
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_series.update_layout(
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_series, bucket, None
+
+    def render_trend_series():
+        st.subheader("📉 Evolución Histórica de Tendencias")
+        if filtered_df_trends.empty or not latest_analysis_date:
+            st.info("No hay datos de tendencias disponibles o están incompletos. Ejecuta el análisis de tendencias.")
+            return
+        active_series_metric = st.radio(
+            "Métrica", list(trend_series_metrics.keys()), format_func=lambda m: trend_series_metrics[m][0],
+            horizontal=True, key="trend_series_metric"
+        )
+        metric_trends = filtered_df_trends[filtered_df_trends['metric_name'] == active_series_metric]
+        if metric_trends.empty:
+            st.info("El último análisis no tiene datos para esta métrica. Ejecuta el análisis de tendencias.")
+            return
+        ranked_values = metric_trends.sort_values('count', ascending=False)['metric_value'].drop_duplicates().tolist()
+        col_values, col_range = st.columns([2, 1])
+        with col_values:
+            series_values = st.multiselect(
+                "Valores a graficar", ranked_values, default=ranked_values[:5], max_selections=10, key="trend_series_values"
             )
+        with col_range:
+            latest_date = latest_analysis_date.date()
+            series_range = st.date_input(
+                "Rango", value=(latest_date - datetime.timedelta(days=365), latest_date),
+                max_value=latest_date, key="trend_series_range"
+            )
+        if not series_values or len(series_range) != 2:
+            st.info("Elige al menos un valor y un rango de fechas completo.")
+            return
+        series_start, series_end = series_range
+        segment_country = metric_trends['country'].iloc[0]
+        fig_series, bucket, series_error = memoized_view(
+            "trend_series",
+            lambda: aggregate_trend_series(active_series_metric, series_start, series_end, tuple(series_values), segment_country),
+            lambda series_data: trend_series_figures(active_series_metric, series_data),
+            active_series_metric, series_start, series_end, tuple(series_values), segment_country,
+        )
+        if series_error:
+            st.warning(f"⚠️ No se pudo cargar la serie: {series_error}")
+            forget_view("trend_series")
+        elif fig_series is None:
+            st.info("No hay historial para esta selección. Usa `python main.py backfill INICIO FIN` para generarlo.")
+        else:
+            st.plotly_chart(fig_series, width='stretch')
+            st.caption(f"Agregado en Supabase por periodo ({series_bucket_labels[bucket]}) para no superar {MAX_CHART_POINTS} puntos.")
+
+    def aggregate_platform_sector():
+        platform_sector_counts = filtered_cube.value_counts(['source_platform', 'sector']).rename(columns={'count': 'Conteo'})
+        return None if platform_sector_counts.empty else platform_sector_counts
+
+    def platform_sector_figures(platform_sector_counts):
+        fig_platform_sector = px.bar(
+            platform_sector_counts,
+            x='Conteo',
+            y='sector',
+            color='source_platform',
+            title='<b>Vacantes por Plataforma y Sector</b>',
+            orientation='h',
+            labels={'Conteo': 'Vacantes', 'sector': 'Sector', 'source_platform': 'Plataforma'},
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_platform_sector.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_platform_sector
+
+    def render_platform_sector():
+        st.subheader("🔌 Distribución por Plataforma y Sector")
+        fig_platform_sector = memoized_view("platform_sector", aggregate_platform_sector, platform_sector_figures)
+        if fig_platform_sector is not None:
             st.plotly_chart(fig_platform_sector, width='stretch')
         else:
             st.info("No hay datos de plataforma o sector disponibles para mostrar.")
 
-    with tab_source_platform:
+    def aggregate_source_platform():
+        platform_counts = filtered_cube.value_counts('source_platform')
+        return None if platform_counts.empty else platform_counts.set_axis(['Plataforma', 'Número de Vacantes'], axis=1)
+
+    def source_platform_figures(platform_counts):
+        fig_platform_pie = px.pie(
+            platform_counts,
+            values='Número de Vacantes',
+            names='Plataforma',
+            title='<b>Distribución por Plataforma (Pie)</b>',
+            hole=0.4,
+            color_discrete_sequence=vibrant_colors
+        )
+        fig_platform_pie.update_layout(
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig_platform_bar = px.bar(
+            platform_counts,
+            x='Número de Vacantes',
+            y='Plataforma',
+            orientation='h',
+            title='<b>Distribución por Plataforma (Barras)</b>',
+            color='Número de Vacantes',
+            color_continuous_scale=px.colors.sequential.Magenta,
+            labels={'Número de Vacantes': 'Vacantes', 'Plataforma': 'Plataforma'}
+        )
+        fig_platform_bar.update_layout(
+            yaxis={'categoryorder':'total ascending'},
+            font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_platform_pie, fig_platform_bar
+
+    def render_source_platform():
         st.subheader("📱 Distribución de Vacantes por Plataforma")
-        if 'source_platform' in filtered_df.columns and not filtered_df['source_platform'].empty:
-            platform_counts = filtered_df['source_platform'].value_counts().reset_index()
-            platform_counts.columns = ['Plataforma', 'Número de Vacantes']
-            
+        platform_figures = memoized_view("source_platform", aggregate_source_platform, source_platform_figures)
+        if platform_figures is not None:
             col_pie_plat, col_bar_plat = st.columns(2)
-            
             with col_pie_plat:
-                fig_platform_pie = px.pie(
-                    platform_counts, 
-                    values='Número de Vacantes', 
-                    names='Plataforma', 
-                    title='<b>Distribución por Plataforma (Pie)</b>',
-                    hole=0.4,
-                    color_discrete_sequence=vibrant_colors
-                )
-                fig_platform_pie.update_layout(
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_platform_pie, width='stretch')
-            
+                st.plotly_chart(platform_figures[0], width='stretch')
             with col_bar_plat:
-                fig_platform_bar = px.bar(
-                    platform_counts, 
-                    x='Número de Vacantes', 
-                    y='Plataforma', 
-                    orientation='h', 
-                    title='<b>Distribución por Plataforma (Barras)</b>',
-                    color='Número de Vacantes',
-                    color_continuous_scale=px.colors.sequential.Magenta,
-                    labels={'Número de Vacantes': 'Vacantes', 'Plataforma': 'Plataforma'}
-                )
-                fig_platform_bar.update_layout(
-                    yaxis={'categoryorder':'total ascending'},
-                    font=dict(family="Arial, sans-serif", size=12, color="#2c3e50"),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_platform_bar, width='stretch')
+                st.plotly_chart(platform_figures[1], width='stretch')
         else:
             st.info("No hay datos de plataforma disponibles para mostrar.")
 
-    with tab_raw_data:
+    def render_raw_data():
         st.subheader("📋 Datos Crudos de Vacantes")
         display_columns_for_dataframe = [
             'title', 'company_name', 'location', 'country', 'source_platform', 
             'seniority_level', 'role_category', 'sector','salary_range', 
-            'posted_date', 'scraped_at', 'source_url', 'skills'
+            'posted_date', 'scraped_at', 'source_url'
         ]
         
-        df_display_raw = filtered_df.copy()
-        
-        if 'skills' in df_display_raw.columns:
-            df_display_raw['skills'] = df_display_raw['skills'].apply(
-                lambda x: ", ".join(
-                    [s.get('skill_name', str(s)) if isinstance(s, dict) else str(s) 
-                     for s in x] if isinstance(x, list) else []
-                ) if isinstance(x, list) else ''
-            )
+        # Solo se arma (columnas, habilidades y textos) la página visible, no todas las vacantes filtradas
+        include_texts = st.toggle("Incluir descripción y requisitos", key="raw_include_texts_toggle",
+                                  help="Se piden a Supabase solo para las vacantes que se muestran o exportan.")
+        col_page_size, col_page = st.columns(2)
+        raw_page_size = col_page_size.selectbox("Filas por página", [50, 100, 250, 500], index=1, key="raw_page_size")
+        raw_page_total = page_count(len(filtered_df), raw_page_size)
+        raw_page = col_page.number_input(f"Página (de {raw_page_total})", min_value=1, max_value=raw_page_total, value=1, step=1, key="raw_page")
 
-        existing_display_columns = [col for col in display_columns_for_dataframe if col in df_display_raw.columns]
-        
-        st.dataframe(df_display_raw[existing_display_columns], width='stretch')
+        def load_texts_for_page(job_ids):
+            # Si Supabase falla, la página se muestra sin los textos largos
+            try:
+                st.session_state.job_texts_cache = load_job_texts(SupabaseClient(), job_ids, st.session_state.get('job_texts_cache'))
+            except Exception as e:
+                st.error(f"❌ Error al cargar los textos de las vacantes: {e}")
+                return pd.DataFrame(index=job_ids)
+            return st.session_state.job_texts_cache.reindex(job_ids)
+
+        df_display_raw = page_rows(filtered_df, df_skills, display_columns_for_dataframe, int(raw_page), raw_page_size,
+                                   text_loader=load_texts_for_page if include_texts else None)
+        st.caption(f"Mostrando {len(df_display_raw)} de {len(filtered_df)} vacantes filtradas.")
+        st.dataframe(df_display_raw, width='stretch')
 
         st.markdown("---")
         st.subheader("📊 Datos Crudos de Tendencias")
@@ -981,51 +1185,44 @@ else:
         st.markdown("---")
         st.header("⬇️ Descargar Datos")
         if not filtered_df.empty:
-            # ELIMINADO @st.cache_data - función sin decorador
-            def convert_df_to_csv(df_to_convert):
-                """
-                Convierte un DataFrame a CSV sin usar @st.cache_data para evitar problemas
-                con tipos de datos no hashable.
-                """
-                df_export = df_to_convert.copy()
-                if 'skills' in df_export.columns:
-                    # Convertir lista de skills a string para exportar
-                    df_export['skills'] = df_export['skills'].apply(
-                        lambda x: ", ".join(
-                            [s.get('skill_name', str(s)) if isinstance(s, dict) else str(s) 
-                             for s in x] if isinstance(x, list) else []
-                        ) if isinstance(x, list) else str(x)
-                    )
-                return df_export.to_csv(index=False).encode('utf-8')
-
-            csv_file = convert_df_to_csv(filtered_df[existing_display_columns])
-            st.download_button(
-                label="📥 Descargar datos de Vacantes como CSV",
-                data=csv_file,
-                file_name="job_market_data.csv",
-                mime="text/csv",
-                key="download_csv_tab"
-            )
+            # Los archivos se arman en un hilo aparte, bloque a bloque, y se descargan cuando están listos
+            export_labels = {'csv': ("CSV", "text/csv"), 'xlsx': ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+            col_export_csv, col_export_excel = st.columns(2)
+            for file_format, column in (('csv', col_export_csv), ('xlsx', col_export_excel)):
+                if column.button(f"🛠️ Preparar {export_labels[file_format][0]} de Vacantes", key=f"prepare_export_{file_format}"):
+                    previous = st.session_state.raw_exports.pop(file_format, None)
+                    if previous and previous['future'].done() and not previous['future'].exception():
+                        remove_export(previous['future'].result()[0])
+                    text_client = SupabaseClient() if include_texts else None
+                    st.session_state.raw_exports[file_format] = {
+                        'future': export_executor.submit(
+                            export_rows, file_format, filtered_df, df_skills, display_columns_for_dataframe,
+                            (lambda job_ids, client=text_client: load_job_texts(client, job_ids)) if text_client else None,
+                        ),
+                        'rows': len(filtered_df),
+                    }
 
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                df_export_excel = filtered_df[existing_display_columns].copy()
-                if 'skills' in df_export_excel.columns:
-                    df_export_excel['skills'] = df_export_excel['skills'].apply(
-                        lambda x: ", ".join(
-                            [s.get('skill_name', str(s)) if isinstance(s, dict) else str(s) 
-                             for s in x] if isinstance(x, list) else []
-                        ) if isinstance(x, list) else ''
-                    )
-                df_export_excel.to_excel(writer, index=False, sheet_name='Job Data')
-            excel_buffer.seek(0)
-            st.download_button(
-                label="📥 Descargar datos de Vacantes como Excel",
-                data=excel_buffer,
-                file_name="job_market_data.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_excel_tab"
-            )
+            @st.fragment(run_every=2)
+            def show_raw_exports():
+                for file_format, export in st.session_state.raw_exports.items():
+                    label, mime = export_labels[file_format]
+                    future = export['future']
+                    if not future.done():
+                        st.info(f"⏳ Preparando {label} con {export['rows']} vacantes...")
+                    elif future.exception():
+                        st.error(f"❌ Error al preparar el {label}: {future.exception()}")
+                    else:
+                        path, rows_written = future.result()
+                        with open(path, 'rb') as export_file:
+                            st.download_button(
+                                label=f"📥 Descargar datos de Vacantes como {label} ({rows_written} filas)",
+                                data=export_file,
+                                file_name=f"job_market_data.{file_format}",
+                                mime=mime,
+                                key=f"download_{file_format}_tab"
+                            )
+
+            show_raw_exports()
         else:
             st.info("No hay datos de vacantes para descargar.")
         
@@ -1037,4 +1234,49 @@ else:
                 file_name="job_trends_data.csv",
                 mime="text/csv",
                 key="download_csv_trends_tab"
-            )
\ No newline at end of file
+            )
+
+    view_renderers = {
+        "sector": render_sector,
+        "company": render_company,
+        "country": render_country,
+        "seniority": render_seniority,
+        "roles": render_roles,
+        "skills_demand": render_skills_demand,
+        "skills_growth": render_skills_growth,
+        "trend_series": render_trend_series,
+        "platform_sector": render_platform_sector,
+        "source_platform": render_source_platform,
+        "raw_data": render_raw_data,
+    }
+    with profiler.phase(f"{dashboard_views[active_view]} · renderizado"):
+        view_renderers[active_view]()
+
+# --- PANEL DE PERFILADO ---
+if profiling_enabled:
+    profile_df = profiler.to_frame()
+    profiler.append_log(PROFILING_LOG_PATH, {'view': None if filtered_df.empty else active_view, 'jobs': len(filtered_df)})
+    with st.sidebar.expander("🔬 Tiempos del Último Renderizado", expanded=True):
+        # Solo las fases de primer nivel suman el total: las internas ya están incluidas en su fase contenedora
+        st.metric("Total", f"{profile_df.loc[profile_df['depth'] == 0, 'seconds'].sum():.2f} s")
+        st.dataframe(
+            profile_df.sort_values('seconds', ascending=False),
+            hide_index=True,
+            width='stretch',
+            column_config={
+                'phase': 'Fase',
+                'seconds': st.column_config.NumberColumn('Segundos', format="%.3f"),
+                'memory_delta_mb': st.column_config.NumberColumn('Δ Memoria (MB)', format="%.2f"),
+                'depth': 'Nivel',
+            }
+        )
+        profile_log = load_profile_log(PROFILING_LOG_PATH)
+        if not profile_log.empty:
+            run_totals = (
+                profile_log[profile_log['depth'] == 0]
+                .groupby('run_id', sort=False)
+                .agg(started_at=('started_at', 'first'), seconds=('seconds', 'sum'))
+                .tail(50)
+            )
+            st.caption("Total por renderizado (últimos 50)")
+            st.line_chart(run_totals.set_index('started_at')['seconds'])
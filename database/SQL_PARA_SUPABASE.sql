@@ -50,6 +50,9 @@ CREATE TABLE public.jobs (
     company_type TEXT,
     company_website TEXT,
 
+    -- Hash del contenido normalizado; permite omitir escrituras de vacantes sin cambios
+    content_hash TEXT,
+
     CONSTRAINT unique_job_platform UNIQUE (job_id, source_platform) -- Deduplicación clave
 );
 
@@ -95,11 +98,15 @@ CREATE TABLE public.trends (
     metric_name TEXT NOT NULL, -- Ej. 'most_demanded_skill', 'growing_skill', 'sector_distribution'
     metric_value TEXT NOT NULL, -- Ej. 'Python', 'Fintech', 'Software Engineer'
     count INTEGER, -- Valor asociado a la métrica (ej. frecuencia)
+    value NUMERIC, -- Valor numérico de la métrica en la ventana actual (ej. vacantes de los últimos 30 días)
+    previous_value NUMERIC, -- Valor en la ventana de comparación (solo métricas de crecimiento)
+    change_rate NUMERIC, -- Variación porcentual frente a previous_value (ej. 35.0 = +35%)
     sector TEXT, -- Filtro opcional por sector
     country TEXT, -- Filtro opcional por país
     created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()),
 
-    CONSTRAINT unique_trend_day_metric UNIQUE (date, metric_name, metric_value, sector, country)
+    -- NULLS NOT DISTINCT (Postgres 15+): las tendencias globales (sector/country NULL) también se deduplican en el upsert
+    CONSTRAINT unique_trend_day_metric UNIQUE NULLS NOT DISTINCT (date, metric_name, metric_value, sector, country)
 );
 
 ALTER TABLE public.trends ENABLE ROW LEVEL SECURITY;
@@ -109,4 +116,139 @@ CREATE POLICY "Allow authenticated users to update trends." ON public.trends FOR
 CREATE POLICY "Allow authenticated users to delete trends." ON public.trends FOR DELETE USING (auth.role() = 'authenticated' OR auth.role() = 'service_role');
 
 CREATE INDEX trends_date_idx ON public.trends (date DESC);
-CREATE INDEX trends_metric_name_idx ON public.trends (metric_name);
\ No newline at end of file
+CREATE INDEX trends_metric_name_idx ON public.trends (metric_name);
+-- Series de una métrica por rango de fechas y segmento (gráficos de crecimiento a lo largo de meses)
+CREATE INDEX trends_metric_date_segment_idx ON public.trends (metric_name, date, sector, country);
+
+-- Series de tendencias agregadas en el servidor por día, semana o mes, para que los gráficos de rangos
+-- largos reciban un punto por periodo y no una fila por día. En bases existentes, ejecuta solo este bloque.
+CREATE OR REPLACE FUNCTION public.trend_series_bucketed(
+    p_metric_name TEXT,
+    p_start_date DATE,
+    p_end_date DATE,
+    p_bucket TEXT DEFAULT 'day', -- 'day', 'week' (inicia el lunes) o 'month'
+    p_metric_values TEXT[] DEFAULT NULL, -- NULL = todos los valores de la métrica
+    p_sector TEXT DEFAULT NULL, -- NULL = tendencias globales
+    p_country TEXT DEFAULT NULL
+)
+RETURNS TABLE (date DATE, metric_value TEXT, count NUMERIC, value NUMERIC, change_rate NUMERIC, points INTEGER)
+LANGUAGE sql STABLE
+AS $$
+    SELECT date_trunc(p_bucket, t.date)::DATE AS date,
+           t.metric_value,
+           round(avg(t.count), 2) AS count,
+           avg(t.value) AS value,
+           avg(t.change_rate) AS change_rate,
+           count(*)::INTEGER AS points -- Días con datos en el periodo
+    FROM public.trends t
+    WHERE t.metric_name = p_metric_name
+      AND t.date BETWEEN p_start_date AND p_end_date
+      AND t.sector IS NOT DISTINCT FROM p_sector
+      AND t.country IS NOT DISTINCT FROM p_country
+      AND (p_metric_values IS NULL OR t.metric_value = ANY (p_metric_values))
+    GROUP BY 1, 2
+    ORDER BY 1, 2;
+$$;
+
+
+
+-- Tablas de agregados diarios (rollups) para el análisis incremental de tendencias.
+-- TrendAnalyzer solo recalcula los días nuevos; las métricas de ventana suman estas filas
+-- en lugar de volver a leer todas las vacantes. En bases existentes, ejecuta solo este bloque.
+CREATE TABLE public.daily_skill_counts (
+    date DATE NOT NULL, -- posted_date de las vacantes
+    skill_name TEXT NOT NULL,
+    country TEXT NOT NULL DEFAULT '', -- '' cuando la vacante no tiene país
+    sector TEXT NOT NULL DEFAULT '', -- '' cuando la vacante no tiene sector
+    count INTEGER NOT NULL, -- Número de vacantes que piden la habilidad ese día
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()),
+    PRIMARY KEY (date, skill_name, country, sector)
+);
+
+CREATE TABLE public.daily_role_counts (
+    date DATE NOT NULL,
+    role TEXT NOT NULL, -- Rol simplificado a partir del título
+    country TEXT NOT NULL DEFAULT '',
+    sector TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()),
+    PRIMARY KEY (date, role, country, sector)
+);
+
+CREATE TABLE public.daily_sector_counts (
+    date DATE NOT NULL,
+    sector TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()),
+    PRIMARY KEY (date, sector)
+);
+
+CREATE TABLE public.daily_country_counts (
+    date DATE NOT NULL,
+    country TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()),
+    PRIMARY KEY (date, country)
+);
+
+ALTER TABLE public.daily_skill_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.daily_role_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.daily_sector_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.daily_country_counts ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Public daily skill counts are viewable by all." ON public.daily_skill_counts FOR SELECT USING (true);
+CREATE POLICY "Public daily role counts are viewable by all." ON public.daily_role_counts FOR SELECT USING (true);
+CREATE POLICY "Public daily sector counts are viewable by all." ON public.daily_sector_counts FOR SELECT USING (true);
+CREATE POLICY "Public daily country counts are viewable by all." ON public.daily_country_counts FOR SELECT USING (true);
+-- Las escrituras se hacen con la service_role key, que omite RLS.
+
+-- Hasta qué scraped_at tiene incorporadas las vacantes cada tabla de agregados diarios: TrendAnalyzer
+-- recalcula los días de publicación de las vacantes scrapeadas después. Una tabla sin fila aquí se
+-- reconstruye con todo el historial (también la primera vez en bases que ya tenían agregados).
+CREATE TABLE IF NOT EXISTS public.rollup_watermarks (
+    table_name TEXT PRIMARY KEY, -- Ej. 'daily_skill_counts'
+    scraped_through TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now())
+);
+ALTER TABLE public.rollup_watermarks ENABLE ROW LEVEL SECURITY;
+
+-- Migraciones para bases de datos creadas con una versión anterior de este esquema. Se pueden ejecutar
+-- más de una vez: los pasos que borran o reescriben datos solo corren si falta la columna que añaden.
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS content_hash TEXT;
+-- Si ya existen tendencias duplicadas con sector/country NULL, elimínalas antes de recrear la restricción.
+ALTER TABLE public.trends DROP CONSTRAINT IF EXISTS unique_trend_day_metric;
+ALTER TABLE public.trends ADD CONSTRAINT unique_trend_day_metric UNIQUE NULLS NOT DISTINCT (date, metric_name, metric_value, sector, country);
+-- Agregados de habilidades y roles desglosados por país y sector. Las filas anteriores no tienen
+-- el desglose: se vacían las cuatro tablas y TrendAnalyzer las reconstruye con todo el historial.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = 'public' AND table_name = 'daily_skill_counts' AND column_name = 'country') THEN
+        ALTER TABLE public.daily_skill_counts ADD COLUMN IF NOT EXISTS country TEXT NOT NULL DEFAULT '';
+        ALTER TABLE public.daily_skill_counts ADD COLUMN IF NOT EXISTS sector TEXT NOT NULL DEFAULT '';
+        ALTER TABLE public.daily_skill_counts DROP CONSTRAINT IF EXISTS daily_skill_counts_pkey;
+        ALTER TABLE public.daily_skill_counts ADD PRIMARY KEY (date, skill_name, country, sector);
+        ALTER TABLE public.daily_role_counts ADD COLUMN IF NOT EXISTS country TEXT NOT NULL DEFAULT '';
+        ALTER TABLE public.daily_role_counts ADD COLUMN IF NOT EXISTS sector TEXT NOT NULL DEFAULT '';
+        ALTER TABLE public.daily_role_counts DROP CONSTRAINT IF EXISTS daily_role_counts_pkey;
+        ALTER TABLE public.daily_role_counts ADD PRIMARY KEY (date, role, country, sector);
+        TRUNCATE public.daily_skill_counts, public.daily_role_counts, public.daily_sector_counts, public.daily_country_counts, public.rollup_watermarks;
+    END IF;
+END
+$$;
+-- Tendencias numéricas: las tasas de crecimiento dejan de ir concatenadas en metric_value ("Python (+35.00%)").
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = 'public' AND table_name = 'trends' AND column_name = 'change_rate') THEN
+        ALTER TABLE public.trends ADD COLUMN IF NOT EXISTS value NUMERIC;
+        ALTER TABLE public.trends ADD COLUMN IF NOT EXISTS previous_value NUMERIC;
+        ALTER TABLE public.trends ADD COLUMN change_rate NUMERIC;
+        UPDATE public.trends
+        SET change_rate = substring(metric_value from ' \(([+-]?[0-9.]+)%\)$')::NUMERIC,
+            metric_value = regexp_replace(metric_value, ' \([+-]?[0-9.]+%\)$', '')
+        WHERE metric_name = 'growing_skill' AND metric_value ~ ' \([+-]?[0-9.]+%\)$';
+        UPDATE public.trends SET value = count WHERE value IS NULL;
+    END IF;
+END
+$$;
+CREATE INDEX IF NOT EXISTS trends_metric_date_segment_idx ON public.trends (metric_name, date, sector, country);
@@ -0,0 +1,115 @@
+import os
+import uuid
+import logging
+import pandas as pd
+import xlsxwriter
+from config.paths import DASHBOARD_EXPORT_DIR
+from database.dashboard_loader import skills_by_job
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Vacantes por bloque al exportar: cada bloque se arma (columnas, habilidades, textos) y se escribe antes de pasar al siguiente
+EXPORT_CHUNK_ROWS = 5000
+EXCEL_DATETIME_FORMAT = 'yyyy-mm-dd hh:mm'
+
+
+def page_count(total_rows, page_size):
+    return max(1, -(-total_rows // page_size))
+
+
+def build_rows(jobs_df, skills_df, columns, text_loader=None):
+    """
+    Filas a mostrar o exportar para `jobs_df` (normalmente una página o un bloque): las columnas indicadas,
+    las habilidades unidas por comas y, si se da `text_loader` (job_ids -> DataFrame indexado por id),
+    los textos largos que retorne.
+    """
+    rows = jobs_df[columns].copy()
+    # Como object antes de rellenar: un resultado categórico no acepta '' como valor nuevo
+    rows['skills'] = jobs_df['id'].map(skills_by_job(skills_df, jobs_df['id'])).astype(object).fillna('')
+    if text_loader is not None:
+        texts = text_loader(jobs_df['id'].tolist())
+        for column in texts.columns:
+            rows[column] = jobs_df['id'].map(texts[column]).astype(object).fillna('')
+    return rows
+
+
+def page_rows(jobs_df, skills_df, columns, page, page_size, text_loader=None):
+    """Página `page` (desde 1) de las filas a mostrar: solo se arman las vacantes de esa página."""
+    start = (page - 1) * page_size
+    return build_rows(jobs_df.iloc[start:start + page_size], skills_df, columns, text_loader)
+
+
+def iter_chunks(jobs_df, skills_df, columns, text_loader=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(jobs_df), chunk_rows):
+        yield build_rows(jobs_df.iloc[start:start + chunk_rows], skills_df, columns, text_loader)
+
+
+def write_csv(path, chunks):
+    """Escribe los bloques en un CSV (UTF-8) uno tras otro. Retorna el número de filas escritas."""
+    rows_written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=rows_written == 0)
+            rows_written += len(chunk)
+    return rows_written
+
+
+def _excel_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def write_excel(path, chunks, sheet_name='Job Data'):
+    """
+    Escribe los bloques en una hoja de Excel con el modo 'constant_memory' de xlsxwriter, que vuelca cada fila
+    a disco al pasar a la siguiente en vez de guardar la hoja completa en memoria. Retorna el número de filas escritas.
+    """
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        datetime_format = workbook.add_format({'num_format': EXCEL_DATETIME_FORMAT})
+        row_index = 0
+        for chunk in chunks:
+            if row_index == 0:
+                worksheet.write_row(0, 0, list(chunk.columns))
+                row_index = 1
+            datetime_columns = {i for i, column in enumerate(chunk.columns) if pd.api.types.is_datetime64_any_dtype(chunk[column])}
+            for values in chunk.itertuples(index=False, name=None):
+                for column_index, value in enumerate(values):
+                    value = _excel_value(value)
+                    if value is None:
+                        continue
+                    if column_index in datetime_columns:
+                        worksheet.write_datetime(row_index, column_index, value, datetime_format)
+                    else:
+                        worksheet.write(row_index, column_index, value)
+                row_index += 1
+    finally:
+        workbook.close()
+    return max(0, row_index - 1)
+
+
+def remove_export(path):
+    """Borra un archivo exportado que ya no se va a descargar (p. ej. al preparar uno nuevo)."""
+    try:
+        os.remove(path)
+    except OSError as e:
+        logging.warning(f"⚠️ No se pudo borrar la exportación {path}: {e}")
+
+
+WRITERS = {'csv': write_csv, 'xlsx': write_excel}
+
+
+def export_rows(file_format, jobs_df, skills_df, columns, text_loader=None, export_dir=DASHBOARD_EXPORT_DIR, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Exporta las vacantes a un archivo nuevo ('csv' o 'xlsx') en `export_dir`, bloque a bloque. Pensada para
+    correr en un hilo aparte: solo lee `jobs_df` y `skills_df`. Retorna (ruta, filas escritas).
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"job_market_data_{uuid.uuid4().hex}.{file_format}")
+    rows_written = WRITERS[file_format](path, iter_chunks(jobs_df, skills_df, columns, text_loader, chunk_rows))
+    logging.info(f"Exportación {file_format} del dashboard lista: {rows_written} vacantes en {path}.")
+    return path, rows_written
@@ -0,0 +1,212 @@
+import logging
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+UNKNOWN_VALUE = 'Desconocido'
+# Versión del formato de los DataFrames cacheados en el dashboard: si cambia, la caché se descarta y se recarga todo
+DASHBOARD_CACHE_VERSION = 2
+# Clave natural de una vacante (la misma que usa el upsert de 'jobs')
+JOB_KEY_COLUMNS = ['job_id', 'source_platform']
+
+# Columnas de 'jobs' que carga el dashboard al iniciar; los textos largos se piden aparte (ver load_job_texts)
+JOB_LIST_COLUMNS = [
+    'id', 'job_id', 'title', 'company_name', 'location', 'country', 'sector', 'job_type',
+    'seniority_level', 'source_platform', 'role_category', 'salary_range',
+    'company_size', 'company_industry', 'company_hq_country', 'company_type', 'company_website',
+    'source_url', 'company_id', 'posted_date', 'scraped_at', 'is_active',
+]
+JOB_TEXT_COLUMNS = ['description', 'requirements']
+# Columnas con pocos valores distintos: como categóricas ocupan un código por fila en vez de un string
+CATEGORY_COLUMNS = [
+    'company_name', 'location', 'country', 'sector', 'job_type', 'seniority_level', 'source_platform',
+    'role_category', 'company_size', 'company_industry', 'company_hq_country', 'company_type',
+]
+SKILL_COLUMNS = ['job_id', 'skill_name', 'skill_category']
+TREND_TEXT_COLUMNS = ['metric_name', 'metric_value', 'sector', 'country']
+TREND_COLUMNS = ['date', 'metric_name', 'metric_value', 'count', 'value', 'previous_value', 'change_rate', 'sector', 'country']
+# Series de tendencias: máximo de puntos por gráfico y días que cubre cada punto según la granularidad
+MAX_CHART_POINTS = 2000
+SERIES_BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 31}
+SERIES_COLUMNS = ['date', 'metric_value', 'count', 'value', 'change_rate', 'points']
+
+
+def _split_page(rows):
+    """Separa una página de Supabase en filas de vacantes (sin la lista anidada) y filas (job_id, skill)."""
+    skill_rows = [
+        (job['id'], skill.get('skill_name'), skill.get('skill_category'))
+        for job in rows
+        for skill in job.get('skills') or []
+    ]
+    return pd.DataFrame(rows, columns=JOB_LIST_COLUMNS), pd.DataFrame(skill_rows, columns=SKILL_COLUMNS)
+
+
+def _finish_jobs_frame(jobs_df):
+    for column in ('posted_date', 'scraped_at'):
+        jobs_df[column] = pd.to_datetime(jobs_df[column], errors='coerce', utc=True).dt.tz_localize(None)
+    for column in JOB_LIST_COLUMNS:
+        if column in CATEGORY_COLUMNS:
+            jobs_df[column] = jobs_df[column].fillna(UNKNOWN_VALUE).astype('category')
+        elif column not in ('posted_date', 'scraped_at', 'is_active'):
+            jobs_df[column] = jobs_df[column].fillna(UNKNOWN_VALUE).astype(str)
+    jobs_df['is_active'] = jobs_df['is_active'].fillna(False).astype(bool)
+    return jobs_df.sort_values('scraped_at', ascending=False, ignore_index=True)
+
+
+def build_job_frames(pages):
+    """
+    Construye los DataFrames del dashboard a partir de páginas de vacantes con sus habilidades anidadas:
+      - jobs_df: una fila por vacante (JOB_LIST_COLUMNS), con las columnas de CATEGORY_COLUMNS como categóricas,
+        fechas sin zona horaria y 'Desconocido' en los textos vacíos.
+      - skills_df: una fila por (job_id, skill_name, skill_category), con skill_name y skill_category categóricas.
+    Cada página se convierte a DataFrame por separado, así que las filas JSON de una página se liberan
+    antes de pedir la siguiente.
+    """
+    job_frames, skill_frames = [], []
+    for rows in pages:
+        jobs_page, skills_page = _split_page(rows)
+        job_frames.append(jobs_page)
+        skill_frames.append(skills_page)
+
+    jobs_df = pd.concat(job_frames, ignore_index=True) if job_frames else pd.DataFrame(columns=JOB_LIST_COLUMNS)
+    skills_df = pd.concat(skill_frames, ignore_index=True) if skill_frames else pd.DataFrame(columns=SKILL_COLUMNS)
+    skills_df = skills_df.dropna(subset=['skill_name']).astype({'skill_name': 'category', 'skill_category': 'category'})
+    return _finish_jobs_frame(jobs_df), skills_df.reset_index(drop=True)
+
+
+def build_trends_frame(rows):
+    """DataFrame de tendencias con textos vacíos como 'Desconocido', fechas y columnas numéricas tipadas."""
+    trends_df = pd.DataFrame(rows).reindex(columns=TREND_COLUMNS)
+    if trends_df.empty:
+        return trends_df
+    for column in TREND_TEXT_COLUMNS:
+        trends_df[column] = trends_df[column].fillna(UNKNOWN_VALUE).astype(str)
+    trends_df['date'] = pd.to_datetime(trends_df['date'], errors='coerce')
+    trends_df['count'] = pd.to_numeric(trends_df['count'], errors='coerce').fillna(0).astype(int)
+    for column in ('value', 'previous_value', 'change_rate'):
+        trends_df[column] = pd.to_numeric(trends_df[column], errors='coerce')
+    return trends_df.sort_values('date', ascending=False)
+
+
+def _job_columns_query():
+    return ", ".join(JOB_LIST_COLUMNS) + ", skills(skill_name, skill_category)"
+
+
+def load_trends_frame(client, page_size=1000):
+    """Tendencias de la fecha de análisis más reciente (la que muestra el dashboard); las series se leen aparte."""
+    return build_trends_frame(client.get_latest_trends(page_size=page_size))
+
+
+def choose_series_bucket(start_date, end_date, series_count=1, max_points=MAX_CHART_POINTS):
+    """
+    Granularidad más fina ('day', 'week' o 'month') con la que `series_count` series entre las dos fechas
+    (inclusive) no superan `max_points` puntos en total. Si ni por mes caben, se usa 'month'.
+    """
+    days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1
+    for bucket, bucket_days in SERIES_BUCKET_DAYS.items():
+        # Semanas y meses de calendario: el rango puede empezar y terminar a mitad de periodo (uno más)
+        periods = -(-days // bucket_days) + (bucket_days > 1)
+        if periods * max(1, series_count) <= max_points:
+            return bucket
+    return 'month'
+
+
+def load_trend_series(client, metric_name, start_date, end_date, metric_values=None, sector=None, country=None,
+                      max_points=MAX_CHART_POINTS):
+    """
+    Lee solo el tramo (métrica, valores, segmento, rango de fechas) de la serie, agregado en Postgres a la
+    granularidad de `choose_series_bucket`. Sin `metric_values` se cuenta como una sola serie al elegirla.
+    Retorna (DataFrame con SERIES_COLUMNS ordenado por fecha, granularidad).
+    """
+    bucket = choose_series_bucket(start_date, end_date, len(metric_values or [None]), max_points)
+    rows = client.get_trend_series_bucketed(
+        metric_name,
+        start_date=pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+        end_date=pd.Timestamp(end_date).strftime('%Y-%m-%d'),
+        bucket=bucket,
+        metric_values=metric_values,
+        sector=sector,
+        country=country,
+    )
+    series_df = pd.DataFrame(rows).reindex(columns=SERIES_COLUMNS)
+    series_df['date'] = pd.to_datetime(series_df['date'], errors='coerce')
+    series_df['metric_value'] = series_df['metric_value'].astype(str)
+    for column in ('count', 'value', 'change_rate', 'points'):
+        series_df[column] = pd.to_numeric(series_df[column], errors='coerce')
+    return series_df.sort_values(['date', 'metric_value'], ignore_index=True), bucket
+
+
+def load_dashboard_frames(client, page_size=1000):
+    """Lee de Supabase las vacantes (sin textos largos) con sus habilidades y las tendencias. Retorna (jobs_df, skills_df, trends_df)."""
+    jobs_df, skills_df = build_job_frames(client.iter_jobs(columns=_job_columns_query(), page_size=page_size))
+    trends_df = load_trends_frame(client, page_size=page_size)
+    logging.info(f"Datos del dashboard cargados: {len(jobs_df)} vacantes, {len(skills_df)} habilidades, {len(trends_df)} tendencias.")
+    return jobs_df, skills_df, trends_df
+
+
+def merge_job_frames(jobs_df, skills_df, new_jobs_df, new_skills_df):
+    """
+    Incorpora vacantes nuevas o actualizadas a los DataFrames cacheados. Una vacante nueva reemplaza a la cacheada
+    con la misma clave (job_id, source_platform), junto con sus habilidades.
+    Retorna (jobs_df, skills_df, replaced_jobs_df), donde replaced_jobs_df son las filas cacheadas reemplazadas.
+    """
+    if new_jobs_df.empty:
+        return jobs_df, skills_df, jobs_df.iloc[0:0]
+    cached_keys = pd.MultiIndex.from_frame(jobs_df[JOB_KEY_COLUMNS].astype(str))
+    new_keys = pd.MultiIndex.from_frame(new_jobs_df[JOB_KEY_COLUMNS].astype(str))
+    is_replaced = cached_keys.isin(new_keys)
+    replaced_jobs_df = jobs_df[is_replaced]
+
+    merged_jobs = pd.concat([jobs_df[~is_replaced], new_jobs_df], ignore_index=True)
+    # concat de categóricas con categorías distintas produce 'object': se vuelven a convertir
+    merged_jobs = merged_jobs.astype({column: 'category' for column in CATEGORY_COLUMNS})
+    merged_jobs = merged_jobs.sort_values('scraped_at', ascending=False, ignore_index=True)
+    merged_skills = pd.concat([skills_df[~skills_df['job_id'].isin(replaced_jobs_df['id'])], new_skills_df], ignore_index=True)
+    merged_skills = merged_skills.astype({'skill_name': 'category', 'skill_category': 'category'})
+    return merged_jobs, merged_skills, replaced_jobs_df
+
+
+def refresh_dashboard_frames(client, jobs_df, skills_df, page_size=1000):
+    """
+    Actualiza los DataFrames cacheados leyendo solo las vacantes con scraped_at igual o posterior al más reciente
+    de la caché (las de ese mismo instante se vuelven a leer por si se guardaron en más de una petición;
+    reemplazarlas no cambia nada). De las tendencias se leen, por páginas, solo las de la fecha de análisis más
+    reciente, que es lo que muestra el dashboard; las series históricas se piden aparte con load_trend_series.
+    Retorna (jobs_df, skills_df, trends_df, new_jobs_df, replaced_jobs_df); las dos últimas permiten actualizar
+    agregados derivados (p. ej. el cubo del dashboard) sin recalcularlos desde cero.
+    """
+    high_water_mark = jobs_df['scraped_at'].max() if not jobs_df.empty else pd.NaT
+    scraped_since = high_water_mark.tz_localize('UTC').isoformat() if pd.notna(high_water_mark) else None
+    new_jobs_df, new_skills_df = build_job_frames(
+        client.iter_jobs(columns=_job_columns_query(), page_size=page_size, scraped_since=scraped_since)
+    )
+    jobs_df, skills_df, replaced_jobs_df = merge_job_frames(jobs_df, skills_df, new_jobs_df, new_skills_df)
+    trends_df = load_trends_frame(client, page_size=page_size)
+    logging.info(f"Datos del dashboard actualizados desde {scraped_since}: {len(new_jobs_df)} vacantes leídas "
+                 f"({len(replaced_jobs_df)} ya estaban en caché), {len(jobs_df)} en total.")
+    return jobs_df, skills_df, trends_df, new_jobs_df, replaced_jobs_df
+
+
+def load_job_texts(client, job_ids, cached_texts=None):
+    """
+    Textos largos (description, requirements) de las vacantes indicadas, indexados por 'id'. Solo se piden
+    a Supabase los IDs que no estén ya en `cached_texts` (resultado de una llamada anterior).
+    """
+    cached_texts = cached_texts if cached_texts is not None else pd.DataFrame(columns=JOB_TEXT_COLUMNS)
+    missing_ids = [job_id for job_id in job_ids if job_id not in cached_texts.index]
+    if missing_ids:
+        rows = client.get_job_fields(missing_ids, ", ".join(JOB_TEXT_COLUMNS))
+        fetched = pd.DataFrame(rows, columns=['id'] + JOB_TEXT_COLUMNS).set_index('id').fillna('')
+        cached_texts = pd.concat([cached_texts, fetched]) if not cached_texts.empty else fetched
+    return cached_texts
+
+
+def skills_by_job(skills_df, job_ids=None):
+    """
+    Habilidades de cada vacante unidas por comas (Series de strings indexada por job_id), para tablas y exportaciones.
+    `skill_name` es categórica en el dashboard: se une como texto para que el resultado no herede las categorías.
+    """
+    if job_ids is not None:
+        skills_df = skills_df[skills_df['job_id'].isin(job_ids)]
+    skill_names = skills_df['skill_name'].astype(str)
+    return skill_names.groupby(skills_df['job_id'], sort=False).agg(", ".join).astype(object)
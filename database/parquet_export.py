@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import logging
+import datetime
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from config.paths import PARQUET_EXPORT_DIR
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Columnas de baja cardinalidad: se guardan con codificación de diccionario (se leen como categóricas)
+DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+JOB_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('job_id', pa.string()),
+    ('source_platform', DICTIONARY),
+    ('title', pa.string()),
+    ('company_name', DICTIONARY),
+    ('location', DICTIONARY),
+    ('job_type', DICTIONARY),
+    ('seniority_level', DICTIONARY),
+    ('sector', DICTIONARY),
+    ('role_category', DICTIONARY),
+    ('description', pa.string()),
+    ('requirements', pa.string()),
+    ('salary_range', pa.string()),
+    ('posted_date', pa.date32()),
+    ('source_url', pa.string()),
+    ('scraped_at', pa.timestamp('us', tz='UTC')),
+    ('is_active', pa.bool_()),
+    ('company_size', DICTIONARY),
+    ('company_industry', DICTIONARY),
+    ('company_hq_country', DICTIONARY),
+    ('company_type', DICTIONARY),
+    ('company_website', pa.string()),
+    ('content_hash', pa.string()),
+    # Columnas de partición (no se guardan dentro de los archivos, sino en la ruta)
+    ('posted_month', pa.string()),
+    ('country', pa.string()),
+])
+
+SKILL_SCHEMA = pa.schema([
+    ('job_id', pa.string()),  # id (uuid) de la vacante en 'jobs'
+    ('skill_name', DICTIONARY),
+    ('skill_category', DICTIONARY),
+    ('posted_month', pa.string()),
+    ('country', pa.string()),
+])
+
+# Valores de partición para vacantes sin fecha o sin país: la partición nula de Hive no se puede leer con
+# pd.read_parquet (las claves de partición se leen como categóricas y pyarrow no unifica diccionarios con nulos)
+UNKNOWN_MONTH = 'sin-fecha'
+UNKNOWN_COUNTRY = 'Desconocido'
+
+PARTITIONING = ds.partitioning(pa.schema([('posted_month', pa.string()), ('country', pa.string())]), flavor='hive')
+STATE_FILE = '_export_state.json'
+
+
+class ParquetExporter:
+    """
+    Exporta 'jobs' y 'skills' a Parquet particionado por mes de publicación y país
+    (jobs/posted_month=2024-03/country=Colombia/part-0.parquet), leyendo Supabase página a página.
+
+    En modo incremental solo se reescriben las particiones desde el mes de la última vacante exportada
+    (ese mes puede seguir recibiendo vacantes); los meses anteriores se dejan como están. Las vacantes
+    sin posted_date (partición posted_month=sin-fecha) solo se exportan en una exportación completa, y las
+    vacantes sin país quedan en country=Desconocido.
+    """
+    def __init__(self, client, export_dir=PARQUET_EXPORT_DIR, page_size=1000):
+        self.client = client
+        self.export_dir = export_dir
+        self.page_size = page_size
+        self.state_path = os.path.join(export_dir, STATE_FILE)
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _job_batch(rows):
+        """Convierte una página de vacantes (JSON de Supabase) en un RecordBatch con JOB_SCHEMA."""
+        frame = pd.DataFrame(rows).reindex(columns=JOB_SCHEMA.names)
+        posted = pd.to_datetime(frame['posted_date'], errors='coerce')
+        frame['posted_date'] = posted.dt.date.astype(object).where(posted.notna(), None)
+        frame['posted_month'] = posted.dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+        frame['country'] = frame['country'].fillna(UNKNOWN_COUNTRY)
+        frame['scraped_at'] = pd.to_datetime(frame['scraped_at'], errors='coerce', utc=True)
+        frame['is_active'] = frame['is_active'].astype(object).where(frame['is_active'].notna(), None)
+        frame = frame.astype({name: object for name in frame.columns if name not in ('scraped_at',)})
+        frame = frame.where(frame.notna(), None)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        return table.cast(JOB_SCHEMA).to_batches()
+
+    @staticmethod
+    def _skill_batch(rows):
+        """Habilidades anidadas de una página, con las columnas de partición de su vacante."""
+        skill_rows = []
+        for job in rows:
+            posted = str(job['posted_date'])[:7] if job.get('posted_date') else UNKNOWN_MONTH
+            skill_rows.extend(
+                {
+                    'job_id': job['id'],
+                    'skill_name': skill.get('skill_name'),
+                    'skill_category': skill.get('skill_category'),
+                    'posted_month': posted,
+                    'country': job.get('country') or UNKNOWN_COUNTRY,
+                }
+                for skill in job.get('skills') or []
+            )
+        return pa.Table.from_pylist(skill_rows, schema=SKILL_SCHEMA).to_batches()
+
+    def _write(self, table_name, batches, schema):
+        ds.write_dataset(
+            batches,
+            os.path.join(self.export_dir, table_name),
+            schema=schema,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template='part-{i}.parquet',
+            # Solo se borran (y reescriben) las particiones que reciben datos en esta exportación
+            existing_data_behavior='delete_matching',
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd', use_dictionary=True),
+        )
+
+    def export(self, full=False):
+        """
+        Exporta las vacantes y sus habilidades. Sin `full`, continúa desde el último mes exportado.
+        Retorna un dict con el número de vacantes y habilidades exportadas y la fecha desde la que se exportó.
+        """
+        state = {} if full else self.load_state()
+        start_date = None
+        if state.get('max_posted_date'):
+            start_date = datetime.date.fromisoformat(state['max_posted_date']).replace(day=1).isoformat()
+        if full:
+            for table_name in ('jobs', 'skills'):
+                shutil.rmtree(os.path.join(self.export_dir, table_name), ignore_errors=True)
+        os.makedirs(self.export_dir, exist_ok=True)
+        logging.info(f"Exportando vacantes a Parquet en {self.export_dir} ({'completa' if not start_date else f'desde {start_date}'})...")
+
+        stats = {'jobs': 0, 'skills': 0, 'max_posted_date': state.get('max_posted_date')}
+        columns = ', '.join(name for name in JOB_SCHEMA.names if name not in ('posted_month',)) + ', skills(skill_name, skill_category)'
+
+        # Las habilidades de cada página se guardan en un archivo Arrow temporal para escribir ambos
+        # datasets con una sola lectura de Supabase y sin acumular las páginas en memoria
+        with tempfile.TemporaryDirectory(dir=self.export_dir) as tmp_dir:
+            skills_buffer_path = os.path.join(tmp_dir, 'skills.arrow')
+            with pa.OSFile(skills_buffer_path, 'wb') as sink, pa.ipc.new_file(sink, SKILL_SCHEMA) as skills_writer:
+                def job_batches():
+                    for rows in self.client.iter_jobs(columns=columns, start_date=start_date, page_size=self.page_size):
+                        for batch in self._skill_batch(rows):
+                            skills_writer.write_batch(batch)
+                            stats['skills'] += batch.num_rows
+                        stats['jobs'] += len(rows)
+                        page_max = max((str(job['posted_date'])[:10] for job in rows if job.get('posted_date')), default=None)
+                        if page_max and (not stats['max_posted_date'] or page_max > stats['max_posted_date']):
+                            stats['max_posted_date'] = page_max
+                        yield from self._job_batch(rows)
+
+                self._write('jobs', job_batches(), JOB_SCHEMA)
+
+            with pa.memory_map(skills_buffer_path, 'r') as source:
+                reader = pa.ipc.open_file(source)
+                self._write('skills', (reader.get_batch(i) for i in range(reader.num_record_batches)), SKILL_SCHEMA)
+
+        self._save_state({
+            'max_posted_date': stats['max_posted_date'],
+            'exported_at': datetime.datetime.now().isoformat(),
+            'last_export_start_date': start_date,
+            'last_export_jobs': stats['jobs'],
+            'last_export_skills': stats['skills'],
+        })
+        stats['start_date'] = start_date
+        logging.info(f"✅ Exportación Parquet completada: {stats['jobs']} vacantes y {stats['skills']} habilidades.")
+        return stats
@@ -0,0 +1,93 @@
+import time
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def diff_skill_sets(existing: Dict[str, Dict[str, str]], desired: Dict[str, Iterable[str]]) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Compara las habilidades guardadas con las nuevas para un lote de vacantes.
+    `existing` mapea job_id -> {skill_name: id de la fila en 'skills'} y `desired` job_id -> habilidades.
+    Retorna (altas como pares (job_id, skill_name), IDs de filas a eliminar).
+    """
+    additions = []
+    removals = []
+    for job_id, skills in desired.items():
+        current = existing.get(job_id, {})
+        wanted = set(skills)
+        additions.extend((job_id, skill_name) for skill_name in sorted(wanted - set(current)))
+        removals.extend(row_id for skill_name, row_id in current.items() if skill_name not in wanted)
+    return additions, removals
+
+
+class SkillSynchronizer:
+    """
+    Sincroniza la tabla 'skills' por lotes de vacantes: lee las habilidades existentes
+    del lote en bloque e inserta solo las altas y elimina solo las bajas, en lugar de
+    borrar y reinsertar todas las habilidades de cada vacante.
+    """
+    def __init__(self, client, categorize_skill: Callable[[str], str], batch_size: int = 50,
+                 on_error: Optional[Callable[[Dict[str, List[str]], Exception], None]] = None):
+        self.client = client
+        self.categorize_skill = categorize_skill
+        self.batch_size = batch_size
+        # Recibe el lote que no pudo sincronizarse; sin callback, la excepción se propaga
+        self.on_error = on_error
+        self.pending: Dict[str, List[str]] = {}
+        self.stats = {'jobs': 0, 'inserted': 0, 'deleted': 0, 'unchanged': 0, 'writes_avoided': 0}
+        # Segundos totales de las lecturas y escrituras de cada lote (también de los que fallan)
+        self.write_seconds = 0.0
+
+    def queue(self, job_db_id: str, skills: Iterable[str]):
+        """Encola las habilidades de una vacante y sincroniza el lote cuando se llena."""
+        self.pending[job_db_id] = list(skills or [])
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Sincroniza todas las vacantes pendientes."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+
+        start = time.perf_counter()
+        try:
+            existing: Dict[str, Dict[str, str]] = {}
+            for row in self.client.get_skills_for_jobs(list(batch.keys())):
+                existing.setdefault(row['job_id'], {})[row['skill_name']] = row['id']
+
+            additions, removals = diff_skill_sets(existing, batch)
+
+            if additions:
+                self.client.insert_skills([
+                    {'job_id': job_id, 'skill_name': skill_name, 'skill_category': self.categorize_skill(skill_name)}
+                    for job_id, skill_name in additions
+                ])
+            if removals:
+                self.client.delete_skills(removals)
+        except Exception as e:
+            if not self.on_error:
+                raise
+            logging.error(f"❌ Error al sincronizar habilidades de {len(batch)} vacantes: {e}")
+            self.on_error(batch, e)
+            return
+        finally:
+            self.write_seconds += time.perf_counter() - start
+
+        # Borrar y reinsertar habría escrito todas las filas existentes y todas las nuevas
+        rows_full_rewrite = sum(len(rows) for rows in existing.values()) + sum(len(set(skills)) for skills in batch.values())
+        self.stats['jobs'] += len(batch)
+        self.stats['inserted'] += len(additions)
+        self.stats['deleted'] += len(removals)
+        self.stats['unchanged'] += sum(1 for job_id, skills in batch.items() if set(skills) == set(existing.get(job_id, {})))
+        self.stats['writes_avoided'] += rows_full_rewrite - len(additions) - len(removals)
+        logging.info(f"Habilidades sincronizadas para {len(batch)} vacantes: +{len(additions)} / -{len(removals)} filas.")
+
+    def log_summary(self):
+        if self.stats['jobs']:
+            logging.info(
+                f"Sincronización de habilidades: {self.stats['jobs']} vacantes ({self.stats['unchanged']} sin cambios), "
+                f"{self.stats['inserted']} altas, {self.stats['deleted']} bajas, "
+                f"{self.stats['writes_avoided']} escrituras de filas evitadas frente a borrar y reinsertar."
+            )
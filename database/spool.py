@@ -0,0 +1,77 @@
+import os
+import json
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class WriteSpool:
+    """
+    Spool local (JSONL, solo se añaden líneas) con las escrituras que no pudieron llegar a Supabase.
+    Cada línea guarda el tipo de escritura ('job' o 'skills'), sus datos y metadatos de reintento.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.claimed_path = f"{path}.replaying"
+
+    def append(self, kind: str, payload: Dict[str, Any], error: str, previous: Optional[Dict[str, Any]] = None):
+        """Añade una escritura fallida. `previous` es la entrada original si falló al reprocesarla."""
+        now = datetime.datetime.now().isoformat()
+        entry = {
+            'kind': kind,
+            'payload': payload,
+            'attempts': (previous or {}).get('attempts', 0) + 1,
+            'first_failed_at': (previous or {}).get('first_failed_at', now),
+            'last_failed_at': now,
+            'last_error': error,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """
+        Toma todas las entradas pendientes para reprocesarlas. El archivo se renombra a
+        '.replaying' para que las nuevas fallas se acumulen aparte; si un reproceso anterior
+        se interrumpió, sus entradas reclamadas se incluyen de nuevo. Supone que no hay otro
+        reproceso en curso: `main.replay_write_spool` lo garantiza con un lease.
+        """
+        if os.path.exists(self.path):
+            if os.path.exists(self.claimed_path):
+                # Un reproceso anterior quedó a medias: se juntan ambas colas
+                with open(self.path, 'r', encoding='utf-8') as src, open(self.claimed_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.claimed_path)
+        if not os.path.exists(self.claimed_path):
+            return []
+
+        entries = []
+        with open(self.claimed_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Línea truncada por un corte abrupto: se descarta sin bloquear el resto
+                    logging.warning(f"Línea {line_number} del spool ilegible, se omite.")
+        return entries
+
+    def release(self):
+        """Elimina las entradas reclamadas una vez reprocesadas (o re-encoladas si fallaron)."""
+        if os.path.exists(self.claimed_path):
+            os.remove(self.claimed_path)
+
+    def __len__(self):
+        count = 0
+        for path in (self.path, self.claimed_path):
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    count += sum(1 for line in f if line.strip())
+        return count
@@ -10,6 +10,11 @@ from typing import List, Dict, Any, Optional
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class SupabaseClient:
+    # Columnas numéricas opcionales de 'trends' (valor actual, valor de comparación y variación %)
+    TREND_NUMERIC_FIELDS = ('value', 'previous_value', 'change_rate')
+    # Granularidades de `get_trend_series_bucketed` (unidades de date_trunc en Postgres)
+    TREND_SERIES_BUCKETS = ('day', 'week', 'month')
+
     def __init__(self):
         url: str = os.environ.get("SUPABASE_URL")
         service_key: str = os.environ.get("SUPABASE_SERVICE_KEY")
@@ -44,6 +49,53 @@ class SupabaseClient:
             on_conflict="job_id,source_platform"
         ).execute()
         
+    def upsert_jobs(self, jobs_data: List[Dict[str, Any]]):
+        """
+        Upsert masivo de vacantes en una sola petición (mismo conflicto que `upsert_job`).
+        PostgREST exige las mismas columnas en todas las filas, así que las faltantes se envían como None.
+        """
+        for job_data in jobs_data:
+            if not job_data.get('job_id') or not job_data.get('source_platform'):
+                raise ValueError("job_id y source_platform son requeridos para el upsert.")
+
+        columns = set().union(*(job_data.keys() for job_data in jobs_data))
+        rows = [{column: job_data.get(column) for column in columns} for job_data in jobs_data]
+        return self.supabase.table("jobs").upsert(
+            rows,
+            on_conflict="job_id,source_platform"
+        ).execute()
+
+    def get_job_hashes(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Obtiene el índice de cambios de 'jobs': id, job_id, source_platform y content_hash.
+        Solo se leen estas columnas (sin descripciones) y se pagina con `range`, ordenado por id.
+        """
+        rows_all = []
+        start = 0
+        while True:
+            response = self.supabase.table("jobs").select(
+                "id, job_id, source_platform, content_hash"
+            ).order('id').range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            rows_all.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return rows_all
+
+    def touch_jobs(self, job_db_ids: List[str], scraped_at: str, chunk_size: int = 100):
+        """
+        Marca como vistas de nuevo vacantes sin cambios de contenido: solo actualiza
+        'scraped_at' e 'is_active', sin reenviar título, descripción ni requisitos.
+        """
+        touched = 0
+        for i in range(0, len(job_db_ids), chunk_size):
+            response = self.supabase.table("jobs").update(
+                {'scraped_at': scraped_at, 'is_active': True}
+            ).in_('id', job_db_ids[i:i + chunk_size]).execute()
+            touched += len(response.data) if response and response.data else 0
+        return touched
+
     def insert_skills(self, skill_records: List[Dict[str, Any]]):
         """
         Inserta múltiples registros de habilidades. Espera una lista de diccionarios
@@ -63,6 +115,45 @@ class SupabaseClient:
         # Supabase permite insertar múltiples registros en una sola llamada.
         return self.supabase.table("skills").insert(valid_skill_records).execute()
     
+    def get_skills_for_jobs(self, job_ids: List[str], chunk_size: int = 100, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Obtiene las habilidades (id, job_id, skill_name) de un lote de vacantes.
+        Los IDs se consultan en bloques para no exceder el largo máximo de URL de PostgREST.
+        """
+        skills = []
+        for i in range(0, len(job_ids), chunk_size):
+            chunk = job_ids[i:i + chunk_size]
+            start = 0
+            while True:
+                response = self.supabase.table("skills").select("id, job_id, skill_name").in_(
+                    'job_id', chunk
+                ).range(start, start + page_size - 1).execute()
+                rows = response.data if response and response.data else []
+                skills.extend(rows)
+                if len(rows) < page_size:
+                    break
+                start += page_size
+        return skills
+
+    def get_job_fields(self, job_ids: List[str], columns: str, chunk_size: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene solo las columnas indicadas (más 'id') de un lote de vacantes, p. ej. los textos largos
+        que el dashboard carga bajo demanda. Los IDs se consultan en bloques, como en get_skills_for_jobs.
+        """
+        rows_all = []
+        for i in range(0, len(job_ids), chunk_size):
+            response = self.supabase.table("jobs").select(f"id, {columns}").in_('id', job_ids[i:i + chunk_size]).execute()
+            rows_all.extend(response.data if response and response.data else [])
+        return rows_all
+
+    def delete_skills(self, skill_ids: List[str], chunk_size: int = 100):
+        """Elimina habilidades por su ID (PK), en bloques."""
+        deleted = 0
+        for i in range(0, len(skill_ids), chunk_size):
+            response = self.supabase.table("skills").delete().in_('id', skill_ids[i:i + chunk_size]).execute()
+            deleted += len(response.data) if response and response.data else 0
+        return deleted
+
     def upsert_company(self, company_data: Dict[str, Any]):
         """
         Inserta o actualiza un registro de compañía. Conflicta por el nombre.
@@ -75,6 +166,25 @@ class SupabaseClient:
             on_conflict="name" # Conflictar por nombre para evitar duplicados
         ).execute()
 
+    def get_companies(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Obtiene todas las compañías (id, nombre y campos de enriquecimiento).
+        Pagina con `range` (ordenado por id, para que las páginas no se solapen) porque PostgREST
+        limita el número de filas por respuesta.
+        """
+        companies = []
+        start = 0
+        while True:
+            response = self.supabase.table("companies").select(
+                "id, name, industry, country, website, size, type"
+            ).order('id').range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            companies.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return companies
+
     def upsert_trend(self, trend_data: Dict[str, Any]):
         """
         Inserta o actualiza un registro de tendencia.
@@ -87,12 +197,39 @@ class SupabaseClient:
         # Aseguramos que 'sector' y 'country' existan para el on_conflict, aunque sean None
         trend_data.setdefault('sector', None)
         trend_data.setdefault('country', None)
+        for field in self.TREND_NUMERIC_FIELDS:
+            trend_data.setdefault(field, None)
 
         return self.supabase.table("trends").upsert(
             trend_data,
             on_conflict="date,metric_name,metric_value,sector,country"
         ).execute()
 
+    def upsert_trends(self, trends_data: List[Dict[str, Any]]):
+        """
+        Upsert masivo de tendencias en una sola petición, con el mismo conflicto que `upsert_trend`.
+        Se descartan duplicados dentro del lote (gana el último), porque Postgres no permite
+        que un mismo INSERT ... ON CONFLICT actualice dos veces la misma fila.
+        """
+        unique_trends = {}
+        for trend_data in trends_data:
+            if not all(trend_data.get(field) for field in ('date', 'metric_name', 'metric_value')):
+                raise ValueError(f"date, metric_name y metric_value son requeridos para el upsert de tendencias. Datos: {trend_data}")
+            trend_data.setdefault('sector', None)
+            trend_data.setdefault('country', None)
+            # Todas las filas de un upsert masivo deben tener las mismas columnas
+            for field in self.TREND_NUMERIC_FIELDS:
+                trend_data.setdefault(field, None)
+            key = (trend_data['date'], trend_data['metric_name'], trend_data['metric_value'], trend_data['sector'], trend_data['country'])
+            unique_trends[key] = trend_data
+
+        if not unique_trends:
+            return None
+        return self.supabase.table("trends").upsert(
+            list(unique_trends.values()),
+            on_conflict="date,metric_name,metric_value,sector,country"
+        ).execute()
+
     def get_jobs(self, limit: Optional[int] = None, country: Optional[str] = None, sector: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None):
         """
         Obtiene trabajos de la base de datos, incluyendo sus habilidades asociadas.
@@ -113,6 +250,88 @@ class SupabaseClient:
             query = query.limit(limit)
         return query.execute()
 
+    def iter_jobs(self, columns: str = "*", start_date: Optional[str] = None, end_date: Optional[str] = None, page_size: int = 1000,
+                  scraped_since: Optional[str] = None, posted_dates: Optional[List[str]] = None):
+        """
+        Recorre la tabla 'jobs' página a página (ordenada por id para paginar de forma estable),
+        seleccionando solo las columnas indicadas. Produce una lista de filas por página.
+        `scraped_since` (timestamp ISO) limita la lectura a las vacantes con scraped_at igual o posterior,
+        y `posted_dates` (fechas ISO) a las publicadas en esos días.
+        """
+        start = 0
+        while True:
+            query = self.supabase.table("jobs").select(columns).order('id')
+            if start_date:
+                query = query.gte('posted_date', start_date)
+            if end_date:
+                query = query.lte('posted_date', end_date)
+            if scraped_since:
+                query = query.gte('scraped_at', scraped_since)
+            if posted_dates is not None:
+                query = query.in_('posted_date', posted_dates)
+            response = query.range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                break
+            start += page_size
+
+    def get_rollup_watermarks(self) -> Dict[str, str]:
+        """Por tabla de agregados diarios, el mayor `scraped_at` (ISO) de las vacantes que ya tiene incorporadas."""
+        response = self.supabase.table("rollup_watermarks").select("table_name, scraped_through").execute()
+        return {row['table_name']: row['scraped_through'] for row in (response.data if response and response.data else [])}
+
+    def set_rollup_watermark(self, table: str, scraped_through: str):
+        """Avanza la marca de una tabla de agregados diarios tras reemplazar sus días (ver `get_rollup_watermarks`)."""
+        return self.supabase.table("rollup_watermarks").upsert({
+            'table_name': table,
+            'scraped_through': scraped_through,
+            'updated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }, on_conflict="table_name").execute()
+
+    def get_rollups(self, table: str, key_columns: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Obtiene las filas de una tabla de agregados diarios dentro de un rango de fechas (inclusive).
+        Se ordena por la clave completa (`key_columns`, empezando por 'date') para que `range` no repita ni salte filas.
+        """
+        rows_all = []
+        start = 0
+        while True:
+            query = self.supabase.table(table).select("*")
+            for column in key_columns:
+                query = query.order(column)
+            if start_date:
+                query = query.gte('date', start_date)
+            if end_date:
+                query = query.lte('date', end_date)
+            response = query.range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            rows_all.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return rows_all
+
+    def replace_rollups(self, table: str, rows: List[Dict[str, Any]], key_columns: List[str], dates: Optional[List[str]] = None,
+                        chunk_size: int = 1000, dates_chunk_size: int = 100):
+        """
+        Reemplaza los agregados diarios de los días `dates` (fechas ISO; con None, toda la tabla). Primero hace
+        upsert de las filas recalculadas por su clave (`key_columns`) marcándolas con el mismo 'updated_at', y
+        solo después borra de esos días las claves que ya no aparecen (las que no llevan esa marca). Si un upsert
+        falla, los días conservan los agregados anteriores en lugar de quedar vacíos.
+        """
+        updated_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        on_conflict = ",".join(key_columns)
+        for i in range(0, len(rows), chunk_size):
+            chunk = [{**row, 'updated_at': updated_at} for row in rows[i:i + chunk_size]]
+            self.supabase.table(table).upsert(chunk, on_conflict=on_conflict).execute()
+        if dates is None:
+            self.supabase.table(table).delete().neq('updated_at', updated_at).execute()
+        for i in range(0, len(dates or []), dates_chunk_size):
+            self.supabase.table(table).delete().in_('date', dates[i:i + dates_chunk_size]).neq('updated_at', updated_at).execute()
+        return len(rows)
+
     def get_skills(self, limit: Optional[int] = None, job_id: Optional[str] = None):
         """Obtiene habilidades, opcionalmente filtradas por job_id."""
         query = self.supabase.table("skills").select("*")
@@ -137,6 +356,86 @@ class SupabaseClient:
             query = query.limit(limit)
         return query.execute()
 
+    def get_latest_trends(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Todas las tendencias de la fecha de análisis más reciente, leídas por páginas (PostgREST limita cada
+        respuesta a ~1000 filas). El historial se consulta aparte con get_trend_series / get_trend_series_bucketed.
+        """
+        response = self.supabase.table("trends").select("date").order('date', desc=True).limit(1).execute()
+        if not response or not response.data:
+            return []
+        latest_date = response.data[0]['date']
+        rows_all = []
+        start = 0
+        while True:
+            response = (self.supabase.table("trends").select("*").eq('date', latest_date)
+                        .order('id').range(start, start + page_size - 1).execute())
+            rows = response.data if response and response.data else []
+            rows_all.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return rows_all
+
+    def get_trend_series(self, metric_name: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                         metric_values: Optional[List[str]] = None, sector: Optional[str] = None, country: Optional[str] = None,
+                         page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Serie temporal de una métrica en un rango de fechas, ordenada por fecha. Usa el índice
+        (metric_name, date, sector, country); sin sector/country se leen las tendencias globales (NULL).
+        """
+        rows_all = []
+        start = 0
+        while True:
+            query = self.supabase.table("trends").select(
+                "date, metric_value, count, value, previous_value, change_rate, sector, country"
+            ).eq('metric_name', metric_name)
+            query = query.eq('sector', sector) if sector else query.is_('sector', 'null')
+            query = query.eq('country', country) if country else query.is_('country', 'null')
+            if start_date:
+                query = query.gte('date', start_date)
+            if end_date:
+                query = query.lte('date', end_date)
+            if metric_values:
+                query = query.in_('metric_value', metric_values)
+            response = query.order('date').range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            rows_all.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return rows_all
+
+    def get_trend_series_bucketed(self, metric_name: str, start_date: str, end_date: str, bucket: str = 'day',
+                                  metric_values: Optional[List[str]] = None, sector: Optional[str] = None,
+                                  country: Optional[str] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Serie temporal de una métrica agregada en Postgres por día, semana o mes (función 'trend_series_bucketed'):
+        cada fila es el promedio de un periodo por metric_value, con 'points' = días con datos en el periodo.
+        Solo viajan los puntos del gráfico, no las filas diarias. Sin sector/country se leen las tendencias globales.
+        """
+        if bucket not in self.TREND_SERIES_BUCKETS:
+            raise ValueError(f"Granularidad no soportada: {bucket}. Usa una de {self.TREND_SERIES_BUCKETS}.")
+        params = {
+            'p_metric_name': metric_name,
+            'p_start_date': start_date,
+            'p_end_date': end_date,
+            'p_bucket': bucket,
+            'p_metric_values': metric_values or None,
+            'p_sector': sector,
+            'p_country': country,
+        }
+        rows_all = []
+        start = 0
+        while True:
+            response = self.supabase.rpc('trend_series_bucketed', params).range(start, start + page_size - 1).execute()
+            rows = response.data if response and response.data else []
+            rows_all.extend(rows)
+            if len(rows) < page_size:
+                break
+            start += page_size
+        return rows_all
+
     def clear_jobs_table(self):
         """
         Elimina todos los registros de las tablas 'skills', 'trends', 'jobs' y 'companies'.
@@ -2,33 +2,25 @@ import logging
 import sys
 import os
 import argparse
-import yaml
 import datetime
-from dotenv import load_dotenv
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from scrapy.utils.log import configure_logging
 
-# Importamos los spiders
-from scrapers.spiders.linkedin_spider import LinkedInSpider
-from scrapers.spiders.computrabajo_spider import ComputrabajoSpider
-# from scrapers.spiders.indeed_spider import IndeedSpider # ELIMINADO: Nuevo spider
+# Solo dependencias ligeras a nivel de módulo: Scrapy, los spiders, pandas y el cliente de Supabase se importan
+# dentro de la función que los usa, así cada subcomando (también los que lanzan el dashboard y el scheduler)
+# carga solo lo suyo y `--help` o `runs` arrancan al instante. Ver benchmarks/bench_cli_startup.py.
+from config.geo import COMMON_GEO_DATA
+from config.paths import PARQUET_EXPORT_DIR
 
-# Importamos el TrendAnalyzer
-from analysis.trend_analyzer import TrendAnalyzer
-
-from config.geo import COMMON_GEO_DATA, LINKEDIN_TPR_MAP, COMPUTRABAJO_FTP_MAP
-
-# Cargar variables de entorno explícitamente
-load_dotenv()
 # Configuramos logging para que los mensajes de DEBUG de los spiders no se muestren por defecto
 # configure_logging({'LOG_LEVEL': 'INFO'}) # Scrapy tiene su propio logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('MainScript')
 
+AVAILABLE_SPIDERS = ["linkedin", "computrabajo"]
+
 
 def load_config():
     """Carga la configuración desde config.yaml."""
+    import yaml
     config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -50,7 +42,7 @@ def get_search_keywords(config):
 
 def get_spider_selection():
     """Pregunta al usuario qué spiders desea ejecutar."""
-    available_spider_names = ["linkedin", "computrabajo"] # MODIFICADO: ELIMINADO 'indeed'
+    available_spider_names = AVAILABLE_SPIDERS
     
     print("\n--- Selección de Scrapers ---")
     print("Selecciona los scrapers que deseas ejecutar (separados por comas):")
@@ -197,13 +189,29 @@ def derive_platform_date_filter(platform_map, start_date_filter, end_date_filter
         return platform_map["any time"]
 
 
-def run_scrapers(selected_spider_names, search_keywords, target_locations, start_date_filter, end_date_filter, max_jobs_to_scrape, continent_search=None):
+def run_scrapers(selected_spider_names, search_keywords, target_locations, start_date_filter, end_date_filter, max_jobs_to_scrape, continent_search=None, rebuild_cube=True, run_ledger=None):
+    """
+    Ejecuta los spiders seleccionados y registra la ejecución en el historial local (`run_ledger`, por defecto
+    RunLedger()): parámetros, estadísticas de Scrapy por spider y tiempo de la reconstrucción del cubo.
+    """
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+    from scrapers.spiders.linkedin_spider import LinkedInSpider
+    from scrapers.spiders.computrabajo_spider import ComputrabajoSpider
+    # from scrapers.spiders.indeed_spider import IndeedSpider # ELIMINADO: Nuevo spider
+    from config.geo import LINKEDIN_TPR_MAP, COMPUTRABAJO_FTP_MAP
+    from runner.run_ledger import RunLedger, spider_metrics
+
     # Verificar credenciales antes de arrancar
     supabase_url = os.getenv("SUPABASE_URL", "")
     supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY", "")
     if not supabase_url or "TU_PROYECTO" in supabase_url or not supabase_service_key:
         logger.warning("⚠️ ADVERTENCIA: Credenciales de Supabase (URL o SERVICE_KEY) no configuradas en .env. Los datos NO se guardarán.")
-    
+
+    if not selected_spider_names:
+        logger.warning("No se seleccionó ningún scraper válido para ejecutar.")
+        return
+
     os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'scrapers.settings')
     settings = get_project_settings()
     
@@ -221,95 +229,268 @@ def run_scrapers(selected_spider_names, search_keywords, target_locations, start
         'continent_search': continent_search # Pasar el continente para Indeed/LinkedIn si es relevante
     }
 
+    # Crawler de cada spider, para leer sus estadísticas al terminar
+    crawlers = {}
     if "linkedin" in selected_spider_names:
         linkedin_tpr = derive_platform_date_filter(LINKEDIN_TPR_MAP, start_date_filter, end_date_filter)
-        process.crawl(LinkedInSpider, **spider_kwargs, f_tpr_value=linkedin_tpr)
+        crawlers["linkedin"] = process.create_crawler(LinkedInSpider)
+        process.crawl(crawlers["linkedin"], **spider_kwargs, f_tpr_value=linkedin_tpr)
     
     if "computrabajo" in selected_spider_names:
         computrabajo_ftp = derive_platform_date_filter(COMPUTRABAJO_FTP_MAP, start_date_filter, end_date_filter)
-        process.crawl(ComputrabajoSpider, **spider_kwargs, f_tp_value=computrabajo_ftp)
+        crawlers["computrabajo"] = process.create_crawler(ComputrabajoSpider)
+        process.crawl(crawlers["computrabajo"], **spider_kwargs, f_tp_value=computrabajo_ftp)
 
     # ELIMINADO: if "indeed" in selected_spider_names: 
     # ELIMINADO:     indeed_ftp = derive_platform_date_filter(COMPUTRABAJO_FTP_MAP, start_date_filter, end_date_filter) 
     # ELIMINADO:     process.crawl(IndeedSpider, **spider_kwargs, f_tp_value=indeed_ftp)
 
-    if not selected_spider_names:
-        logger.warning("No se seleccionó ningún scraper válido para ejecutar.")
-        return
+    run_params = {
+        'spiders': sorted(crawlers), 'locations': target_locations, 'continent': continent_search,
+        'start_date': start_date_filter, 'end_date': end_date_filter, 'max_jobs': max_jobs_to_scrape,
+        'rebuild_cube': rebuild_cube,
+    }
+    with (run_ledger or RunLedger()).track('scrape', run_params) as recorder:
+        logger.info("Iniciando proceso de Scrapy...")
+        with recorder.timed('scrapy'):
+            process.start()
+        logger.info("Proceso de Scrapy finalizado.")
+        for spider_name, crawler in crawlers.items():
+            recorder.record(spider_name, spider_metrics(crawler.stats.get_stats()))
+        if rebuild_cube:
+            with recorder.timed('rebuild_cube'):
+                try:
+                    rebuild_aggregate_cube()
+                except Exception as e:
+                    # El scraping ya terminó: un fallo del cubo no debe marcar la ejecución como fallida
+                    logger.warning(f"⚠️ No se pudo reconstruir el cubo de agregados (el dashboard lo reconstruirá al cargar): {e}")
 
-    logger.info("Iniciando proceso de Scrapy...")
-    process.start()
-    logger.info("Proceso de Scrapy finalizado.")
+def rebuild_aggregate_cube(page_size=1000):
+    """
+    Reconstruye el cubo de conteos que usa el dashboard, leyendo de Supabase solo las columnas necesarias.
+    Los errores se propagan para que el paso 'rebuild_cube' del orquestador falle y se reintente.
+    """
+    from database.supabase_client import SupabaseClient
+    from analysis.aggregate_cube import AggregateCube, CUBE_SOURCE_COLUMNS
+    client = SupabaseClient()
+    pages = client.iter_jobs(columns=", ".join(CUBE_SOURCE_COLUMNS), page_size=page_size)
+    AggregateCube.from_pages(pages).save()
 
-if __name__ == "__main__":
+def replay_write_spool(batch_size=100, leases=None):
+    """
+    Reintenta en lotes las escrituras a Supabase que quedaron en el spool local. Solo un reproceso a la vez
+    (lease SPOOL_REPLAY_LEASE): si otro está en curso, por ejemplo el 'etl_flush' de otro país, no hace nada.
+    """
+    from runner.fanout import LeaseStore, SPOOL_REPLAY_LEASE, SPOOL_REPLAY_LEASE_TTL
+    leases = leases or LeaseStore()
+    owner = leases.acquire(SPOOL_REPLAY_LEASE, SPOOL_REPLAY_LEASE_TTL)
+    if owner is None:
+        logger.warning("Otro proceso está reprocesando el spool local; se omite este reproceso.")
+        return False
+    try:
+        from scrapers.pipelines import SupabasePipeline
+        pipeline = SupabasePipeline()
+        pending = len(pipeline.spool)
+        if not pending:
+            logger.info("No hay escrituras pendientes en el spool local.")
+            return True
+
+        pipeline.open_spider(None)
+        if not pipeline.client:
+            logger.error(f"Supabase sigue sin estar disponible. {pending} escrituras continúan en el spool local.")
+            return False
+
+        pipeline.replay_spool(batch_size=batch_size)
+        pipeline.close_spider(None)
+        remaining = len(pipeline.spool)
+        logger.info(f"Reproceso del spool finalizado: {pending - remaining} escrituras aplicadas, {remaining} pendientes.")
+        return remaining == 0
+    finally:
+        leases.release(SPOOL_REPLAY_LEASE, owner)
+
+def export_parquet(full=False, output_dir=None, page_size=1000):
+    """Exporta vacantes y habilidades de Supabase a Parquet particionado por mes y país (incremental por defecto)."""
+    from database.supabase_client import SupabaseClient
+    from database.parquet_export import ParquetExporter
+    try:
+        client = SupabaseClient()
+    except Exception as e:
+        logger.error(f"No se puede exportar: Supabase no está disponible ({e}).")
+        return False
+    exporter = ParquetExporter(client, export_dir=output_dir or PARQUET_EXPORT_DIR, page_size=page_size)
+    exporter.export(full=full)
+    return True
+
+def create_trend_analyzer(engine="pandas", refresh_snapshot=False, as_of=None):
+    """
+    Crea el TrendAnalyzer con el motor elegido. Con duckdb, refresca antes el snapshot si se pidió, si no existe
+    o si se tomó antes de `as_of` (por defecto hoy), para no escribir agregados calculados con datos viejos.
+    """
+    from analysis.trend_analyzer import TrendAnalyzer
+    from analysis.engines import snapshot_taken_at
+    taken_at = snapshot_taken_at() if engine == "duckdb" else None
+    if engine == "duckdb" and (refresh_snapshot or taken_at is None or taken_at.date() < (as_of or datetime.date.today())):
+        TrendAnalyzer().refresh_snapshot()
+    return TrendAnalyzer(engine=engine)
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def build_parser():
+    """Parser de la línea de comandos: un subcomando por operación (`scrape`, `analyze`, `backfill`, `replay`, `export`, `runs`)."""
+    parser = argparse.ArgumentParser(description="Scraping de vacantes, análisis de tendencias y mantenimiento de los datos. Sin argumentos, inicia el scraping interactivo.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    scrape_parser = subparsers.add_parser("scrape", help="Ejecuta los scrapers con los parámetros indicados.")
+    scrape_parser.add_argument("--start_date", type=parse_date, help="Fecha de inicio para filtrar vacantes (YYYY-MM-DD)")
+    scrape_parser.add_argument("--end_date", type=parse_date, help="Fecha de fin para filtrar vacantes (YYYY-MM-DD)")
+    scrape_parser.add_argument("--continent", type=str, help="Continente a buscar (ej. Latam)")
+    scrape_parser.add_argument("--country", type=str, help="País específico a buscar (ej. Mexico). Usa 'Todos los Países' para todos en el continente.")
+    scrape_parser.add_argument("--spiders", type=str, help="Spiders a ejecutar, separados por comas (ej. linkedin,computrabajo)")
+    scrape_parser.add_argument("--max_jobs", type=int, default=None, help="Número máximo de vacantes a raspar por cada scraper (por defecto: 100).")
+    scrape_parser.add_argument("--no-cube", action="store_true", help="No reconstruye el cubo del dashboard al terminar el scraping (el pipeline lo hace una vez tras todos los shards).")
+    scrape_parser.set_defaults(handler=command_scrape)
+
+    analyze_parser = subparsers.add_parser("analyze", help="Ejecuta el análisis de tendencias y las almacena en la base de datos.")
+    analyze_parser.add_argument("--analysis-date", type=parse_date, help="Fecha para la que se realiza el análisis de tendencias (YYYY-MM-DD, por defecto hoy).")
+    backfill_parser = subparsers.add_parser("backfill", help="Recalcula y almacena las tendencias de cada día entre START y END en una sola ejecución.")
+    backfill_parser.add_argument("start", type=parse_date, metavar="START", help="Primer día (YYYY-MM-DD).")
+    backfill_parser.add_argument("end", type=parse_date, metavar="END", help="Último día (YYYY-MM-DD).")
+    for trends_parser in (analyze_parser, backfill_parser):
+        trends_parser.add_argument("--engine", choices=["pandas", "duckdb"], default="pandas", help="Motor para calcular los agregados de tendencias (por defecto: pandas). 'duckdb' consulta el snapshot Parquet local.")
+        trends_parser.add_argument("--refresh-snapshot", action="store_true", help="Actualiza el snapshot Parquet local desde Supabase antes del análisis (motor duckdb).")
+    analyze_parser.set_defaults(handler=command_analyze)
+    backfill_parser.set_defaults(handler=command_backfill)
+
+    replay_parser = subparsers.add_parser("replay", help="Reintenta en lotes las escrituras a Supabase guardadas en el spool local.")
+    replay_parser.add_argument("--batch-size", type=int, default=100, help="Número de escrituras por lote (por defecto: 100).")
+    replay_parser.set_defaults(handler=lambda args: replay_write_spool(batch_size=args.batch_size))
+
+    export_parser = subparsers.add_parser("export", help="Exporta vacantes y habilidades a Parquet particionado por mes de publicación y país.")
+    export_parser.add_argument("--full", action="store_true", help="Borra la exportación anterior y exporta todas las vacantes (por defecto solo los meses nuevos).")
+    export_parser.add_argument("--output-dir", type=str, default=None, help=f"Directorio de la exportación (por defecto: {PARQUET_EXPORT_DIR}).")
+    export_parser.add_argument("--page-size", type=int, default=1000, help="Vacantes por página leída de Supabase (por defecto: 1000).")
+    export_parser.set_defaults(handler=lambda args: export_parquet(full=args.full, output_dir=args.output_dir, page_size=args.page_size))
+
+    runs_parser = subparsers.add_parser("runs", help="Muestra el historial de ejecuciones (scraping y análisis) con sus métricas de rendimiento.")
+    runs_parser.add_argument("--last", type=int, default=10, help="Número de ejecuciones recientes a mostrar (por defecto: 10).")
+    runs_parser.add_argument("--kind", choices=["scrape", "trends", "backfill"], default=None, help="Solo las ejecuciones de este tipo.")
+    runs_parser.add_argument("--show", type=int, metavar="RUN_ID", default=None, help="Muestra los parámetros y todas las métricas de una ejecución.")
+    runs_parser.set_defaults(handler=command_runs)
+    return parser
+
+
+def normalize_argv(argv):
+    """
+    Traduce la sintaxis anterior, sin subcomando, a la actual: `--backfill START END` -> `backfill START END`,
+    `--analyze-trends` -> `analyze` y los flags de scraping sueltos -> `scrape`. Sin argumentos no cambia nada
+    (scraping interactivo). `--analyze-trends --backfill START END` era la forma habitual del backfill; el
+    subcomando `backfill` ya analiza cada día, así que el flag se descarta.
+    """
+    if not argv or argv[0] in ('-h', '--help') or not argv[0].startswith('-'):
+        return list(argv)
+    argv = list(argv)
+    if '--backfill' in argv:
+        index = argv.index('--backfill')
+        rest = [arg for arg in [*argv[:index], *argv[index + 3:]] if arg != '--analyze-trends']
+        normalized = ['backfill', *argv[index + 1:index + 3], *rest]
+    elif '--analyze-trends' in argv:
+        normalized = ['analyze', *[arg for arg in argv if arg != '--analyze-trends']]
+    else:
+        normalized = ['scrape', *argv]
+    logger.warning(f"⚠️ La sintaxis sin subcomando está obsoleta; usa `main.py {' '.join(normalized)}`.")
+    return normalized
+
+
+def command_scrape(args):
+    """Subcomando `scrape`: scraping no interactivo con los parámetros de la línea de comandos."""
+    search_keywords = get_search_keywords(load_config())
+    target_locations_for_spider = []
+    selected_continent_cli = args.continent
+
+    if args.country and args.country != "Todos los Países": 
+        target_locations_for_spider = [args.country]
+        logger.info(f"CLI: País único seleccionado para scraping: '{args.country}'.")
+    elif args.continent and args.continent in COMMON_GEO_DATA:
+        if args.country == "Todos los Países":
+            target_locations_for_spider = COMMON_GEO_DATA[args.continent]
+            logger.info(f"CLI: Continente '{args.continent}' seleccionado para scrapear todos sus países: {', '.join(target_locations_for_spider)}")
+        else: # Si se especificó continente pero no país, se asume todos los países del continente
+            target_locations_for_spider = COMMON_GEO_DATA[args.continent]
+            logger.info(f"CLI: Continente '{args.continent}' seleccionado; asumiendo todos sus países: {', '.join(target_locations_for_spider)}")
+    else:
+        selected_continent_cli = "Latam" # Default
+        target_locations_for_spider = COMMON_GEO_DATA["Latam"]
+        logger.info("CLI: No se especificó continente/país válido, o se especificó un continente inválido. Usando países predeterminados de Latam.")
+
+    selected_spiders_cli = []
+    if args.spiders:
+        selected_spiders_cli = [s.strip().lower() for s in args.spiders.split(',')]
+        selected_spiders_cli = [s for s in selected_spiders_cli if s in AVAILABLE_SPIDERS]
+        if not selected_spiders_cli:
+            logger.warning("No se encontraron spiders válidos en el argumento --spiders. No se ejecutará ningún scraper.")
+    else:
+        logger.info("No se especificaron spiders vía CLI. Ejecutando LinkedIn y Computrabajo por defecto.")
+        selected_spiders_cli = list(AVAILABLE_SPIDERS)
+
+    max_jobs_cli = args.max_jobs if args.max_jobs is not None else 100 
+    if max_jobs_cli <= 0:
+        logger.warning(f"Límite de vacantes CLI ({max_jobs_cli}) inválido o 0. Usando 100 por defecto.")
+        max_jobs_cli = 100
+
+    run_scrapers(selected_spiders_cli, search_keywords, target_locations_for_spider, args.start_date, args.end_date, max_jobs_cli, selected_continent_cli,
+                 rebuild_cube=not args.no_cube)
+    return True
+
+
+def command_interactive_scrape():
+    """Sin argumentos: pregunta spiders, ubicación, fechas y límite de vacantes, y ejecuta el scraping."""
     config = load_config()
-    search_keywords = get_search_keywords(config)
-
-    parser = argparse.ArgumentParser(description="Ejecuta el scraper de vacantes con parámetros opcionales.")
-    parser.add_argument("--start_date", type=lambda s: datetime.datetime.strptime(s, '%Y-%m-%d').date(), help="Fecha de inicio para filtrar vacantes (YYYY-MM-DD)")
-    parser.add_argument("--end_date", type=lambda s: datetime.datetime.strptime(s, '%Y-%m-%d').date(), help="Fecha de fin para filtrar vacantes (YYYY-MM-DD)")
-    parser.add_argument("--continent", type=str, help="Continente a buscar (ej. Latam)")
-    parser.add_argument("--country", type=str, help="País específico a buscar (ej. Mexico). Usa 'Todos los Países' para todos en el continente.")
-    parser.add_argument("--spiders", type=str, help="Spiders a ejecutar, separados por comas (ej. linkedin,computrabajo)") # MODIFICADO: EJEMPLO
-    parser.add_argument("--max_jobs", type=int, default=None, help="Número máximo de vacantes a raspar por cada scraper (por defecto: modo interactivo).")
-    parser.add_argument("--analyze-trends", action="store_true", help="Ejecuta el análisis de tendencias y las almacena en la base de datos.")
-    parser.add_argument("--analysis-date", type=lambda s: datetime.datetime.strptime(s, '%Y-%m-%d').date(), help="Fecha para la que se realiza el análisis de tendencias (YYYY-MM-DD, por defecto hoy).")
+    selected_spiders_interactive = get_spider_selection()
+    if not selected_spiders_interactive:
+        logger.info("No se seleccionó ningún scraper en modo interactivo. Saliendo.")
+        return True
     
-    args = parser.parse_args()
-
-    if args.analyze_trends:
-        print("Iniciando análisis de tendencias...")
-        analyzer = TrendAnalyzer()
-        analyzer.analyze_and_store_trends(analysis_date=args.analysis_date)
-        print("Análisis de tendencias completado y almacenado.")
-        sys.exit(0)
+    selected_countries_interactive, start_date_interactive, end_date_interactive, max_jobs_interactive, selected_continent_interactive = get_interactive_input(config)
     
-    if len(sys.argv) > 1 and not args.analyze_trends:
-        # Modo CLI (se pasaron argumentos)
-        target_locations_for_spider = []
-        selected_continent_cli = args.continent
-        
-        if args.country and args.country != "Todos los Países": 
-            target_locations_for_spider = [args.country]
-            logger.info(f"CLI: País único seleccionado para scraping: '{args.country}'.")
-        elif args.continent and args.continent in COMMON_GEO_DATA:
-            if args.country == "Todos los Países":
-                target_locations_for_spider = COMMON_GEO_DATA[args.continent]
-                logger.info(f"CLI: Continente '{args.continent}' seleccionado para scrapear todos sus países: {', '.join(target_locations_for_spider)}")
-            else: # Si se especificó continente pero no país, se asume todos los países del continente
-                target_locations_for_spider = COMMON_GEO_DATA[args.continent]
-                logger.info(f"CLI: Continente '{args.continent}' seleccionado; asumiendo todos sus países: {', '.join(target_locations_for_spider)}")
-        else:
-            selected_continent_cli = "Latam" # Default
-            target_locations_for_spider = COMMON_GEO_DATA["Latam"]
-            logger.info("CLI: No se especificó continente/país válido, o se especificó un continente inválido. Usando países predeterminados de Latam.")
-
-        selected_spiders_cli = []
-        if args.spiders:
-            selected_spiders_cli = [s.strip().lower() for s in args.spiders.split(',')]
-            valid_spider_names = ["linkedin", "computrabajo"] # MODIFICADO: ELIMINADO 'indeed'
-            selected_spiders_cli = [s for s in selected_spiders_cli if s in valid_spider_names]
-            if not selected_spiders_cli:
-                logger.warning("No se encontraron spiders válidos en el argumento --spiders. No se ejecutará ningún scraper.")
-        else:
-            logger.info("No se especificaron spiders vía CLI. Ejecutando LinkedIn y Computrabajo por defecto.") # MODIFICADO: EJEMPLO
-            selected_spiders_cli = ["linkedin", "computrabajo"] # MODIFICADO: ELIMINADO 'indeed'
-
-        max_jobs_cli = args.max_jobs if args.max_jobs is not None else 100 
-        if max_jobs_cli <= 0:
-            logger.warning(f"Límite de vacantes CLI ({max_jobs_cli}) inválido o 0. Usando 100 por defecto.")
-            max_jobs_cli = 100
-
-        run_scrapers(selected_spiders_cli, search_keywords, target_locations_for_spider, args.start_date, args.end_date, max_jobs_cli, selected_continent_cli)
-    else:
-        # Modo interactivo sin argumentos CLI
-        # ELIMINADO: La lógica interactiva de selección de spiders ya está ajustada por 'get_spider_selection()'
-        # ELIMINADO: y se invocará aquí si no hay argumentos CLI.
-        selected_spiders_interactive = get_spider_selection()
-        if not selected_spiders_interactive:
-            logger.info("No se seleccionó ningún scraper en modo interactivo. Saliendo.")
-            sys.exit(0)
-        
-        selected_countries_interactive, start_date_interactive, end_date_interactive, max_jobs_interactive, selected_continent_interactive = get_interactive_input(config)
-        
-        run_scrapers(selected_spiders_interactive, search_keywords, selected_countries_interactive, start_date_interactive, end_date_interactive, max_jobs_interactive, selected_continent_interactive)
+    run_scrapers(selected_spiders_interactive, get_search_keywords(config), selected_countries_interactive, start_date_interactive, end_date_interactive, max_jobs_interactive, selected_continent_interactive)
+    return True
+
+
+def command_analyze(args):
+    print("Iniciando análisis de tendencias...")
+    analyzer = create_trend_analyzer(args.engine, args.refresh_snapshot, as_of=args.analysis_date)
+    analyzer.analyze_and_store_trends(analysis_date=args.analysis_date)
+    print("Análisis de tendencias completado y almacenado.")
+    return True
+
+
+def command_backfill(args):
+    print(f"Iniciando backfill de tendencias del {args.start} al {args.end}...")
+    analyzer = create_trend_analyzer(args.engine, args.refresh_snapshot, as_of=args.end)
+    analyzer.backfill_trends(args.start, args.end)
+    print("Backfill de tendencias completado y almacenado.")
+    return True
+
+
+def command_runs(args):
+    from runner.run_ledger import RunLedger, format_run_detail, format_runs_report
+    run_ledger = RunLedger()
+    print(format_run_detail(run_ledger, args.show) if args.show is not None else format_runs_report(run_ledger, last=args.last, kind=args.kind))
+    return True
+
+
+def main(argv=None):
+    """Punto de entrada: retorna el código de salida del subcomando (0 si terminó bien)."""
+    args = build_parser().parse_args(normalize_argv(sys.argv[1:] if argv is None else argv))
+    # Cargar variables de entorno explícitamente (después de parsear: `--help` no las necesita)
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.command is None:
+        return 0 if command_interactive_scrape() else 1
+    return 0 if args.handler(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import datetime
+import statistics
+import threading
+from contextlib import closing
+from typing import Dict, List, Optional, Sequence, Tuple
+from config.paths import PIPELINE_DB_PATH
+from runner.orchestrator import Orchestrator, PipelineLedger, build_analysis_steps, build_scrape_steps
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    acquired_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+"""
+
+ANALYSIS_PIPELINE = 'analysis'
+# Lease que serializa el reproceso del spool de escrituras (cada país corre su propio 'etl_flush')
+SPOOL_REPLAY_LEASE = 'spool_replay'
+SPOOL_REPLAY_LEASE_TTL = 2 * 3600
+
+
+def country_pipeline(country: str) -> str:
+    """Nombre con el que se registran en el PipelineLedger las ejecuciones de un país."""
+    return f"country:{country}"
+
+
+class LeaseStore:
+    """
+    Leases con vencimiento en SQLite (la misma base que el PipelineLedger). Mientras un lease está vigente
+    nadie más puede tomarlo, ni otro hilo ni otro proceso del scheduler: una ejecución lenta no se lanza
+    dos veces. El vencimiento solo importa si el dueño murió sin liberarlo.
+    """
+    def __init__(self, db_path: str = PIPELINE_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_LEASE_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def acquire(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """Toma el lease `name` por `ttl_seconds`. Retorna el id del dueño, o None si otro lo tiene vigente."""
+        now = datetime.datetime.now()
+        owner = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and datetime.datetime.fromisoformat(row[0]) > now:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, acquired_at, expires_at) VALUES (?, ?, ?, ?)",
+                (name, owner, now.isoformat(), (now + datetime.timedelta(seconds=ttl_seconds)).isoformat()),
+            )
+            conn.execute("COMMIT")
+            return owner
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release(self, name: str, owner: str):
+        """Libera el lease si sigue siendo de `owner` (si venció y otro lo tomó, no se toca)."""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def held(self, names: Sequence[str]) -> List[str]:
+        """De `names`, los leases que alguien tiene vigentes."""
+        now = datetime.datetime.now()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT name, expires_at FROM leases WHERE name IN ({', '.join('?' for _ in names)})", tuple(names)
+            ).fetchall()
+        return [name for name, expires_at in rows if datetime.datetime.fromisoformat(expires_at) > now]
+
+
+def plan_country_slots(countries: Sequence[str], window_start: datetime.datetime, window_end: datetime.datetime,
+                       durations: Dict[str, float]) -> List[Tuple[datetime.datetime, str]]:
+    """
+    Reparte los países en la ventana [window_start, window_end) según su duración estimada (segundos):
+    si caben uno tras otro, cada país empieza cuando termina el anterior más un margen igual para todos; si no,
+    los inicios se comprimen en proporción a las duraciones (y los límites por plataforma evitan la saturación).
+    Los países más largos van primero para que un retraso no empuje a los demás fuera de la ventana.
+    Retorna [(inicio, país)] ordenado por inicio.
+    """
+    if not countries:
+        return []
+    window = (window_end - window_start).total_seconds()
+    ordered = sorted(countries, key=lambda country: durations[country], reverse=True)
+    total = sum(durations[country] for country in ordered)
+    gap = max(0.0, window - total) / len(ordered)
+    scale = min(1.0, window / total) if total else 1.0
+    slots, offset = [], 0.0
+    for country in ordered:
+        slots.append((window_start + datetime.timedelta(seconds=offset), country))
+        offset += durations[country] * scale + gap
+    return slots
+
+
+def _parse_time(value: str) -> datetime.time:
+    return datetime.datetime.strptime(value, '%H:%M').time()
+
+
+class FanoutScheduler:
+    """
+    Scheduler que reparte el scraping de muchos países en una ventana diaria (p. ej. 01:00-07:00): cada país
+    corre su propio pipeline (un shard por spider y el vaciado del spool) en su franja, y al cerrar la ventana,
+    cuando ya no queda ningún país en curso, corre el análisis (cubo, agregados, tendencias, reporte) una sola vez.
+
+    - Las franjas se recalculan cada día con la mediana de las últimas duraciones de cada país en el ledger
+      (`default_duration` si aún no hay historial).
+    - `platform_limits` (spider -> máximo) limita los shards simultáneos de cada plataforma entre todos los países.
+    - Cada ejecución toma un lease (LeaseStore): si la del día anterior sigue corriendo, no se lanza otra.
+    """
+    # Tiempo tras el cierre de la ventana en que aún se lanza el análisis (p. ej. si el scheduler se reinició)
+    ANALYSIS_GRACE = datetime.timedelta(hours=6)
+    ANALYSIS_LEASE_TTL = 6 * 3600
+
+    def __init__(self, countries: Sequence[str], spiders: Sequence[str], window_start: str, window_end: str,
+                 max_jobs: int = 100, platform_limits: Optional[Dict[str, int]] = None, engine: str = 'pandas',
+                 with_report: bool = True, scrape_timeout: float = 3600, scrape_retries: int = 1,
+                 default_duration: float = 1800, ledger: Optional[PipelineLedger] = None,
+                 leases: Optional[LeaseStore] = None, build_country_steps=None, build_final_steps=None):
+        self.countries = list(countries)
+        self.spiders = list(spiders)
+        self.window_start = _parse_time(window_start)
+        self.window_end = _parse_time(window_end)
+        self.default_duration = default_duration
+        self.ledger = ledger or PipelineLedger()
+        self.leases = leases or LeaseStore(self.ledger.db_path)
+        platform_limits = platform_limits or {}
+        self.platform_pools = {spider: threading.BoundedSemaphore(platform_limits.get(spider, 1)) for spider in self.spiders}
+        # Vence después del peor caso de un país (todos sus shards con todos los reintentos agotando el tiempo límite)
+        self.country_lease_ttl = scrape_timeout * (scrape_retries + 1) * max(1, len(self.spiders)) + 600
+        self.build_country_steps = build_country_steps or (
+            lambda country: build_scrape_steps([country], self.spiders, max_jobs, scrape_timeout, scrape_retries)
+        )
+        self.build_final_steps = build_final_steps or (
+            lambda day: build_analysis_steps(day, engine, with_report)
+        )
+        self._plans = {}
+        self._launched = set()
+        self._waiting = set()
+        self._threads = []
+
+    def window(self, day: datetime.date) -> Tuple[datetime.datetime, datetime.datetime]:
+        """Ventana del día `day`; si el fin es anterior al inicio, termina al día siguiente."""
+        start = datetime.datetime.combine(day, self.window_start)
+        end = datetime.datetime.combine(day, self.window_end)
+        return start, end if end > start else end + datetime.timedelta(days=1)
+
+    def estimated_duration(self, country: str) -> float:
+        durations = self.ledger.recent_durations(country_pipeline(country))
+        return statistics.median(durations) if durations else self.default_duration
+
+    def plan(self, day: datetime.date) -> List[Tuple[datetime.datetime, str]]:
+        """Franjas de los países para `day` (se calculan una vez por día)."""
+        if day not in self._plans:
+            start, end = self.window(day)
+            durations = {country: self.estimated_duration(country) for country in self.countries}
+            self._plans[day] = plan_country_slots(self.countries, start, end, durations)
+            logging.info(f"Plan de scraping del {day}: " + ", ".join(f"{country} {slot:%H:%M}" for slot, country in self._plans[day]))
+        return self._plans[day]
+
+    def tick(self, now: Optional[datetime.datetime] = None) -> List[str]:
+        """
+        Lanza (en hilos) las ejecuciones cuya hora ya llegó. Una ejecución que ya empezó en la ventana de hoy según
+        el ledger (p. ej. antes de reiniciar el scheduler) no se repite. Los países solo se lanzan dentro de su
+        ventana; el análisis, hasta ANALYSIS_GRACE después de cerrarla y solo cuando ningún país tiene su lease
+        (para no calcular tendencias con datos a medias). Retorna los nombres de las lanzadas.
+        """
+        now = now or datetime.datetime.now()
+        launched = []
+        # La ventana de ayer puede seguir abierta pasada la medianoche
+        for day in (now.date() - datetime.timedelta(days=1), now.date()):
+            start, end = self.window(day)
+            if now < start:
+                continue
+            due = []
+            if now < end:
+                due = [(country_pipeline(country), lambda country=country: self.build_country_steps(country), self.country_lease_ttl)
+                       for slot, country in self.plan(day) if slot <= now]
+            elif now < end + self.ANALYSIS_GRACE and (day, ANALYSIS_PIPELINE) not in self._launched:
+                running = self.leases.held([country_pipeline(country) for country in self.countries])
+                if not running:
+                    due = [(ANALYSIS_PIPELINE, lambda day=day: self.build_final_steps(day), self.ANALYSIS_LEASE_TTL)]
+                elif day not in self._waiting:
+                    self._waiting.add(day)
+                    logging.info(f"El análisis del {day} espera a que terminen: {', '.join(running)}.")
+            for pipeline, build_steps, ttl_seconds in due:
+                if (day, pipeline) in self._launched:
+                    continue
+                self._launched.add((day, pipeline))
+                last_started = self.ledger.last_started_at(pipeline)
+                if last_started and datetime.datetime.fromisoformat(last_started) >= start:
+                    continue
+                thread = threading.Thread(target=self._run_leased, args=(pipeline, build_steps(), ttl_seconds),
+                                          name=f"fanout-{pipeline}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+                launched.append(pipeline)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for day in [day for day in self._plans if day < now.date() - datetime.timedelta(days=1)]:
+            del self._plans[day]
+        self._launched = {key for key in self._launched if key[0] >= now.date() - datetime.timedelta(days=1)}
+        self._waiting = {day for day in self._waiting if day >= now.date() - datetime.timedelta(days=1)}
+        return launched
+
+    def _run_leased(self, pipeline: str, steps, ttl_seconds: float):
+        owner = self.leases.acquire(pipeline, ttl_seconds)
+        if owner is None:
+            logging.warning(f"⚠️ '{pipeline}' sigue en curso desde una ejecución anterior; se omite esta franja.")
+            return None
+        try:
+            orchestrator = Orchestrator(steps, ledger=self.ledger, max_workers=max(1, len(self.spiders)) + 1,
+                                        shared_pools=self.platform_pools)
+            return orchestrator.run(pipeline)
+        except Exception as e:
+            logging.error(f"❌ Error en la ejecución '{pipeline}': {e}")
+        finally:
+            self.leases.release(pipeline, owner)
+
+    def join(self, timeout: Optional[float] = None):
+        """Espera a que terminen las ejecuciones lanzadas (útil al detener el scheduler)."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self, poll_interval: float = 30):
+        while True:
+            self.tick()
+            time.sleep(poll_interval)
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import sqlite3
+import logging
+import datetime
+import threading
+import subprocess
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+from config.paths import PROJECT_ROOT, JOB_RUNNER_DB_PATH, JOB_RUNNER_LOG_DIR
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Estados de una ejecución; QUEUED y RUNNING son los activos (cuentan para evitar duplicados)
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    command TEXT NOT NULL,
+    dedup_key TEXT,
+    status TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    returncode INTEGER,
+    pid INTEGER,
+    log_path TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_status_idx ON runs (status, id);
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Cola persistente (SQLite) de ejecuciones de main.py lanzadas desde el dashboard.
+
+    Cada operación abre su propia conexión y las transiciones de estado se hacen en transacciones
+    'BEGIN IMMEDIATE', así que varias sesiones del dashboard (o varios procesos) pueden encolar y
+    reclamar ejecuciones a la vez sin pisarse. Una ejecución con `dedup_key` no se encola si ya hay
+    otra activa (en cola o corriendo) con la misma clave: se retorna la existente.
+    """
+    def __init__(self, db_path: str = JOB_RUNNER_DB_PATH, log_dir: str = JOB_RUNNER_LOG_DIR):
+        self.db_path = db_path
+        self.log_dir = log_dir
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _as_dict(row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        run = dict(row)
+        run['command'] = json.loads(run['command'])
+        return run
+
+    def submit(self, kind: str, command: List[str], dedup_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """Encola `command` (lista de argumentos). Retorna (ejecución, creada); creada=False si ya había una activa con `dedup_key`."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if dedup_key is not None:
+                existing = conn.execute(
+                    f"SELECT * FROM runs WHERE dedup_key = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) ORDER BY id LIMIT 1",
+                    (dedup_key, *ACTIVE_STATUSES),
+                ).fetchone()
+                if existing is not None:
+                    conn.execute("COMMIT")
+                    return self._as_dict(existing), False
+            cursor = conn.execute(
+                "INSERT INTO runs (kind, command, dedup_key, status, submitted_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(command, ensure_ascii=False), dedup_key, QUEUED, _now()),
+            )
+            run_id = cursor.lastrowid
+            log_path = os.path.join(self.log_dir, f"run_{run_id}.log")
+            conn.execute("UPDATE runs SET log_path = ? WHERE id = ?", (log_path, run_id))
+            conn.execute("COMMIT")
+            logging.info(f"Ejecución {run_id} ({kind}) encolada: {command}")
+            return self.get(run_id), True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Marca como 'running' la ejecución en cola más antigua y la retorna (None si la cola está vacía)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM runs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE runs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, _now(), row['id']))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row['id']) if row is not None else None
+
+    def set_pid(self, run_id: int, pid: int):
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE runs SET pid = ? WHERE id = ?", (pid, run_id))
+
+    def finish(self, run_id: int, returncode: int):
+        status = SUCCEEDED if returncode == 0 else FAILED
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE runs SET status = ?, returncode = ?, finished_at = ? WHERE id = ?", (status, returncode, _now(), run_id))
+        logging.info(f"Ejecución {run_id} finalizada: {status} (código {returncode}).")
+
+    def recover_stale(self) -> int:
+        """Marca como fallidas las ejecuciones 'running' cuyo proceso ya no existe (p. ej. tras reiniciar el dashboard)."""
+        recovered = 0
+        for run in self.list_runs(statuses=(RUNNING,)):
+            if not _pid_alive(run['pid']):
+                self.finish(run['id'], -1)
+                recovered += 1
+        return recovered
+
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            return self._as_dict(conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def list_runs(self, statuses=None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Ejecuciones más recientes primero, opcionalmente solo las de los estados indicados."""
+        query, params = "SELECT * FROM runs", []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        conn = self._connect()
+        try:
+            return [self._as_dict(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+
+def tail_log(log_path: Optional[str], max_bytes: int = 20_000) -> str:
+    """Últimos `max_bytes` del log de una ejecución (vacío si aún no existe)."""
+    if not log_path or not os.path.exists(log_path):
+        return ""
+    with open(log_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        data = f.read()
+    text = data.decode('utf-8', errors='replace')
+    # Si se cortó a mitad del archivo, se descarta la primera línea (incompleta)
+    return text.split('\n', 1)[-1] if size > max_bytes else text
+
+
+class JobRunner:
+    """
+    Hilo en segundo plano que ejecuta una a una las ejecuciones de la JobQueue. La salida del proceso
+    (stdout y stderr) se escribe directamente en el log de la ejecución, que el dashboard lee con tail_log
+    mientras corre; nada se acumula en memoria.
+    """
+    def __init__(self, queue: JobQueue, poll_interval: float = 1.0, cwd: str = PROJECT_ROOT):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.cwd = cwd
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        recovered = self.queue.recover_stale()
+        if recovered:
+            logging.warning(f"⚠️ {recovered} ejecuciones interrumpidas se marcaron como fallidas.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_pending(self) -> int:
+        """Ejecuta (bloqueando) todas las ejecuciones en cola. Retorna cuántas se ejecutaron."""
+        executed = 0
+        while not self._stop.is_set():
+            run = self.queue.claim_next()
+            if run is None:
+                break
+            self._execute(run)
+            executed += 1
+        return executed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_pending():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                logging.error(f"❌ Error en el ejecutor de tareas en segundo plano: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _execute(self, run: Dict[str, Any]):
+        env = os.environ.copy()
+        # Sin buffer, para que el log se pueda seguir mientras el proceso corre
+        env['PYTHONUNBUFFERED'] = '1'
+        try:
+            with open(run['log_path'], 'ab') as log_file:
+                process = subprocess.Popen(run['command'], cwd=self.cwd, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+                self.queue.set_pid(run['id'], process.pid)
+                returncode = process.wait()
+        except OSError as e:
+            with open(run['log_path'], 'a', encoding='utf-8') as log_file:
+                log_file.write(f"\nNo se pudo iniciar el proceso: {e}\n")
+            returncode = -1
+        self.queue.finish(run['id'], returncode)
+
+
+def main_command(*args: str) -> List[str]:
+    """Comando para ejecutar main.py con el mismo intérprete que el dashboard."""
+    return [sys.executable, os.path.join(PROJECT_ROOT, "main.py"), *args]
+
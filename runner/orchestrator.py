@@ -0,0 +1,426 @@
+import os
+import time
+import sqlite3
+import logging
+import datetime
+import threading
+import subprocess
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from config.paths import PROJECT_ROOT, PIPELINE_DB_PATH, PIPELINE_LOG_DIR, REPORTS_DIR, WRITE_SPOOL_PATH
+from runner.job_runner import RUNNING, SUCCEEDED, FAILED, main_command
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Estado de un paso cuyas dependencias fallaron (no se ejecuta)
+SKIPPED = 'skipped'
+FINISHED_STATUSES = (SUCCEEDED, FAILED, SKIPPED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration_s REAL
+);
+CREATE TABLE IF NOT EXISTS step_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES pipeline_runs (id),
+    step TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    finished_at TEXT,
+    duration_s REAL,
+    error TEXT,
+    log_path TEXT
+);
+CREATE INDEX IF NOT EXISTS step_runs_run_idx ON step_runs (run_id, id);
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+class StepTimeout(Exception):
+    pass
+
+
+class Step:
+    """
+    Paso del pipeline: una función (`func`, se ejecuta en un hilo de este proceso) o un comando (`command`,
+    lista de argumentos; se ejecuta como subproceso con la salida en el log del paso).
+
+    - `depends_on`: nombres de los pasos que deben terminar antes. Si alguno no termina bien, el paso se
+      marca como 'skipped', salvo con `allow_failed_deps=True` (p. ej. procesar lo que sí se scrapeó).
+    - `retries`: reintentos tras un error, esperando `retry_delay` segundos (el doble en cada reintento).
+    - `timeout`: segundos por intento. Un comando se termina al vencer; una función no se puede interrumpir,
+      así que el paso falla sin reintentos y el hilo termina por su cuenta.
+    - `pool`: grupo de concurrencia (ver `Orchestrator(pool_limits=..., shared_pools=...)`), p. ej. la plataforma
+      de un shard de scraping ('linkedin').
+    """
+    def __init__(self, name: str, func: Optional[Callable[[], Any]] = None, command: Optional[List[str]] = None,
+                 depends_on: Sequence[str] = (), retries: int = 0, retry_delay: float = 5.0,
+                 timeout: Optional[float] = None, pool: Optional[str] = None, allow_failed_deps: bool = False):
+        if (func is None) == (command is None):
+            raise ValueError(f"El paso '{name}' debe tener una función o un comando (no ambos).")
+        self.name = name
+        self.func = func
+        self.command = command
+        self.depends_on = list(depends_on)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.pool = pool
+        self.allow_failed_deps = allow_failed_deps
+
+
+class PipelineLedger:
+    """
+    Registro local (SQLite) de las ejecuciones del pipeline y de cada uno de sus pasos: estado, intentos,
+    inicio, fin, duración y error. Cada operación abre su propia conexión, así que los pasos que corren en
+    paralelo pueden registrar su avance a la vez.
+    """
+    def __init__(self, db_path: str = PIPELINE_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, query: str, params: Iterable[Any] = ()):
+        with closing(self._connect()) as conn:
+            return conn.execute(query, tuple(params)).lastrowid
+
+    def _fetch(self, query: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(query, tuple(params)).fetchall()]
+
+    def start_run(self, pipeline: str, step_names: Iterable[str]) -> int:
+        run_id = self._execute(
+            "INSERT INTO pipeline_runs (pipeline, status, started_at) VALUES (?, ?, ?)", (pipeline, RUNNING, _now())
+        )
+        for step_name in step_names:
+            self._execute("INSERT INTO step_runs (run_id, step, status) VALUES (?, ?, 'pending')", (run_id, step_name))
+        return run_id
+
+    def finish_run(self, run_id: int, status: str, duration_s: float):
+        self._execute(
+            "UPDATE pipeline_runs SET status = ?, finished_at = ?, duration_s = ? WHERE id = ?",
+            (status, _now(), duration_s, run_id),
+        )
+
+    def start_step(self, run_id: int, step_name: str, log_path: Optional[str] = None):
+        self._execute(
+            "UPDATE step_runs SET status = ?, started_at = ?, log_path = ? WHERE run_id = ? AND step = ?",
+            (RUNNING, _now(), log_path, run_id, step_name),
+        )
+
+    def record_attempt(self, run_id: int, step_name: str, attempts: int, error: Optional[str] = None):
+        self._execute(
+            "UPDATE step_runs SET attempts = ?, error = ? WHERE run_id = ? AND step = ?", (attempts, error, run_id, step_name)
+        )
+
+    def finish_step(self, run_id: int, step_name: str, status: str, duration_s: Optional[float] = None, error: Optional[str] = None):
+        self._execute(
+            "UPDATE step_runs SET status = ?, finished_at = ?, duration_s = ?, error = COALESCE(?, error) WHERE run_id = ? AND step = ?",
+            (status, _now(), duration_s, error, run_id, step_name),
+        )
+
+    def list_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Ejecuciones del pipeline, las más recientes primero."""
+        return self._fetch("SELECT * FROM pipeline_runs ORDER BY id DESC LIMIT ?", (limit,))
+
+    def list_steps(self, run_id: int) -> List[Dict[str, Any]]:
+        return self._fetch("SELECT * FROM step_runs WHERE run_id = ? ORDER BY id", (run_id,))
+
+    def last_started_at(self, pipeline: str) -> Optional[str]:
+        """Inicio (ISO) de la ejecución más reciente de un pipeline, o None si nunca se ejecutó."""
+        rows = self._fetch("SELECT started_at FROM pipeline_runs WHERE pipeline = ? ORDER BY id DESC LIMIT 1", (pipeline,))
+        return rows[0]['started_at'] if rows else None
+
+    def recent_durations(self, pipeline: str, limit: int = 5) -> List[float]:
+        """Duraciones (segundos) de las últimas ejecuciones exitosas de un pipeline, las más recientes primero."""
+        rows = self._fetch(
+            "SELECT duration_s FROM pipeline_runs WHERE pipeline = ? AND status = ? AND duration_s IS NOT NULL ORDER BY id DESC LIMIT ?",
+            (pipeline, SUCCEEDED, limit),
+        )
+        return [row['duration_s'] for row in rows]
+
+
+class Orchestrator:
+    """
+    Ejecuta un DAG de pasos en este proceso. Un paso se lanza cuando sus dependencias terminaron, hasta
+    `max_workers` a la vez y, dentro de cada grupo (`Step.pool`), hasta `pool_limits[grupo]` a la vez: los
+    shards de scraping independientes corren en paralelo sin saturar las plataformas. `shared_pools`
+    (grupo -> semáforo) limita además los pasos de un grupo entre varios Orchestrator que corren a la vez en
+    el mismo proceso. Cada ejecución y cada paso quedan registrados en el PipelineLedger.
+    """
+    def __init__(self, steps: List[Step], ledger: Optional[PipelineLedger] = None, max_workers: int = 4,
+                 pool_limits: Optional[Dict[str, int]] = None, shared_pools: Optional[Dict[str, threading.Semaphore]] = None,
+                 log_dir: str = PIPELINE_LOG_DIR, cwd: str = PROJECT_ROOT):
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("Los nombres de los pasos del pipeline deben ser únicos.")
+        for step in steps:
+            unknown = [dependency for dependency in step.depends_on if dependency not in self.steps]
+            if unknown:
+                raise ValueError(f"El paso '{step.name}' depende de pasos inexistentes: {unknown}")
+        self._check_acyclic()
+        self.ledger = ledger or PipelineLedger()
+        self.max_workers = max_workers
+        self.pool_limits = pool_limits or {}
+        self.shared_pools = shared_pools or {}
+        self.log_dir = log_dir
+        self.cwd = cwd
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"El pipeline tiene un ciclo que incluye el paso '{name}'.")
+            visiting.add(name)
+            for dependency in self.steps[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    def run(self, pipeline: str = 'daily') -> Dict[str, str]:
+        """Ejecuta el pipeline completo. Retorna el estado final de cada paso."""
+        run_id = self.ledger.start_run(pipeline, self.steps)
+        run_start = time.perf_counter()
+        statuses = {name: None for name in self.steps}
+        running_pools = {}
+        futures = {}
+        logging.info(f"Pipeline '{pipeline}' (ejecución {run_id}) iniciado con {len(self.steps)} pasos.")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while True:
+                launched = self._launch_ready(run_id, statuses, running_pools, futures, executor)
+                if not futures:
+                    if not launched:
+                        break
+                    continue
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = futures.pop(future)
+                    statuses[step.name] = future.result()
+                    if step.pool:
+                        running_pools[step.pool] -= 1
+
+        status = SUCCEEDED if all(s == SUCCEEDED for s in statuses.values()) else FAILED
+        self.ledger.finish_run(run_id, status, time.perf_counter() - run_start)
+        logging.info(f"Pipeline '{pipeline}' (ejecución {run_id}) finalizado: {status} {statuses}")
+        return statuses
+
+    def _launch_ready(self, run_id, statuses, running_pools, futures, executor):
+        """Lanza (o marca como omitidos) los pasos cuyas dependencias ya terminaron. Retorna si cambió algún estado."""
+        changed = False
+        for name, step in self.steps.items():
+            if statuses[name] is not None:
+                continue
+            dependency_statuses = [statuses[dependency] for dependency in step.depends_on]
+            if any(s is None or s == RUNNING for s in dependency_statuses):
+                continue
+            if not step.allow_failed_deps and any(s != SUCCEEDED for s in dependency_statuses):
+                statuses[name] = SKIPPED
+                self.ledger.finish_step(run_id, name, SKIPPED, error="Dependencias sin completar")
+                logging.warning(f"⚠️ Paso '{name}' omitido: sus dependencias no terminaron correctamente.")
+                changed = True
+                continue
+            if step.pool and running_pools.get(step.pool, 0) >= self.pool_limits.get(step.pool, self.max_workers):
+                continue
+            statuses[name] = RUNNING
+            if step.pool:
+                running_pools[step.pool] = running_pools.get(step.pool, 0) + 1
+            futures[executor.submit(self._run_step, run_id, step)] = step
+            changed = True
+        return changed
+
+    def _run_step(self, run_id: int, step: Step) -> str:
+        semaphore = self.shared_pools.get(step.pool) if step.pool else None
+        if semaphore is None:
+            return self._attempt_step(run_id, step)
+        with semaphore:
+            return self._attempt_step(run_id, step)
+
+    def _attempt_step(self, run_id: int, step: Step) -> str:
+        log_path = None
+        if step.command is not None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log_path = os.path.join(self.log_dir, f"run_{run_id}_{step.name}.log")
+        self.ledger.start_step(run_id, step.name, log_path)
+        step_start = time.perf_counter()
+        error = None
+        for attempt in range(1, step.retries + 2):
+            try:
+                if step.command is not None:
+                    self._run_command(step, log_path)
+                else:
+                    self._run_func(step)
+                self.ledger.record_attempt(run_id, step.name, attempt)
+                duration = time.perf_counter() - step_start
+                self.ledger.finish_step(run_id, step.name, SUCCEEDED, duration)
+                logging.info(f"Paso '{step.name}' completado en {duration:.1f} s (intento {attempt}).")
+                return SUCCEEDED
+            except StepTimeout as e:
+                error = str(e)
+                self.ledger.record_attempt(run_id, step.name, attempt, error)
+                if step.command is None:
+                    break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self.ledger.record_attempt(run_id, step.name, attempt, error)
+            logging.error(f"❌ Paso '{step.name}' falló (intento {attempt} de {step.retries + 1}): {error}")
+            if attempt <= step.retries:
+                time.sleep(step.retry_delay * 2 ** (attempt - 1))
+        self.ledger.finish_step(run_id, step.name, FAILED, time.perf_counter() - step_start, error)
+        return FAILED
+
+    def _run_command(self, step: Step, log_path: str):
+        env = os.environ.copy()
+        env['PYTHONUNBUFFERED'] = '1'
+        with open(log_path, 'ab') as log_file:
+            try:
+                returncode = subprocess.run(
+                    step.command, cwd=self.cwd, env=env, stdout=log_file, stderr=subprocess.STDOUT, timeout=step.timeout
+                ).returncode
+            except subprocess.TimeoutExpired:
+                raise StepTimeout(f"Superó el tiempo límite de {step.timeout} s")
+        if returncode != 0:
+            raise RuntimeError(f"El comando terminó con código {returncode}")
+
+    @staticmethod
+    def _run_func(step: Step):
+        if step.timeout is None:
+            step.func()
+            return
+        outcome = {}
+
+        def target():
+            try:
+                step.func()
+            except BaseException as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=target, name=f"pipeline-{step.name}", daemon=True)
+        thread.start()
+        thread.join(step.timeout)
+        if thread.is_alive():
+            raise StepTimeout(f"Superó el tiempo límite de {step.timeout} s (la función sigue en segundo plano)")
+        if 'error' in outcome:
+            raise outcome['error']
+
+
+# --- Pasos del pipeline diario ---
+def flush_write_spool() -> int:
+    """
+    Aplica en Supabase las escrituras que los scrapers dejaron en el spool local. Las que vuelvan a fallar
+    siguen en el spool para el próximo reproceso: el paso no falla por ellas (los agregados y el análisis
+    trabajan con lo que sí llegó a Supabase), solo avisa. Retorna el número de escrituras pendientes.
+    """
+    from main import replay_write_spool
+    from database.spool import WriteSpool
+    if replay_write_spool():
+        return 0
+    remaining = len(WriteSpool(WRITE_SPOOL_PATH))
+    logging.warning(f"⚠️ Quedan {remaining} escrituras pendientes en el spool local ({WRITE_SPOOL_PATH}); se reintentarán en el próximo reproceso.")
+    return remaining
+
+
+def rebuild_cube():
+    from main import rebuild_aggregate_cube
+    rebuild_aggregate_cube()
+
+
+def update_rollups(analysis_date: datetime.date, engine: str = 'pandas'):
+    """Con duckdb, refresca siempre el snapshot: el paso corre justo después del scraping y del ETL."""
+    from main import create_trend_analyzer
+    create_trend_analyzer(engine, refresh_snapshot=True, as_of=analysis_date).update_rollups(up_to_date=analysis_date)
+
+
+def analyze_trends(analysis_date: datetime.date, engine: str = 'pandas'):
+    from main import create_trend_analyzer
+    create_trend_analyzer(engine, as_of=analysis_date).analyze_and_store_trends(analysis_date=analysis_date, refresh_rollups=False)
+
+
+def write_report(analysis_date: datetime.date, report_dir: str = REPORTS_DIR, sample_size: int = 50):
+    """Genera el resumen de IA de las vacantes más recientes y lo guarda como Markdown en `report_dir`."""
+    from analysis.report_generator import ReportGenerator
+    from database.supabase_client import SupabaseClient
+    response = SupabaseClient().get_jobs(limit=sample_size)
+    jobs_data = [
+        {'title': job.get('title'), 'company': job.get('company_name'), 'sector': job.get('sector')}
+        for job in (response.data if response and response.data else [])
+    ]
+    report = ReportGenerator().generate_daily_insight(jobs_data)
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"insight_{analysis_date.isoformat()}.md")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report)
+    logging.info(f"Reporte de IA guardado en {report_path}.")
+
+
+def scrape_command(country: str, spider: str, max_jobs: int) -> List[str]:
+    """Comando de un shard de scraping (un país y un spider), sin reconstruir el cubo (lo hace el paso 'cube')."""
+    return main_command('scrape', '--country', country, '--spiders', spider, '--max_jobs', str(max_jobs), '--no-cube')
+
+
+def build_scrape_steps(countries: Sequence[str], spiders: Sequence[str], max_jobs: int = 100,
+                       scrape_timeout: float = 3600, scrape_retries: int = 1) -> List[Step]:
+    """
+    Un shard de scraping por (país, spider), sin dependencias entre sí, seguido del vaciado del spool (ETL), que
+    corre aunque algún shard falle para procesar lo que sí se guardó. El grupo de concurrencia de cada shard es
+    su plataforma (el nombre del spider).
+    """
+    scrape_steps = [
+        Step(f"scrape_{spider}_{country}".replace(' ', '_'), command=scrape_command(country, spider, max_jobs),
+             retries=scrape_retries, retry_delay=60, timeout=scrape_timeout, pool=spider)
+        for country in countries
+        for spider in spiders
+    ]
+    return scrape_steps + [
+        Step('etl_flush', func=flush_write_spool, depends_on=[step.name for step in scrape_steps],
+             retries=2, retry_delay=30, allow_failed_deps=True),
+    ]
+
+
+def build_analysis_steps(analysis_date: Optional[datetime.date] = None, engine: str = 'pandas', with_report: bool = True,
+                         after: Sequence[str] = ()) -> List[Step]:
+    """Cubo del dashboard y agregados diarios → análisis de tendencias → reporte de IA, tras los pasos `after`."""
+    analysis_date = analysis_date or datetime.date.today()
+    steps = [
+        Step('cube', func=rebuild_cube, depends_on=after, timeout=1800, retries=1, retry_delay=30),
+        Step('rollups', func=lambda: update_rollups(analysis_date, engine), depends_on=after, retries=1, retry_delay=30),
+        Step('trends', func=lambda: analyze_trends(analysis_date, engine), depends_on=['rollups'], retries=1, retry_delay=30),
+    ]
+    if with_report:
+        steps.append(Step('report', func=lambda: write_report(analysis_date), depends_on=['trends'], retries=1, retry_delay=30))
+    return steps
+
+
+def build_daily_pipeline(countries: Sequence[str], spiders: Sequence[str], max_jobs: int = 100,
+                         analysis_date: Optional[datetime.date] = None, engine: str = 'pandas',
+                         scrape_timeout: float = 3600, scrape_retries: int = 1, with_report: bool = True) -> List[Step]:
+    """
+    Pasos del pipeline diario: un shard de scraping por (país, spider) → vaciado del spool (ETL) →
+    cubo del dashboard y agregados diarios → análisis de tendencias → reporte de IA.
+    """
+    return (
+        build_scrape_steps(countries, spiders, max_jobs, scrape_timeout, scrape_retries)
+        + build_analysis_steps(analysis_date, engine, with_report, after=['etl_flush'])
+    )
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import datetime
+import statistics
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+from config.paths import RUN_HISTORY_DB_PATH
+from runner.job_runner import RUNNING, SUCCEEDED, FAILED
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration_s REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    scope TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, scope, name)
+);
+CREATE INDEX IF NOT EXISTS runs_kind_idx ON runs (kind, id);
+"""
+
+# Estadísticas de Scrapy que se guardan por spider (nombre en el ledger -> clave en crawler.stats)
+SPIDER_STAT_KEYS = {
+    'requests': 'downloader/request_count',
+    'responses': 'downloader/response_count',
+    'items': 'item_scraped_count',
+    'dropped': 'item_dropped_count',
+    'bytes': 'downloader/response_bytes',
+    'errors': 'log_count/ERROR',
+    'download_errors': 'downloader/exception_count',
+}
+# Claves que los pipelines de scrapers/pipelines.py añaden a crawler.stats
+STAGE_STAT_PREFIX = 'pipeline/'
+DB_WRITE_STAT_PREFIX = 'db_write/'
+JOBS_STAT_PREFIX = 'jobs/'
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+def spider_metrics(stats: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Métricas de un spider a partir de `crawler.stats.get_stats()`: peticiones, respuestas, ítems guardados y
+    descartados, bytes descargados, errores, tiempo de cada etapa del pipeline ('stage/<Clase>'), latencia de
+    escritura en la base de datos ('db_write/...') y resultado de las escrituras ('jobs/...').
+    """
+    metrics = {name: float(stats.get(key, 0) or 0) for name, key in SPIDER_STAT_KEYS.items()}
+    metrics['spider_exceptions'] = float(sum(value for key, value in stats.items() if key.startswith('spider_exceptions/')))
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)):
+            continue
+        if key.startswith(STAGE_STAT_PREFIX) and key.endswith('/seconds'):
+            metrics['stage/' + key[len(STAGE_STAT_PREFIX):-len('/seconds')]] = float(value)
+        elif key.startswith(DB_WRITE_STAT_PREFIX) or key.startswith(JOBS_STAT_PREFIX):
+            metrics[key] = float(value)
+    return metrics
+
+
+class RunRecorder:
+    """
+    Acumula las métricas de una ejecución (scope -> nombre -> valor) mientras corre; `RunLedger.track`
+    las guarda al terminar.
+    """
+    def __init__(self, run_id: Optional[int] = None):
+        self.run_id = run_id
+        self.metrics: Dict[str, Dict[str, float]] = {}
+
+    def record(self, scope: str, metrics: Dict[str, float]):
+        self.metrics.setdefault(scope, {}).update({name: float(value) for name, value in metrics.items()})
+
+    @contextmanager
+    def timed(self, name: str, scope: str = 'phase'):
+        """Suma a `scope/name` los segundos que tarda el bloque (también si termina con error)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            values = self.metrics.setdefault(scope, {})
+            values[name] = values.get(name, 0.0) + time.perf_counter() - start
+
+
+class RunLedger:
+    """
+    Historial local (SQLite) de las ejecuciones de `main.run_scrapers` y de `TrendAnalyzer`: parámetros, estado,
+    duración y métricas por scope (un spider, 'phase', 'trends'...). Cada operación abre su propia conexión,
+    así que varios procesos (p. ej. los shards del pipeline diario) pueden registrar a la vez.
+    """
+    def __init__(self, db_path: str = RUN_HISTORY_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _fetch(self, query: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(query, tuple(params)).fetchall()]
+
+    def start_run(self, kind: str, params: Dict[str, Any]) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "INSERT INTO runs (kind, status, params, started_at) VALUES (?, ?, ?, ?)",
+                (kind, RUNNING, json.dumps(params, default=str, ensure_ascii=False), _now()),
+            ).lastrowid
+
+    def record_metrics(self, run_id: int, scope: str, metrics: Dict[str, float]):
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO run_metrics (run_id, scope, name, value) VALUES (?, ?, ?, ?)",
+                [(run_id, scope, name, float(value)) for name, value in metrics.items()],
+            )
+
+    def finish_run(self, run_id: int, status: str, duration_s: float, error: Optional[str] = None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ?, duration_s = ?, error = ? WHERE id = ?",
+                (status, _now(), duration_s, error, run_id),
+            )
+
+    @contextmanager
+    def track(self, kind: str, params: Dict[str, Any]):
+        """
+        Registra una ejecución alrededor del bloque: la marca 'succeeded' o, si el bloque lanza una excepción,
+        'failed' con el error (la excepción se propaga). Las métricas del RunRecorder se guardan en ambos casos.
+        """
+        start = time.perf_counter()
+        recorder = RunRecorder(self.start_run(kind, params))
+        status, error = SUCCEEDED, None
+        try:
+            yield recorder
+        except BaseException as e:
+            status, error = FAILED, f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                for scope, metrics in recorder.metrics.items():
+                    self.record_metrics(recorder.run_id, scope, metrics)
+                self.finish_run(recorder.run_id, status, time.perf_counter() - start, error)
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ No se pudo registrar la ejecución {recorder.run_id} en el historial: {e}")
+
+    def list_runs(self, kind: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Ejecuciones (con `params` ya decodificados), las más recientes primero."""
+        if kind:
+            rows = self._fetch("SELECT * FROM runs WHERE kind = ? ORDER BY id DESC LIMIT ?", (kind, limit))
+        else:
+            rows = self._fetch("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+        for row in rows:
+            row['params'] = json.loads(row['params'])
+        return rows
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._fetch("SELECT * FROM runs WHERE id = ?", (run_id,))
+        return rows[0] if rows else None
+
+    def get_metrics(self, run_id: int) -> Dict[str, Dict[str, float]]:
+        """Métricas de una ejecución: scope -> nombre -> valor."""
+        metrics: Dict[str, Dict[str, float]] = {}
+        for row in self._fetch("SELECT scope, name, value FROM run_metrics WHERE run_id = ? ORDER BY scope, name", (run_id,)):
+            metrics.setdefault(row['scope'], {})[row['name']] = row['value']
+        return metrics
+
+
+def run_totals(metrics: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Totales de una ejecución sumando todos sus scopes; 'db_write_avg_ms' es la latencia media por escritura."""
+    totals: Dict[str, float] = {}
+    for values in metrics.values():
+        for name, value in values.items():
+            if name == 'db_write/max_seconds':
+                totals[name] = max(totals.get(name, 0.0), value)
+            else:
+                totals[name] = totals.get(name, 0.0) + value
+    if totals.get('db_write/calls'):
+        totals['db_write_avg_ms'] = totals['db_write/seconds'] / totals['db_write/calls'] * 1000
+    return totals
+
+
+# Columnas del reporte: (título, función que toma el registro de la ejecución y sus totales)
+REPORT_COLUMNS = [
+    ('Duración (s)', lambda run, totals: run['duration_s']),
+    ('Peticiones', lambda run, totals: totals.get('requests')),
+    ('Respuestas', lambda run, totals: totals.get('responses')),
+    ('Ítems', lambda run, totals: totals.get('items', totals.get('records'))),
+    ('Descartados', lambda run, totals: totals.get('dropped')),
+    ('MB', lambda run, totals: totals['bytes'] / 1024 ** 2 if 'bytes' in totals else None),
+    ('Errores', lambda run, totals: totals.get('errors')),
+    ('BD ms/escr.', lambda run, totals: totals.get('db_write_avg_ms')),
+]
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return '-'
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def format_runs_report(ledger: RunLedger, last: int = 10, kind: Optional[str] = None) -> str:
+    """
+    Tabla de las últimas `last` ejecuciones (de la más antigua a la más reciente) con sus totales y, por cada
+    columna, la tendencia: mediana de las anteriores frente a la última ejecución y su variación.
+    """
+    runs = list(reversed(ledger.list_runs(kind=kind, limit=last)))
+    if not runs:
+        return "No hay ejecuciones registradas en el historial."
+    rows = []
+    for run in runs:
+        totals = run_totals(ledger.get_metrics(run['id']))
+        rows.append((run, [column(run, totals) for _, column in REPORT_COLUMNS]))
+
+    headers = ['ID', 'Tipo', 'Inicio', 'Estado'] + [title for title, _ in REPORT_COLUMNS]
+    table = [headers] + [
+        [str(run['id']), run['kind'], run['started_at'][:16].replace('T', ' '), run['status']] + [_format_value(value) for value in values]
+        for run, values in rows
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(headers))]
+    lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in table]
+
+    if len(rows) > 1:
+        lines += ['', f"Tendencia (mediana de las {len(rows) - 1} anteriores → última):"]
+        for index, (title, _) in enumerate(REPORT_COLUMNS):
+            previous = [values[index] for _, values in rows[:-1] if values[index] is not None]
+            latest = rows[-1][1][index]
+            if not previous or latest is None:
+                continue
+            baseline = statistics.median(previous)
+            change = f" ({(latest - baseline) / baseline * 100:+.1f}%)" if baseline else ''
+            lines.append(f"  {title}: {_format_value(baseline)} → {_format_value(latest)}{change}")
+    return '\n'.join(lines)
+
+
+def format_run_detail(ledger: RunLedger, run_id: int) -> str:
+    """Parámetros y todas las métricas de una ejecución, agrupadas por scope."""
+    run = ledger.get_run(run_id)
+    if run is None:
+        return f"No existe la ejecución {run_id} en el historial."
+    lines = [
+        f"Ejecución {run['id']} ({run['kind']}): {run['status']}, {_format_value(run['duration_s'])} s, inicio {run['started_at']}",
+        f"Parámetros: {run['params']}",
+    ]
+    if run['error']:
+        lines.append(f"Error: {run['error']}")
+    for scope, metrics in ledger.get_metrics(run_id).items():
+        lines.append(f"[{scope}]")
+        lines.extend(f"  {name}: {_format_value(value)}" for name, value in metrics.items())
+    return '\n'.join(lines)
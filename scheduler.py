@@ -1,24 +1,92 @@
-import schedule
+import os
+import sys
 import time
-import subprocess
 import logging
+import argparse
+import yaml
+import schedule
+from dotenv import load_dotenv
+from config.geo import COMMON_GEO_DATA
+from runner.orchestrator import Orchestrator, build_daily_pipeline
+from runner.fanout import FanoutScheduler
+
+load_dotenv()
+logging.basicConfig(filename='scheduler.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
+
+
+def load_pipeline_config():
+    """Sección 'pipeline' de config.yaml."""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return (yaml.safe_load(f) or {}).get('pipeline', {})
 
-logging.basicConfig(filename='scheduler.log', level=logging.INFO)
 
-def job_scrape():
-    logging.info("Starting scheduled scrape...")
-    # Defaulting to a safe location for scheduled runs
-    subprocess.run(["python", "main.py", "scrape", "--country", "Ecuador"])
+def platform_limits(pipeline_config, spiders):
+    """Shards simultáneos por plataforma: 'platform_concurrency' de la configuración, 1 si no se indica."""
+    configured = pipeline_config.get('platform_concurrency') or {}
+    return {spider: configured.get(spider, 1) for spider in spiders}
 
-def job_enrich():
-    logging.info("Starting scheduled enrichment...")
-    subprocess.run(["python", "main.py", "enrich"])
 
-# Schedule daily runs
-schedule.every().day.at("08:00").do(job_scrape)
+def run_daily_pipeline():
+    """Ejecuta el pipeline diario (scraping por país y spider, ETL, agregados, tendencias y reporte) en este proceso."""
+    pipeline_config = load_pipeline_config()
+    spiders = pipeline_config.get('spiders', ['linkedin', 'computrabajo'])
+    logging.info("Iniciando el pipeline diario programado...")
+    steps = build_daily_pipeline(
+        countries=pipeline_config.get('countries', ['Colombia']),
+        spiders=spiders,
+        max_jobs=pipeline_config.get('max_jobs', 100),
+        engine=pipeline_config.get('engine', 'pandas'),
+        scrape_timeout=pipeline_config.get('scrape_timeout', 3600),
+        with_report=pipeline_config.get('report', True),
+    )
+    orchestrator = Orchestrator(
+        steps,
+        max_workers=pipeline_config.get('max_workers', 4),
+        pool_limits=platform_limits(pipeline_config, spiders),
+    )
+    return orchestrator.run('daily')
+
+
+def build_fanout_scheduler():
+    """FanoutScheduler con la sección 'pipeline.fanout' de la configuración."""
+    pipeline_config = load_pipeline_config()
+    fanout_config = pipeline_config.get('fanout') or {}
+    spiders = pipeline_config.get('spiders', ['linkedin', 'computrabajo'])
+    countries = fanout_config.get('countries') or COMMON_GEO_DATA[fanout_config.get('continent', 'Latam')]
+    return FanoutScheduler(
+        countries=countries,
+        spiders=spiders,
+        window_start=fanout_config.get('window_start', "01:00"),
+        window_end=fanout_config.get('window_end', "07:00"),
+        max_jobs=pipeline_config.get('max_jobs', 100),
+        platform_limits=platform_limits(pipeline_config, spiders),
+        engine=pipeline_config.get('engine', 'pandas'),
+        with_report=pipeline_config.get('report', True),
+        scrape_timeout=pipeline_config.get('scrape_timeout', 3600),
+        default_duration=fanout_config.get('default_duration', 1800),
+    )
+
 
 if __name__ == "__main__":
-    print("Scheduler running... Press Ctrl+C to stop.")
+    parser = argparse.ArgumentParser(description="Programa el pipeline diario de scraping y análisis.")
+    parser.add_argument("--once", action="store_true", help="Ejecuta el pipeline una vez ahora y termina.")
+    parser.add_argument("--fanout", action="store_true", help="Reparte los países del continente en la ventana diaria configurada.")
+    args = parser.parse_args()
+
+    if args.once:
+        statuses = run_daily_pipeline()
+        sys.exit(0 if all(status == 'succeeded' for status in statuses.values()) else 1)
+
+    if args.fanout:
+        fanout_scheduler = build_fanout_scheduler()
+        print(f"Scheduler running (fan-out de {len(fanout_scheduler.countries)} países)... Press Ctrl+C to stop.")
+        fanout_scheduler.run_forever()
+
+    run_at = load_pipeline_config().get('run_at', "08:00")
+    schedule.every().day.at(run_at).do(run_daily_pipeline)
+    print(f"Scheduler running (pipeline diario a las {run_at})... Press Ctrl+C to stop.")
     while True:
         schedule.run_pending()
         time.sleep(60)
\ No newline at end of file
@@ -2,12 +2,18 @@
 import re
 import hashlib
 import datetime
+import json
 import os
+import time
+import functools
 from dotenv import load_dotenv
 import logging
 from typing import Dict, Any, List
 
 from database.supabase_client import SupabaseClient
+from database.skill_sync import SkillSynchronizer
+from database.spool import WriteSpool
+from config.paths import WRITE_SPOOL_PATH
 from etl.cleaners import TextCleaner
 from etl.normalizers import DataNormalizer
 from etl.skill_extractor import SkillExtractor
@@ -17,6 +23,34 @@ from etl.enrichment import CompanyEnricher # Importamos el CompanyEnricher
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+
+def _crawler_stats(spider):
+    """Colector de estadísticas del crawler del spider, o None (p. ej. al reprocesar el spool sin spider)."""
+    return getattr(getattr(spider, 'crawler', None), 'stats', None)
+
+
+def timed_stage(cls):
+    """
+    Suma a las estadísticas del crawler el tiempo de `process_item` de la etapa ('pipeline/<Clase>/seconds'),
+    también cuando la etapa descarta el ítem. El historial de ejecuciones (runner/run_ledger.py) las guarda por spider.
+    """
+    process_item = cls.process_item
+
+    @functools.wraps(process_item)
+    def timed_process_item(self, item, spider):
+        start = time.perf_counter()
+        try:
+            return process_item(self, item, spider)
+        finally:
+            stats = _crawler_stats(spider)
+            if stats is not None:
+                stats.inc_value(f"pipeline/{cls.__name__}/seconds", time.perf_counter() - start, start=0.0)
+
+    cls.process_item = timed_process_item
+    return cls
+
+
+@timed_stage
 class CleaningPipeline:
     """Pipeline para limpiar y normalizar el texto de las vacantes y generar job_id si es necesario."""
     def __init__(self):
@@ -41,6 +75,7 @@ class CleaningPipeline:
 
         return item
 
+@timed_stage
 class NormalizationPipeline:
     """
     Pipeline para normalizar campos como país, tipo de trabajo, antigüedad y categoría de rol.
@@ -85,6 +120,7 @@ class NormalizationPipeline:
 
         return item
 
+@timed_stage
 class CompanyEnrichmentPipeline:
     """
     Pipeline para enriquecer datos de compañía usando CompanyEnricher.
@@ -111,6 +147,7 @@ class CompanyEnrichmentPipeline:
         
         return item
 
+@timed_stage
 class SkillExtractionPipeline:
     """Pipeline para extraer habilidades de la descripción de la vacante."""
     def __init__(self):
@@ -127,6 +164,7 @@ class SkillExtractionPipeline:
         item['skills'] = self.skill_extractor.extract_skills(text_for_skills)
         return item
 
+@timed_stage
 class SectorClassificationPipeline:
     """
     Pipeline para clasificar la vacante en un sector.
@@ -154,11 +192,36 @@ class SectorClassificationPipeline:
 
         return item
 
+@timed_stage
 class SupabasePipeline:
     """Pipeline final para almacenar los datos limpios y enriquecidos en Supabase."""
+
+    # Campos de 'companies' que, si cambian, obligan a re-upsertar una compañía ya conocida
+    COMPANY_ENRICHMENT_FIELDS = ('industry', 'country', 'website', 'size', 'type')
+    # Campos de la vacante que forman el hash de contenido. 'posted_date' queda fuera porque
+    # NormalizationPipeline usa la fecha de hoy cuando la plataforma no la publica.
+    CONTENT_HASH_FIELDS = (
+        'title', 'company_name', 'location', 'country', 'job_type', 'seniority_level',
+        'sector', 'description', 'requirements', 'salary_range', 'source_url', 'skills',
+    )
+    TOUCH_BATCH_SIZE = 100
+
     def __init__(self):
         self.client = None
         self.skill_extractor = SkillExtractor() # Para categorizar las skills al guardar
+        # Caché nombre -> fila de 'companies' (con 'id') válida durante la ejecución del spider
+        self.company_cache: Dict[str, Dict[str, Any]] = {}
+        self.company_cache_hits = 0
+        self.company_cache_misses = 0
+        self.skill_sync = None
+        # Índice (job_id, source_platform) -> (id en DB, content_hash) de las vacantes ya guardadas
+        self.job_hash_index: Dict[tuple, tuple] = {}
+        self.pending_touches: List[str] = []
+        self.job_write_stats = {'new': 0, 'updated': 0, 'unchanged': 0}
+        # Escrituras a Supabase de este pipeline: número, segundos totales y la más lenta
+        self.db_write_stats = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+        # Lo que no pueda escribirse en Supabase se conserva aquí para reprocesarlo con `main.py replay`
+        self.spool = WriteSpool(WRITE_SPOOL_PATH)
         logging.info("Pipeline de Supabase inicializado.")
 
     def open_spider(self, spider):
@@ -169,80 +232,238 @@ class SupabasePipeline:
             logging.error(f"Error al conectar a Supabase en open_spider: {e}")
             self.client = None
 
+        if self.client:
+            self._warm_company_cache()
+            self._load_job_hash_index()
+            self.skill_sync = SkillSynchronizer(self.client, self.skill_extractor.categorize_skill, on_error=self._spool_skill_batch)
+
+    def _warm_company_cache(self):
+        """Precarga la caché de compañías con una única lectura masiva de la tabla 'companies'."""
+        try:
+            for company in self.client.get_companies():
+                self.company_cache[company['name']] = company
+            logging.info(f"Caché de compañías precargada con {len(self.company_cache)} registros.")
+        except Exception as e:
+            logging.warning(f"No se pudo precargar la caché de compañías, se resolverán bajo demanda: {e}")
+
+    def _load_job_hash_index(self):
+        """Carga en bloque los hashes de contenido de las vacantes existentes."""
+        try:
+            for row in self.client.get_job_hashes():
+                self.job_hash_index[(row['job_id'], row['source_platform'])] = (row['id'], row.get('content_hash'))
+            logging.info(f"Índice de hashes de contenido cargado con {len(self.job_hash_index)} vacantes.")
+        except Exception as e:
+            logging.warning(f"No se pudo cargar el índice de hashes de contenido; todas las vacantes se escribirán: {e}")
+
+    @classmethod
+    def compute_content_hash(cls, job_data: Dict[str, Any]) -> str:
+        """Hash estable (SHA-256) de los campos normalizados de la vacante."""
+        normalized = {}
+        for field in cls.CONTENT_HASH_FIELDS:
+            value = job_data.get(field)
+            if isinstance(value, (list, tuple, set)):
+                normalized[field] = sorted(str(v).strip().lower() for v in value)
+            elif value is None:
+                normalized[field] = ''
+            else:
+                normalized[field] = ' '.join(str(value).split()).lower()
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _timed_write(self, write, *args):
+        """Ejecuta una escritura del cliente de Supabase midiendo su latencia en `db_write_stats`."""
+        start = time.perf_counter()
+        try:
+            return write(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_write_stats['calls'] += 1
+            self.db_write_stats['seconds'] += elapsed
+            self.db_write_stats['max_seconds'] = max(self.db_write_stats['max_seconds'], elapsed)
+
+    def _flush_touches(self):
+        """Actualiza en bloque 'scraped_at'/'is_active' de las vacantes sin cambios."""
+        if not self.pending_touches:
+            return
+        touches, self.pending_touches = self.pending_touches, []
+        self._timed_write(self.client.touch_jobs, touches, datetime.datetime.now().isoformat())
+        logging.info(f"{len(touches)} vacantes sin cambios marcadas como vistas (scraped_at/is_active).")
+
+    def _resolve_company_id(self, company_data: Dict[str, Any]):
+        """
+        Devuelve el ID de la compañía. Solo llama a Supabase si el nombre es nuevo
+        en esta ejecución o si alguno de los campos de enriquecimiento cambió.
+        """
+        company_name = company_data['name']
+        cached = self.company_cache.get(company_name)
+        if cached and all(company_data.get(field) == cached.get(field) for field in self.COMPANY_ENRICHMENT_FIELDS):
+            self.company_cache_hits += 1
+            return cached['id']
+
+        self.company_cache_misses += 1
+        company_response = self._timed_write(self.client.upsert_company, company_data)
+        if company_response and company_response.data:
+            db_company_id = company_response.data[0]['id']
+            self.company_cache[company_name] = {**company_data, 'id': db_company_id}
+            logging.debug(f"Compañía '{company_name}' upsertada o encontrada, ID: {db_company_id}")
+            return db_company_id
+
+        logging.warning(f"No se pudo upsertar la compañía '{company_name}' o no se recibió ID. Response: {company_response.data if company_response else 'N/A'}")
+        return None
+
     def process_item(self, item, spider):
+        job_item = dict(item)
         if not self.client:
-            logging.error(f"No se pudo guardar la vacante '{item.get('title')}' porque el cliente de Supabase no está inicializado.")
+            logging.error(f"No se pudo guardar la vacante '{item.get('title')}' porque el cliente de Supabase no está inicializado. Se guarda en el spool local.")
+            self.spool.append('job', job_item, "Cliente de Supabase no inicializado")
             return item
 
-        # Convertir Scrapy Item a diccionario, filtrando None y habilidades
-        job_data = {k: v for k, v in dict(item).items() if v is not None}
-        skills_to_insert = job_data.pop('skills', []) # Las habilidades se insertan por separado
-        
-        # Campos de compañía que se upsertarán en la tabla 'companies'
-        company_name = job_data.get('company_name', 'Empresa Desconocida')
-        company_data = {
-            'name': company_name,
-            'industry': job_data.pop('company_industry', None),
-            'country': job_data.pop('company_hq_country', None),
-            'website': job_data.pop('company_website', None),
-            'size': job_data.pop('company_size', None),
-            'type': job_data.pop('company_type', None),
-        }
-        
-        # Aseguramos que 'role_category' no se guarde directamente en 'jobs' si no es una columna.
-        # Si 'jobs' tiene 'role_category', entonces no lo hagamos pop.
-        job_data.pop('role_category', None) # Asumimos que 'jobs' no tiene esta columna, o se mapea a 'sector'
+        self._store_items([job_item])
+        return item
 
-        try:
-            # 1. Upsertar/obtener la compañía y su ID
-            company_response = self.client.upsert_company(company_data)
-            db_company_id = None
-            if company_response and company_response.data:
-                db_company_id = company_response.data[0]['id']
-                logging.debug(f"Compañía '{company_name}' upsertada o encontrada, ID: {db_company_id}")
-            else:
-                logging.warning(f"No se pudo upsertar la compañía '{company_name}' o no se recibió ID. Response: {company_response.data if company_response else 'N/A'}")
-            
-            # 2. Si el esquema de 'jobs' tiene 'company_id' (FK a companies.id), añadimos.
-            # *CRÍTICO*: Si tu tabla `jobs` NO tiene una columna `company_id`, ¡esta línea debe ser eliminada!
-            if db_company_id:
-                job_data['company_id'] = db_company_id
-            
-            # 3. Upsertar la vacante
-            response = self.client.upsert_job(job_data)
-            
-            if response and response.data:
-                db_job_id = response.data[0]['id']
-                logging.info(f"✅ Vacante '{item.get('title')}' ({item.get('company_name')}) guardada en 'jobs', ID en DB: {db_job_id}")
-                
-                # 4. Eliminar habilidades antiguas y luego insertar las nuevas para esa vacante
-                if db_job_id:
-                    self.client.supabase.table("skills").delete().eq('job_id', db_job_id).execute()
-                    if skills_to_insert:
-                        skill_records = []
-                        for skill_name in skills_to_insert:
-                            skill_records.append({
-                                'job_id': db_job_id,
-                                'skill_name': skill_name,
-                                'skill_category': self.skill_extractor.categorize_skill(skill_name)
-                            })
-                        
-                        skill_response = self.client.insert_skills(skill_records)
-                        if skill_response and skill_response.data:
-                            logging.info(f"✅ Habilidades ({len(skill_records)}) guardadas para la vacante '{item.get('title')}'.")
-                        else:
-                            logging.warning(f"⚠️ No se pudieron guardar habilidades para la vacante '{item.get('title')}' (ID: {db_job_id}). Respuesta: {skill_response.data if skill_response else 'N/A'}")
-                    else:
-                        logging.debug(f"DEBUG: No hay habilidades para insertar para la vacante '{item.get('title')}'.")
-                else:
-                    logging.warning(f"⚠️ No hay ID de vacante para enlazar habilidades para '{item.get('title')}'. Habilidades no guardadas.")
+    def _store_items(self, job_items: List[Dict[str, Any]]):
+        """
+        Guarda un lote de vacantes: una sola en process_item, varias al reprocesar el spool.
+        Lo que no se pueda escribir se guarda en el spool local en lugar de descartarse.
+        """
+        to_write = []
+        for job_item in job_items:
+            # Entrada original del spool cuando se reprocesa, para conservar el historial de intentos
+            spool_entry = job_item.pop('_spool_entry', None)
+            # Filtrar None; las habilidades y los datos de compañía se guardan por separado
+            job_data = {k: v for k, v in job_item.items() if v is not None}
+            content_hash = self.compute_content_hash(job_data)
+            index_key = (job_data.get('job_id'), job_data.get('source_platform'))
+            indexed = self.job_hash_index.get(index_key)
+            if indexed and indexed[1] == content_hash:
+                # Contenido idéntico: solo se marca como vista, sin reescribir la fila ni sus habilidades
+                self.job_write_stats['unchanged'] += 1
+                self.pending_touches.append(indexed[0])
+                continue
 
-            else:
-                logging.warning(f"⚠️ No se pudo guardar la vacante '{item.get('title')}' o no se recibió ID de respuesta. Respuesta de Supabase: {response.data if response else 'N/A'}")
+            job_data['content_hash'] = content_hash
+            skills_to_insert = job_data.pop('skills', [])
+
+            # Campos de compañía que se upsertarán en la tabla 'companies'
+            company_data = {
+                'name': job_data.get('company_name', 'Empresa Desconocida'),
+                'industry': job_data.pop('company_industry', None),
+                'country': job_data.pop('company_hq_country', None),
+                'website': job_data.pop('company_website', None),
+                'size': job_data.pop('company_size', None),
+                'type': job_data.pop('company_type', None),
+            }
+
+            # Aseguramos que 'role_category' no se guarde directamente en 'jobs' si no es una columna.
+            # Si 'jobs' tiene 'role_category', entonces no lo hagamos pop.
+            job_data.pop('role_category', None) # Asumimos que 'jobs' no tiene esta columna, o se mapea a 'sector'
+            to_write.append({
+                'item': job_item, 'job_data': job_data, 'company_data': company_data,
+                'skills': skills_to_insert, 'index_key': index_key, 'indexed': indexed, 'spool_entry': spool_entry,
+            })
+
+        if len(self.pending_touches) >= self.TOUCH_BATCH_SIZE:
+            try:
+                self._flush_touches()
+            except Exception as e:
+                logging.error(f"❌ Error al actualizar vacantes sin cambios: {e}", exc_info=True)
+
+        if not to_write:
+            return
 
+        try:
+            # 1. Obtener el ID de cada compañía (desde la caché o upsertándola si es nueva/cambió)
+            for entry in to_write:
+                db_company_id = self._resolve_company_id(entry['company_data'])
+                # *CRÍTICO*: Si tu tabla `jobs` NO tiene una columna `company_id`, ¡esta línea debe ser eliminada!
+                if db_company_id:
+                    entry['job_data']['company_id'] = db_company_id
+
+            # 2. Upsertar las vacantes en una sola petición
+            response = self._timed_write(self.client.upsert_jobs, [entry['job_data'] for entry in to_write])
+            saved_ids = {
+                (row['job_id'], row['source_platform']): row['id']
+                for row in (response.data if response and response.data else [])
+            }
         except Exception as e:
-            logging.error(f"❌ Error crítico al guardar en Supabase: {e}. Vacante: {item.get('title')}. Datos enviados: {job_data}", exc_info=True)
-        return item
+            logging.error(f"❌ Error crítico al guardar en Supabase: {e}. {len(to_write)} vacante(s) guardadas en el spool local para reintentar.", exc_info=True)
+            for entry in to_write:
+                self.spool.append('job', entry['item'], str(e), previous=entry['spool_entry'])
+            return
+
+        for entry in to_write:
+            job_item = entry['item']
+            db_job_id = saved_ids.get(entry['index_key'])
+            if not db_job_id:
+                logging.warning(f"⚠️ No se pudo guardar la vacante '{job_item.get('title')}' o no se recibió ID de respuesta. Se guarda en el spool local.")
+                self.spool.append('job', job_item, "Sin ID en la respuesta de Supabase", previous=entry['spool_entry'])
+                continue
+
+            self.job_write_stats['updated' if entry['indexed'] else 'new'] += 1
+            self.job_hash_index[entry['index_key']] = (db_job_id, entry['job_data']['content_hash'])
+            logging.info(f"✅ Vacante '{job_item.get('title')}' ({job_item.get('company_name')}) guardada en 'jobs', ID en DB: {db_job_id}")
+
+            # 3. Encolar las habilidades; se sincronizan por lotes (solo altas y bajas)
+            self.skill_sync.queue(db_job_id, entry['skills'])
+
+    def _spool_skill_batch(self, batch: Dict[str, List[str]], error: Exception):
+        """Guarda en el spool un lote de habilidades que no pudo sincronizarse."""
+        for job_db_id, skills in batch.items():
+            self.spool.append('skills', {'job_db_id': job_db_id, 'skills': skills}, str(error))
+
+    def replay_spool(self, batch_size: int = 100):
+        """
+        Reprocesa en lotes las escrituras fallidas del spool local. Las que vuelvan
+        a fallar se re-encolan con el contador de intentos incrementado.
+        """
+        entries = self.spool.claim()
+        if not entries:
+            logging.info("El spool de escrituras fallidas está vacío.")
+            return 0
+
+        logging.info(f"Reprocesando {len(entries)} escrituras del spool local en lotes de {batch_size}...")
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i:i + batch_size]
+            job_items = []
+            for entry in batch:
+                if entry['kind'] == 'job':
+                    job_items.append({**entry['payload'], '_spool_entry': entry})
+                elif entry['kind'] == 'skills':
+                    self.skill_sync.queue(entry['payload']['job_db_id'], entry['payload']['skills'])
+            self._store_items(job_items)
+            self.skill_sync.flush()
+        self.spool.release()
+        return len(entries)
 
     def close_spider(self, spider):
+        if self.client:
+            try:
+                self._flush_touches()
+            except Exception as e:
+                logging.error(f"❌ Error al actualizar vacantes sin cambios: {e}", exc_info=True)
+            stats = self.job_write_stats
+            logging.info(f"Vacantes procesadas: {stats['new']} nuevas, {stats['updated']} actualizadas, {stats['unchanged']} sin cambios.")
+        if self.skill_sync:
+            try:
+                self.skill_sync.flush()
+            except Exception as e:
+                logging.error(f"❌ Error al sincronizar las habilidades pendientes: {e}", exc_info=True)
+            self.skill_sync.log_summary()
+        lookups = self.company_cache_hits + self.company_cache_misses
+        if lookups:
+            hit_rate = self.company_cache_hits / lookups * 100
+            logging.info(f"Caché de compañías: {self.company_cache_hits}/{lookups} aciertos ({hit_rate:.1f}%), {self.company_cache_misses} upserts enviados.")
+        self._publish_stats(spider)
         logging.info("Cerrando conexión de Supabase desde el pipeline.")
+
+    def _publish_stats(self, spider):
+        """Copia a las estadísticas del crawler la latencia de escritura y el resultado de las escrituras."""
+        stats = _crawler_stats(spider)
+        if stats is None:
+            return
+        for name, value in self.db_write_stats.items():
+            stats.set_value(f"db_write/{name}", value)
+        if self.skill_sync:
+            stats.set_value("db_write/skill_sync_seconds", self.skill_sync.write_seconds)
+        for name, value in self.job_write_stats.items():
+            stats.set_value(f"jobs/{name}", value)
@@ -0,0 +1,94 @@
+import datetime
+import pandas as pd
+import pytest
+from analysis.aggregate_cube import AggregateCube, CUBE_DIMENSIONS
+
+
+@pytest.fixture
+def jobs_df():
+    return pd.DataFrame([
+        {'posted_date': '2024-03-01', 'scraped_at': '2024-03-02T10:00:00+00:00', 'company_name': 'ACME', 'country': 'Colombia',
+         'sector': 'Fintech', 'seniority_level': 'Senior', 'source_platform': 'LinkedIn', 'role_category': 'Data'},
+        {'posted_date': '2024-03-01', 'scraped_at': '2024-03-02T10:00:00+00:00', 'company_name': 'ACME', 'country': 'Colombia',
+         'sector': 'Fintech', 'seniority_level': 'Junior', 'source_platform': 'LinkedIn', 'role_category': 'Data'},
+        {'posted_date': '2024-03-05', 'scraped_at': '2024-03-06T08:00:00+00:00', 'company_name': 'Globex', 'country': 'México',
+         'sector': None, 'seniority_level': 'Senior', 'source_platform': 'Computrabajo', 'role_category': 'Backend'},
+        {'posted_date': '2024-03-10', 'scraped_at': '2024-03-11T08:00:00+00:00', 'company_name': 'Initech', 'country': 'Chile',
+         'sector': 'Edtech', 'seniority_level': 'Senior', 'source_platform': 'LinkedIn', 'role_category': 'Data'},
+        {'posted_date': None, 'scraped_at': '2024-03-12T08:00:00+00:00', 'company_name': 'ACME', 'country': 'Colombia',
+         'sector': 'Fintech', 'seniority_level': 'Senior', 'source_platform': 'LinkedIn', 'role_category': 'Data'},
+    ])
+
+
+def as_dict(frame, key_column):
+    return dict(zip(frame[key_column], frame['count']))
+
+
+# --- Tests para AggregateCube ---
+def test_value_counts_match_raw_jobs(jobs_df):
+    cube = AggregateCube.from_jobs(jobs_df)
+
+    # Las vacantes sin fecha no entran en el cubo (tampoco pasan el filtro de fechas del dashboard)
+    assert cube.total() == 4
+    assert as_dict(cube.value_counts('sector'), 'sector') == {'Fintech': 2, 'Desconocido': 1, 'Edtech': 1}
+    platform_sector = cube.value_counts(['source_platform', 'sector'])
+    assert platform_sector.iloc[0].tolist() == ['LinkedIn', 'Fintech', 2]
+
+
+def test_filter_by_date_range_and_countries(jobs_df):
+    cube = AggregateCube.from_jobs(jobs_df)
+
+    sliced = cube.filter(datetime.date(2024, 3, 1), datetime.date(2024, 3, 5), countries=['Colombia', 'Chile'])
+
+    assert sliced.total() == 2
+    assert as_dict(sliced.value_counts('seniority_level'), 'seniority_level') == {'Junior': 1, 'Senior': 1}
+    assert as_dict(sliced.top_companies(5), 'company_name') == {'ACME': 2}
+
+
+def test_top_companies_keeps_top_k_per_day_and_country(jobs_df):
+    cube = AggregateCube.from_jobs(jobs_df, company_top_k=1)
+
+    assert cube.top_companies(10)['company_name'].tolist() == ['ACME', 'Globex', 'Initech']
+    assert len(cube.companies) == 3
+
+
+def test_build_from_pages_matches_single_frame(jobs_df):
+    pages = [jobs_df.iloc[:2].to_dict('records'), jobs_df.iloc[2:].to_dict('records')]
+
+    from_pages = AggregateCube.from_pages(pages)
+    from_frame = AggregateCube.from_jobs(jobs_df)
+
+    pd.testing.assert_frame_equal(from_pages.counts, from_frame.counts)
+    assert from_pages.jobs_count == 5
+    assert from_pages.max_scraped_at == '2024-03-12T08:00:00'
+
+
+def test_apply_delta_matches_rebuild(jobs_df):
+    cached, updated = jobs_df.iloc[:4], jobs_df.iloc[4:]
+    # La vacante de Initech se vuelve a extraer con otra seniority
+    changed = jobs_df.iloc[[3]].assign(seniority_level='Lead', scraped_at='2024-03-13T08:00:00+00:00')
+
+    cube = AggregateCube.from_jobs(cached).apply_delta(pd.concat([updated, changed]), removed_jobs=jobs_df.iloc[[3]])
+    rebuilt = AggregateCube.from_jobs(pd.concat([jobs_df.iloc[:3], updated, changed]))
+
+    assert as_dict(cube.value_counts('seniority_level'), 'seniority_level') == {'Senior': 2, 'Junior': 1, 'Lead': 1}
+    assert cube.value_counts(CUBE_DIMENSIONS).equals(rebuilt.value_counts(CUBE_DIMENSIONS))
+    assert as_dict(cube.top_companies(5), 'company_name') == as_dict(rebuilt.top_companies(5), 'company_name')
+    assert cube.matches(5, '2024-03-13T08:00:00')
+
+
+def test_apply_delta_without_changes_returns_same_cube(jobs_df):
+    cube = AggregateCube.from_jobs(jobs_df)
+
+    assert cube.apply_delta(jobs_df.iloc[0:0]) is cube
+
+
+def test_save_and_load_round_trip(jobs_df, tmp_path):
+    cube = AggregateCube.from_jobs(jobs_df)
+    cube.save(str(tmp_path))
+
+    loaded = AggregateCube.load(str(tmp_path))
+
+    assert loaded.matches(5, '2024-03-12T08:00:00')
+    assert as_dict(loaded.value_counts('country'), 'country') == as_dict(cube.value_counts('country'), 'country')
+    assert AggregateCube.load(str(tmp_path / 'missing')) is None
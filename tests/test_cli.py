@@ -0,0 +1,57 @@
+import sys
+import datetime
+import subprocess
+import pytest
+import main
+from config.paths import PROJECT_ROOT
+from runner.orchestrator import scrape_command
+
+HEAVY_MODULES = ('scrapy', 'pandas', 'supabase', 'yaml', 'analysis.trend_analyzer', 'scrapers.pipelines')
+
+
+def parse(argv):
+    return main.build_parser().parse_args(main.normalize_argv(argv))
+
+
+# --- Tests de arranque ---
+def test_importing_main_does_not_load_heavy_dependencies():
+    code = f"import sys, main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ''
+
+
+def test_subcommand_help_exits_cleanly():
+    result = subprocess.run([sys.executable, 'main.py', 'scrape', '--help'], cwd=PROJECT_ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0 and '--no-cube' in result.stdout
+
+
+# --- Tests de los subcomandos ---
+def test_subcommands_parse_their_arguments():
+    args = parse(['backfill', '2024-01-01', '2024-01-31', '--engine', 'duckdb'])
+    assert args.handler is main.command_backfill
+    assert (args.start, args.end, args.engine) == (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), 'duckdb')
+
+    args = parse(['analyze', '--analysis-date', '2024-03-15'])
+    assert args.handler is main.command_analyze and args.analysis_date == datetime.date(2024, 3, 15)
+
+    assert parse([]).command is None
+
+
+def test_orchestrator_scrape_command_is_valid_cli():
+    args = parse(scrape_command('Costa Rica', 'linkedin', 50)[2:])
+
+    assert args.command == 'scrape' and args.country == 'Costa Rica' and args.max_jobs == 50 and args.no_cube
+
+
+@pytest.mark.parametrize('legacy, expected', [
+    (['--analyze-trends', '--engine', 'duckdb'], ['analyze', '--engine', 'duckdb']),
+    (['--engine', 'duckdb', '--backfill', '2024-01-01', '2024-01-31'], ['backfill', '2024-01-01', '2024-01-31', '--engine', 'duckdb']),
+    (['--analyze-trends', '--backfill', '2024-01-01', '2024-01-31'], ['backfill', '2024-01-01', '2024-01-31']),
+    (['--country', 'Chile', '--max_jobs', '10'], ['scrape', '--country', 'Chile', '--max_jobs', '10']),
+    (['runs', '--last', '5'], ['runs', '--last', '5']),
+    ([], []),
+])
+def test_legacy_flags_are_translated_to_subcommands(legacy, expected):
+    assert main.normalize_argv(legacy) == expected
@@ -0,0 +1,49 @@
+import math
+import pandas as pd
+import pytest
+from analysis.cooccurrence import build_incidence_matrix, cooccurrence_scores
+
+
+@pytest.fixture
+def skills_df():
+    # 4 vacantes: Kafka siempre va con Spark; Python aparece en todas
+    links = {
+        'j1': ['Kafka', 'Spark', 'Python'],
+        'j2': ['Kafka', 'Spark', 'Python', 'Python'],  # Habilidad repetida: cuenta una sola vez
+        'j3': ['Python', 'SQL'],
+        'j4': ['Python', 'SQL'],
+    }
+    return pd.DataFrame([(job_id, skill) for job_id, skills in links.items() for skill in skills], columns=['job_id', 'skill_name'])
+
+
+# --- Tests para la matriz de incidencia ---
+def test_incidence_matrix_is_binary(skills_df):
+    incidence, skill_names = build_incidence_matrix(skills_df)
+    assert incidence.shape == (4, 4)
+    assert incidence.max() == 1
+    assert dict(zip(skill_names, incidence.sum(axis=0).A1)) == {'Kafka': 2, 'Spark': 2, 'Python': 4, 'SQL': 2}
+
+
+# --- Tests para lift y PMI ---
+def test_lift_and_pmi(skills_df):
+    pairs = cooccurrence_scores(*build_incidence_matrix(skills_df), min_pair_count=1)
+    by_pair = pairs.set_index(['skill_name', 'related_skill'])
+    # P(Kafka, Spark) = 2/4, P(Kafka) = P(Spark) = 2/4 -> lift 2
+    assert by_pair.loc[('Kafka', 'Spark'), 'lift'] == 2.0
+    assert by_pair.loc[('Kafka', 'Spark'), 'pmi'] == 1.0
+    # Python está en todas las vacantes: no aporta información (lift 1, PMI 0)
+    assert by_pair.loc[('Kafka', 'Python'), 'lift'] == 1.0
+    assert ('Kafka', 'SQL') not in by_pair.index
+    assert math.isclose(by_pair.loc[('SQL', 'Python'), 'pmi'], 0.0)
+
+
+def test_top_k_and_min_pair_count(skills_df):
+    pairs = cooccurrence_scores(*build_incidence_matrix(skills_df), min_pair_count=2, top_k=1)
+    assert list(zip(pairs['skill_name'], pairs['related_skill'])) == [
+        ('Kafka', 'Spark'), ('Python', 'Kafka'), ('SQL', 'Python'), ('Spark', 'Kafka'),
+    ]
+
+
+def test_empty_input_returns_empty_frame():
+    pairs = cooccurrence_scores(*build_incidence_matrix(pd.DataFrame(columns=['job_id', 'skill_name'])))
+    assert pairs.empty
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+from database.dashboard_export import export_rows, page_count, page_rows
+
+
+@pytest.fixture
+def frames():
+    jobs_df = pd.DataFrame({
+        'id': [f"job-{i}" for i in range(7)],
+        'title': [f"Vacante {i}" for i in range(7)],
+        'country': pd.Categorical(['Colombia', 'México'] * 3 + ['Chile']),
+        'scraped_at': pd.to_datetime(['2024-03-01 10:00'] * 6 + [None]),
+    })
+    skills_df = pd.DataFrame({
+        'job_id': ['job-0', 'job-0', 'job-5'],
+        'skill_name': pd.Categorical(['Python', 'SQL', 'Excel']),
+        'skill_category': pd.Categorical(['Lenguaje', 'Datos', 'Ofimática']),
+    })
+    return jobs_df, skills_df
+
+
+def fake_texts(job_ids):
+    return pd.DataFrame({'description': [f"Descripción de {job_id}" for job_id in job_ids]}, index=job_ids)
+
+
+# --- Tests para page_rows ---
+def test_page_rows_builds_only_requested_page(frames):
+    jobs_df, skills_df = frames
+    requested = []
+
+    def loader(job_ids):
+        requested.append(job_ids)
+        return fake_texts(job_ids)
+
+    page = page_rows(jobs_df, skills_df, ['title', 'country'], page=2, page_size=5, text_loader=loader)
+
+    assert page['title'].tolist() == ['Vacante 5', 'Vacante 6']
+    assert page['skills'].tolist() == ['Excel', '']
+    assert page['description'].tolist() == ['Descripción de job-5', 'Descripción de job-6']
+    assert requested == [['job-5', 'job-6']]
+    assert page_count(7, 5) == 2 and page_count(0, 5) == 1
+
+
+# --- Tests para export_rows ---
+def test_export_csv_in_chunks(frames, tmp_path):
+    jobs_df, skills_df = frames
+
+    path, rows_written = export_rows('csv', jobs_df, skills_df, ['title', 'country'], export_dir=str(tmp_path), chunk_rows=3)
+
+    exported = pd.read_csv(path, keep_default_na=False)
+    assert rows_written == 7
+    assert exported.columns.tolist() == ['title', 'country', 'skills']
+    assert exported['title'].tolist() == jobs_df['title'].tolist()
+    assert exported.loc[0, 'skills'] == 'Python, SQL'
+
+
+def test_export_excel_in_chunks(frames, tmp_path):
+    pytest.importorskip('openpyxl')
+    jobs_df, skills_df = frames
+
+    path, rows_written = export_rows('xlsx', jobs_df, skills_df, ['title', 'scraped_at'], text_loader=fake_texts,
+                                     export_dir=str(tmp_path), chunk_rows=3)
+
+    exported = pd.read_excel(path)
+    assert rows_written == 7
+    assert exported.columns.tolist() == ['title', 'scraped_at', 'skills', 'description']
+    assert exported.loc[0, 'scraped_at'] == pd.Timestamp('2024-03-01 10:00')
+    assert pd.isna(exported.loc[6, 'scraped_at'])
+    assert exported.loc[6, 'description'] == 'Descripción de job-6'
@@ -0,0 +1,230 @@
+import pandas as pd
+import pytest
+from database.dashboard_loader import (
+    build_job_frames, build_trends_frame, choose_series_bucket, load_job_texts, load_trend_series, merge_job_frames,
+    refresh_dashboard_frames, skills_by_job,
+)
+
+
+@pytest.fixture
+def pages():
+    return [
+        [
+            {'id': 'a', 'job_id': 'ext-a', 'title': 'Data Engineer', 'country': 'Colombia', 'sector': 'Fintech', 'posted_date': '2024-03-01',
+             'scraped_at': '2024-03-02T10:00:00+00:00', 'is_active': True,
+             'skills': [{'skill_name': 'Python', 'skill_category': 'Lenguaje'}, {'skill_name': 'SQL', 'skill_category': 'Datos'}]},
+            {'id': 'b', 'job_id': 'ext-b', 'title': 'Backend Developer', 'country': None, 'sector': 'Fintech', 'posted_date': None,
+             'scraped_at': '2024-03-05T10:00:00+00:00', 'is_active': None, 'skills': []},
+        ],
+        [
+            {'id': 'c', 'job_id': 'ext-c', 'title': 'Data Analyst', 'country': 'México', 'sector': None, 'posted_date': '2024-03-04',
+             'scraped_at': '2024-03-04T10:00:00+00:00', 'is_active': False,
+             'skills': [{'skill_name': 'SQL', 'skill_category': 'Datos'}]},
+        ],
+    ]
+
+
+class FakeClient:
+    def __init__(self, rows, trends=None):
+        self.rows = rows
+        self.trends = trends or []
+        self.requested = []
+        self.scraped_since = []
+
+    def iter_jobs(self, columns, page_size, scraped_since=None):
+        self.scraped_since.append(scraped_since)
+        yield [row for row in self.rows if scraped_since is None or pd.Timestamp(row['scraped_at']) >= pd.Timestamp(scraped_since)]
+
+    def get_latest_trends(self, page_size=1000):
+        return self.trends
+
+    def get_job_fields(self, job_ids, columns):
+        self.requested.append(list(job_ids))
+        return [row for row in self.rows if row['id'] in job_ids]
+
+    def get_trend_series_bucketed(self, metric_name, start_date, end_date, bucket, metric_values=None, sector=None, country=None):
+        self.requested.append((metric_name, start_date, end_date, bucket, metric_values, country))
+        return self.trends
+
+
+# --- Tests para build_job_frames ---
+def test_build_job_frames_keeps_skills_in_separate_frame(pages):
+    jobs_df, skills_df = build_job_frames(pages)
+
+    assert jobs_df['id'].tolist() == ['b', 'c', 'a']  # ordenadas por scraped_at descendente
+    assert 'skills' not in jobs_df.columns
+    assert skills_df[['job_id', 'skill_name']].values.tolist() == [['a', 'Python'], ['a', 'SQL'], ['c', 'SQL']]
+    assert skills_df['skill_name'].dtype == 'category'
+
+
+def test_build_job_frames_types_and_unknown_values(pages):
+    jobs_df, _ = build_job_frames(pages)
+    row_b = jobs_df.set_index('id').loc['b']
+
+    assert jobs_df['country'].dtype == 'category'
+    assert jobs_df['sector'].dtype == 'category'
+    assert row_b['country'] == 'Desconocido'
+    assert row_b['source_platform'] == 'Desconocido'
+    assert pd.isna(row_b['posted_date'])
+    assert jobs_df['is_active'].tolist() == [False, False, True]
+    assert jobs_df['scraped_at'].dt.tz is None
+
+
+def test_build_job_frames_without_pages():
+    jobs_df, skills_df = build_job_frames([])
+
+    assert jobs_df.empty and skills_df.empty
+    assert 'country' in jobs_df.columns
+
+
+def test_skills_by_job_joins_names(pages):
+    _, skills_df = build_job_frames(pages)
+
+    joined = skills_by_job(skills_df, ['a', 'b'])
+    assert joined.to_dict() == {'a': 'Python, SQL'}
+
+
+def test_skills_by_job_from_categorical_names_can_be_filled(pages):
+    _, skills_df = build_job_frames(pages)
+    assert skills_df['skill_name'].dtype == 'category'
+
+    joined = skills_by_job(skills_df)
+    filled = pd.Series(['a', 'b', 'c']).map(joined).fillna('')
+
+    assert joined.dtype == object
+    assert filled.tolist() == ['Python, SQL', '', 'SQL']
+
+
+# --- Tests para merge_job_frames y refresh_dashboard_frames ---
+def test_merge_job_frames_replaces_by_job_key(pages):
+    jobs_df, skills_df = build_job_frames(pages)
+    rescraped = [{'id': 'a', 'job_id': 'ext-a', 'title': 'Data Engineer', 'country': 'Perú', 'scraped_at': '2024-03-06T10:00:00+00:00',
+                  'skills': [{'skill_name': 'Spark', 'skill_category': 'Datos'}]}]
+    new_jobs_df, new_skills_df = build_job_frames([rescraped])
+
+    merged_jobs, merged_skills, replaced = merge_job_frames(jobs_df, skills_df, new_jobs_df, new_skills_df)
+
+    assert replaced['id'].tolist() == ['a']
+    assert merged_jobs['id'].tolist() == ['a', 'b', 'c']
+    assert merged_jobs.set_index('id').loc['a', 'country'] == 'Perú'
+    assert merged_jobs['country'].dtype == 'category'
+    assert sorted(merged_skills.loc[merged_skills['job_id'] == 'a', 'skill_name'].tolist()) == ['Spark']
+
+
+def test_refresh_dashboard_frames_reads_from_high_water_mark(pages):
+    jobs_df, skills_df = build_job_frames(pages[:1])
+    new_row = {'id': 'c', 'job_id': 'ext-c', 'title': 'Data Analyst', 'country': 'México',
+               'scraped_at': '2024-03-07T10:00:00+00:00', 'skills': []}
+    client = FakeClient(pages[0] + [new_row], trends=[{'date': '2024-03-07', 'metric_name': 'total_jobs', 'count': 3}])
+
+    jobs_df, skills_df, trends_df, new_jobs_df, replaced = refresh_dashboard_frames(client, jobs_df, skills_df)
+
+    assert client.scraped_since == ['2024-03-05T10:00:00+00:00']
+    # La vacante del instante límite se vuelve a leer y reemplaza a la cacheada
+    assert new_jobs_df['id'].tolist() == ['c', 'b']
+    assert replaced['id'].tolist() == ['b']
+    assert jobs_df['id'].tolist() == ['c', 'b', 'a']
+    assert len(trends_df) == 1
+
+
+# --- Tests para build_trends_frame ---
+def test_build_trends_frame_fills_and_types():
+    trends_df = build_trends_frame([
+        {'date': '2024-03-01', 'metric_name': 'most_demanded_skill', 'metric_value': 'Python', 'count': '5', 'value': 5, 'country': None},
+        {'date': '2024-03-02', 'metric_name': 'growing_skill', 'metric_value': 'SQL', 'count': None, 'change_rate': '12.5'},
+    ])
+
+    assert trends_df['metric_value'].tolist() == ['SQL', 'Python']
+    assert trends_df['count'].tolist() == [0, 5]
+    assert trends_df['country'].tolist() == ['Desconocido', 'Desconocido']
+    assert trends_df['change_rate'].iloc[0] == 12.5
+
+
+# --- Tests para load_job_texts ---
+def test_load_job_texts_only_fetches_missing_ids():
+    client = FakeClient([
+        {'id': 'a', 'description': 'Desc A', 'requirements': None},
+        {'id': 'b', 'description': 'Desc B', 'requirements': 'Req B'},
+    ])
+
+    texts = load_job_texts(client, ['a'])
+    texts = load_job_texts(client, ['a', 'b'], texts)
+
+    assert client.requested == [['a'], ['b']]
+    assert texts.loc['a', 'requirements'] == ''
+    assert texts.loc['b', 'description'] == 'Desc B'
+
+
+# --- Tests para choose_series_bucket y load_trend_series ---
+def test_choose_series_bucket_keeps_points_under_limit():
+    assert choose_series_bucket('2024-01-01', '2024-03-31', series_count=5, max_points=2000) == 'day'
+    assert choose_series_bucket('2020-01-01', '2024-12-31', series_count=5, max_points=2000) == 'week'
+    assert choose_series_bucket('2000-01-01', '2024-12-31', series_count=10, max_points=2000) == 'month'
+    # Aunque no quepa ni por mes, se usa la granularidad más gruesa disponible
+    assert choose_series_bucket('1900-01-01', '2024-12-31', series_count=10, max_points=100) == 'month'
+
+
+def test_load_trend_series_requests_only_the_slice():
+    client = FakeClient([], trends=[
+        {'date': '2024-02-01', 'metric_value': 'SQL', 'count': '4.5', 'value': None, 'change_rate': '10', 'points': 29},
+        {'date': '2024-01-01', 'metric_value': 'Python', 'count': 7, 'value': 7, 'change_rate': None, 'points': 31},
+    ])
+
+    series_df, bucket = load_trend_series(
+        client, 'most_demanded_skill', pd.Timestamp('2020-01-01'), pd.Timestamp('2024-12-31'),
+        metric_values=['Python', 'SQL'], country='Colombia', max_points=100,
+    )
+
+    assert bucket == 'month'
+    assert client.requested == [('most_demanded_skill', '2020-01-01', '2024-12-31', 'month', ['Python', 'SQL'], 'Colombia')]
+    assert series_df['metric_value'].tolist() == ['Python', 'SQL']
+    assert series_df['count'].tolist() == [7.0, 4.5]
+    assert series_df['date'].iloc[0] == pd.Timestamp('2024-01-01')
+
+
+class FakeTrendsQuery:
+    """Imita el constructor de consultas de PostgREST sobre 'trends' (eq, order, limit y range)."""
+    def __init__(self, rows, calls):
+        self.rows, self.calls = rows, calls
+        self.filters, self.desc, self.window = {}, False, None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by, self.desc = column, desc
+        return self
+
+    def limit(self, count):
+        self.window = (0, count - 1)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        self.calls.append(self.window)
+        rows = [row for row in self.rows if all(row[column] == value for column, value in self.filters.items())]
+        rows = sorted(rows, key=lambda row: row[self.order_by], reverse=self.desc)
+        start, end = self.window
+        return type('Response', (), {'data': rows[start:end + 1]})()
+
+
+def test_get_latest_trends_pages_through_the_latest_date():
+    from database.supabase_client import SupabaseClient
+
+    rows = [{'id': f'{i:03d}', 'date': '2024-03-07', 'metric_name': 'most_demanded_skill'} for i in range(5)]
+    rows.append({'id': '999', 'date': '2024-03-06', 'metric_name': 'most_demanded_skill'})
+    calls = []
+    client = SupabaseClient.__new__(SupabaseClient)
+    client.supabase = type('Supabase', (), {'table': lambda self, name: FakeTrendsQuery(rows, calls)})()
+
+    latest = client.get_latest_trends(page_size=2)
+
+    assert [row['id'] for row in latest] == ['000', '001', '002', '003', '004']
+    assert calls == [(0, 0), (0, 1), (2, 3), (4, 5)]  # fecha más reciente y tres páginas
@@ -0,0 +1,55 @@
+import os
+import pytest
+
+testing = pytest.importorskip('streamlit.testing.v1')
+
+import database.supabase_client
+from analysis.aggregate_cube import AggregateCube
+from config.paths import PROJECT_ROOT
+from runner import job_runner
+
+ROWS = [
+    {'id': f"job-{i}", 'job_id': f"ext-{i}", 'title': 'Data Engineer', 'company_name': f"Empresa {i % 3}",
+     'country': country, 'sector': 'Fintech', 'seniority_level': seniority, 'source_platform': 'LinkedIn',
+     'posted_date': '2024-03-01', 'scraped_at': '2024-03-02T10:00:00+00:00', 'is_active': True,
+     'skills': [{'skill_name': 'Python', 'skill_category': 'Lenguaje'}]}
+    for i, (country, seniority) in enumerate([('Colombia', 'Senior'), ('México', 'Junior'), ('Chile', 'Senior')])
+]
+
+
+class FakeSupabaseClient:
+    """Cliente en memoria con lo que lee el dashboard al cargar."""
+    def iter_jobs(self, columns="*", page_size=1000, scraped_since=None, **kwargs):
+        yield [dict(row) for row in ROWS]
+
+    def get_latest_trends(self, page_size=1000):
+        return []
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(database.supabase_client, 'SupabaseClient', FakeSupabaseClient)
+    # Sin cubo guardado en disco ni ejecutor en segundo plano: el test no escribe fuera de tmp_path
+    monkeypatch.setattr(AggregateCube, 'load', classmethod(lambda cls, cube_dir=None: None))
+    monkeypatch.setattr(AggregateCube, 'save', lambda self, cube_dir=None: None)
+    monkeypatch.setattr(job_runner.JobQueue.__init__, '__defaults__', (str(tmp_path / 'runs.sqlite3'), str(tmp_path / 'logs')))
+    monkeypatch.setattr(job_runner.JobRunner, 'start', lambda self: None)
+    return testing.AppTest.from_file(os.path.join(PROJECT_ROOT, 'dashboard.py'), default_timeout=60)
+
+
+@pytest.mark.parametrize('view', ['country', 'seniority'])
+def test_distribution_view_renders_its_charts(app, view):
+    app.run()
+    app.radio(key='active_dashboard_view').set_value(view).run()
+
+    assert not app.exception
+    assert len(app.get('plotly_chart')) == 2
+
+
+def test_raw_data_view_shows_joined_skills(app):
+    app.run()
+    app.radio(key='active_dashboard_view').set_value('raw_data').run()
+
+    assert not app.exception and not app.error
+    raw_table = app.dataframe[0].value
+    assert raw_table['skills'].tolist() == ['Python'] * len(ROWS)
@@ -0,0 +1,83 @@
+import datetime
+import pandas as pd
+import pytest
+from analysis.engines import PandasEngine, create_engine, write_snapshot
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def frames():
+    jobs_df = pd.DataFrame([
+        {'id': 'j1', 'title': 'Senior Data Scientist', 'sector': 'Fintech', 'country': 'Colombia', 'date': '2024-03-01', 'scraped_at': '2024-03-01T10:00:00+00:00'},
+        {'id': 'j2', 'title': 'Desarrollador Backend', 'sector': None, 'country': 'Colombia', 'date': '2024-03-01', 'scraped_at': '2024-03-06T09:30:00.5+00:00'},
+        {'id': 'j3', 'title': None, 'sector': 'Edtech', 'country': None, 'date': '2024-03-02', 'scraped_at': '2024-03-02T10:00:00+00:00'},
+        {'id': 'j4', 'title': 'Data Analyst', 'sector': 'Fintech', 'country': 'México', 'date': '2024-03-05', 'scraped_at': '2024-03-05T10:00:00+00:00'},
+    ])
+    skills_df = pd.DataFrame([
+        ('j1', 'Python'), ('j1', 'SQL'), ('j1', 'Python'), ('j2', 'Python'), ('j2', None),
+        ('j3', 'Excel'), ('j4', 'SQL'), ('j4', 'Power BI'),
+    ], columns=['job_id', 'skill_name'])
+    return jobs_df, skills_df
+
+
+def in_range(frames, start_date=None, end_date=None, dates=None, scraped_since=None):
+    """Imita los filtros que aplica Supabase para el motor pandas."""
+    jobs_df, skills_df = frames
+    start_date_str = start_date.isoformat() if start_date else '0000'
+    end_date_str = end_date.isoformat() if end_date else '9999'
+    jobs = jobs_df[(jobs_df['date'] >= start_date_str) & (jobs_df['date'] <= end_date_str)]
+    if dates is not None:
+        jobs = jobs[jobs['date'].isin(dates)]
+    if scraped_since:
+        jobs = jobs[pd.to_datetime(jobs['scraped_at'], utc=True, format='ISO8601') >= pd.Timestamp(scraped_since)]
+    return jobs, skills_df[skills_df['job_id'].isin(jobs['id'])]
+
+
+def sort_rows(frame):
+    return frame.sort_values(list(frame.columns)).reset_index(drop=True)
+
+
+# --- Tests para la equivalencia de motores ---
+@pytest.mark.parametrize('start_date, end_date', [
+    (None, None),
+    (datetime.date(2024, 3, 2), datetime.date(2024, 3, 5)),
+])
+def test_duckdb_rollups_match_pandas(frames, tmp_path, start_date, end_date):
+    write_snapshot(*frames, snapshot_dir=str(tmp_path))
+    pandas_engine = PandasEngine(lambda **filters: in_range(frames, **filters))
+    duckdb_engine = create_engine('duckdb', load_frames=None, snapshot_dir=str(tmp_path))
+
+    pandas_rollups = pandas_engine.daily_rollups(start_date, end_date)
+    duckdb_rollups = duckdb_engine.daily_rollups(start_date, end_date)
+    for dimension, expected in pandas_rollups.items():
+        pd.testing.assert_frame_equal(sort_rows(duckdb_rollups[dimension]), sort_rows(expected), check_dtype=False)
+
+
+@pytest.mark.parametrize('scraped_since', [None, '2024-03-05T10:00:00+00:00'])
+def test_duckdb_scraped_dates_and_day_rollups_match_pandas(frames, tmp_path, scraped_since):
+    write_snapshot(*frames, snapshot_dir=str(tmp_path))
+    pandas_engine = PandasEngine(lambda **filters: in_range(frames, **filters))
+    duckdb_engine = create_engine('duckdb', load_frames=None, snapshot_dir=str(tmp_path))
+
+    dates, scraped_through = duckdb_engine.scraped_dates(scraped_since)
+    pandas_dates, pandas_scraped_through = pandas_engine.scraped_dates(scraped_since)
+    assert dates == pandas_dates
+    assert pd.Timestamp(scraped_through) == pd.Timestamp(pandas_scraped_through) == pd.Timestamp('2024-03-06T09:30:00.5+00:00')
+    pandas_rollups = pandas_engine.daily_rollups(dates=dates)
+    duckdb_rollups = duckdb_engine.daily_rollups(dates=dates)
+    for dimension, expected in pandas_rollups.items():
+        pd.testing.assert_frame_equal(sort_rows(duckdb_rollups[dimension]), sort_rows(expected), check_dtype=False)
+
+
+def test_duckdb_job_skill_links_respect_range(frames, tmp_path):
+    write_snapshot(*frames, snapshot_dir=str(tmp_path))
+    links = create_engine('duckdb', load_frames=None, snapshot_dir=str(tmp_path)).job_skill_links(
+        datetime.date(2024, 3, 5), datetime.date(2024, 3, 5)
+    )
+    assert sorted(links['skill_name']) == ['Power BI', 'SQL']
+
+
+def test_unknown_engine_raises():
+    with pytest.raises(ValueError):
+        create_engine('spark', load_frames=None)
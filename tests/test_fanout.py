@@ -0,0 +1,153 @@
+import time
+import datetime
+import threading
+import pytest
+from runner.fanout import ANALYSIS_PIPELINE, FanoutScheduler, LeaseStore, country_pipeline, plan_country_slots
+from runner.orchestrator import PipelineLedger, Step
+from runner.job_runner import SUCCEEDED
+
+DAY = datetime.date(2024, 3, 1)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return PipelineLedger(db_path=str(tmp_path / 'pipeline.sqlite3'))
+
+
+def at(hour, minute=0, day=DAY):
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+# --- Tests para plan_country_slots ---
+def test_slots_spread_across_window_longest_first():
+    slots = plan_country_slots(['Chile', 'Perú', 'México'], at(1), at(7), {'Chile': 3600, 'Perú': 1800, 'México': 5400})
+
+    assert [country for _, country in slots] == ['México', 'Chile', 'Perú']
+    # 3 h de scraping en una ventana de 6 h: 1 h de margen tras cada país
+    assert [slot for slot, _ in slots] == [at(1), at(3, 30), at(5, 30)]
+
+
+def test_slots_are_compressed_when_window_is_too_short():
+    slots = plan_country_slots(['Chile', 'Perú'], at(1), at(2), {'Chile': 3600, 'Perú': 3600})
+
+    assert [slot for slot, _ in slots] == [at(1), at(1, 30)]
+
+
+# --- Tests para LeaseStore ---
+def test_lease_is_exclusive_until_released_or_expired(tmp_path):
+    leases = LeaseStore(str(tmp_path / 'pipeline.sqlite3'))
+
+    owner = leases.acquire('country:Chile', ttl_seconds=60)
+    assert owner is not None
+    assert leases.acquire('country:Chile', ttl_seconds=60) is None
+    assert leases.acquire('country:Perú', ttl_seconds=60) is not None
+
+    leases.release('country:Chile', owner)
+    assert leases.acquire('country:Chile', ttl_seconds=-1) is not None
+    # Un lease vencido (su dueño murió sin liberarlo) se puede volver a tomar
+    assert leases.acquire('country:Chile', ttl_seconds=60) is not None
+
+
+# --- Tests para FanoutScheduler ---
+def make_scheduler(ledger, calls, countries=('Chile', 'Perú'), **kwargs):
+    def country_steps(country):
+        return [Step(f"scrape_{country}", func=lambda: calls.append(country), pool='linkedin')]
+
+    def final_steps(day):
+        return [Step('trends', func=lambda: calls.append(ANALYSIS_PIPELINE))]
+
+    return FanoutScheduler(countries, ['linkedin'], '01:00', '07:00', ledger=ledger,
+                           build_country_steps=country_steps, build_final_steps=final_steps, **kwargs)
+
+
+def test_tick_launches_due_countries_once_and_analysis_after_window(ledger):
+    calls = []
+    scheduler = make_scheduler(ledger, calls, default_duration=3600)
+
+    assert scheduler.tick(at(0, 30)) == []
+    assert scheduler.tick(at(1)) == [country_pipeline('Chile')]
+    scheduler.join()
+    assert scheduler.tick(at(1, 5)) == []
+    assert scheduler.tick(at(4, 30)) == [country_pipeline('Perú')]
+    scheduler.join()
+    assert scheduler.tick(at(7)) == [ANALYSIS_PIPELINE]
+    scheduler.join()
+
+    assert calls == ['Chile', 'Perú', ANALYSIS_PIPELINE]
+    assert ledger.list_runs()[0]['pipeline'] == ANALYSIS_PIPELINE
+
+
+def test_restarted_scheduler_does_not_repeat_todays_runs(ledger):
+    # Ejecución registrada por un scheduler anterior, dentro de la ventana actual
+    ledger.finish_run(ledger.start_run(country_pipeline('Chile'), []), SUCCEEDED, 60)
+    calls = []
+    now = datetime.datetime.now()
+    scheduler = make_scheduler(ledger, calls, countries=('Chile',))
+    scheduler.window_start = (now - datetime.timedelta(minutes=1)).time()
+    scheduler.window_end = (now + datetime.timedelta(hours=1)).time()
+
+    assert scheduler.tick(now + datetime.timedelta(seconds=1)) == []
+    assert calls == []
+
+
+def test_running_country_holds_lease(ledger):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_shard():
+        started.set()
+        release.wait(5)
+
+    scheduler = FanoutScheduler(['Chile'], ['linkedin'], '01:00', '07:00', ledger=ledger,
+                                build_country_steps=lambda country: [Step('scrape', func=slow_shard)])
+    scheduler.tick(at(1))
+    started.wait(5)
+
+    assert scheduler.leases.acquire(country_pipeline('Chile'), ttl_seconds=60) is None
+    release.set()
+    scheduler.join()
+    assert scheduler.leases.acquire(country_pipeline('Chile'), ttl_seconds=60) is not None
+
+
+def test_platform_limit_is_shared_across_countries(ledger):
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def shard():
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+
+    scheduler = FanoutScheduler(['Chile', 'Perú', 'México'], ['linkedin'], '01:00', '07:00', ledger=ledger,
+                                platform_limits={'linkedin': 1}, default_duration=0,
+                                build_country_steps=lambda country: [Step(f'scrape_{country}', func=shard, pool='linkedin')])
+    scheduler.tick(at(6, 59))
+    scheduler.join()
+
+    assert active['max'] == 1
+    assert all(run['status'] == SUCCEEDED for run in ledger.list_runs())
+
+
+def test_slots_adapt_to_measured_durations(ledger):
+    for country, duration in (('Chile', 600), ('Perú', 7200)):
+        run_id = ledger.start_run(country_pipeline(country), [])
+        ledger.finish_run(run_id, SUCCEEDED, duration)
+    scheduler = make_scheduler(ledger, [], default_duration=3600)
+
+    assert [country for _, country in scheduler.plan(DAY)] == ['Perú', 'Chile']
+    assert scheduler.estimated_duration('Chile') == 600
+
+
+def test_analysis_waits_for_running_countries(ledger):
+    calls = []
+    scheduler = make_scheduler(ledger, calls)
+    owner = scheduler.leases.acquire(country_pipeline('Perú'), ttl_seconds=60)
+
+    assert scheduler.tick(at(7)) == []
+    scheduler.leases.release(country_pipeline('Perú'), owner)
+    assert scheduler.tick(at(7, 1)) == [ANALYSIS_PIPELINE]
+    scheduler.join()
+    assert calls == [ANALYSIS_PIPELINE]
@@ -0,0 +1,47 @@
+import datetime
+import pandas as pd
+import pytest
+from analysis.growth_engine import GrowthEngine
+
+FIRST_DAY = datetime.date(2024, 3, 1)
+
+
+def day(offset):
+    return FIRST_DAY + datetime.timedelta(days=offset)
+
+
+@pytest.fixture
+def engine():
+    # Python: 1 vacante diaria los 20 días; SQL: 3 vacantes solo el día 19; Java: 2 vacantes el día 0
+    rows = [{'date': day(i), 'skill_name': 'Python', 'count': 1} for i in range(20)]
+    rows += [{'date': day(19), 'skill_name': 'SQL', 'count': 3}, {'date': day(0), 'skill_name': 'Java', 'count': 2}]
+    return GrowthEngine.from_rollups(pd.DataFrame(rows), 'skill_name', FIRST_DAY, day(19))
+
+
+# --- Tests para las ventanas ---
+def test_window_counts_with_offset(engine):
+    assert list(engine.keys) == ['Java', 'Python', 'SQL']
+    assert list(engine.window_counts(day(19), 7)) == [0, 7, 3]
+    assert list(engine.window_counts(day(19), 7, offset_days=7)) == [0, 7, 0]
+    # La ventana anterior que empieza antes del primer día solo suma los días disponibles
+    assert list(engine.window_counts(day(19), 10, offset_days=10)) == [2, 10, 0]
+
+
+def test_rolling_counts_match_window_counts(engine):
+    rolling = engine.rolling_counts(5, offset_days=3)
+    for i in range(engine.days_count):
+        assert list(rolling[i]) == list(engine.window_counts(day(i), 5, offset_days=3))
+
+
+def test_out_of_range_day_raises(engine):
+    with pytest.raises(ValueError):
+        engine.window_counts(day(20), 7)
+
+
+# --- Tests para el crecimiento ---
+def test_growth_table_has_one_column_set_per_window(engine):
+    table = engine.growth_table(day(19), windows=(7, 10)).set_index('skill_name')
+    assert table.loc['SQL', 'current_count_7d'] == 3
+    assert table.loc['SQL', 'growth_rate_7d'] == 300.0
+    assert table.loc['Java', 'change_10d'] == -2
+    assert table.loc['Python', 'growth_rate_10d'] == 0.0
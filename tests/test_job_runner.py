@@ -0,0 +1,93 @@
+import sys
+import time
+import pytest
+from runner.job_runner import JobQueue, JobRunner, tail_log, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(db_path=str(tmp_path / 'runs.sqlite3'), log_dir=str(tmp_path / 'logs'))
+
+
+def python_command(code):
+    return [sys.executable, '-c', code]
+
+
+# --- Tests para JobQueue ---
+def test_submit_deduplicates_active_runs(queue):
+    first, created_first = queue.submit('scrape', python_command('pass'), dedup_key='scrape')
+    second, created_second = queue.submit('scrape', python_command('pass'), dedup_key='scrape')
+    other, created_other = queue.submit('analyze', python_command('pass'), dedup_key='analyze')
+
+    assert created_first and not created_second and created_other
+    assert second['id'] == first['id']
+    assert first['status'] == QUEUED
+    assert [run['id'] for run in queue.list_runs()] == [other['id'], first['id']]
+
+
+def test_claim_next_is_fifo_and_marks_running(queue):
+    first, _ = queue.submit('scrape', python_command('pass'))
+    second, _ = queue.submit('analyze', python_command('pass'))
+
+    claimed = queue.claim_next()
+
+    assert claimed['id'] == first['id'] and claimed['status'] == RUNNING
+    assert queue.claim_next()['id'] == second['id']
+    assert queue.claim_next() is None
+
+
+def test_finished_run_allows_new_submission(queue):
+    run, _ = queue.submit('scrape', python_command('pass'), dedup_key='scrape')
+    queue.claim_next()
+    queue.finish(run['id'], 0)
+
+    again, created = queue.submit('scrape', python_command('pass'), dedup_key='scrape')
+
+    assert created and again['id'] != run['id']
+    assert queue.get(run['id'])['status'] == SUCCEEDED
+
+
+def test_recover_stale_fails_runs_without_process(queue):
+    run, _ = queue.submit('scrape', python_command('pass'))
+    queue.claim_next()
+
+    assert queue.recover_stale() == 1
+    assert queue.get(run['id'])['status'] == FAILED
+
+
+# --- Tests para JobRunner ---
+def test_runner_streams_output_to_log_and_records_status(queue):
+    ok, _ = queue.submit('scrape', python_command("print('vacante guardada'); import sys; print('aviso', file=sys.stderr)"))
+    bad, _ = queue.submit('analyze', python_command('raise SystemExit(3)'))
+
+    assert JobRunner(queue).run_pending() == 2
+
+    ok_run, bad_run = queue.get(ok['id']), queue.get(bad['id'])
+    assert ok_run['status'] == SUCCEEDED and ok_run['returncode'] == 0 and ok_run['pid']
+    assert bad_run['status'] == FAILED and bad_run['returncode'] == 3
+    assert 'vacante guardada' in tail_log(ok_run['log_path']) and 'aviso' in tail_log(ok_run['log_path'])
+
+
+def test_background_runner_executes_queued_runs(queue):
+    runner = JobRunner(queue, poll_interval=0.05).start()
+    try:
+        run, _ = queue.submit('scrape', python_command('pass'))
+        for _ in range(200):
+            if queue.get(run['id'])['status'] == SUCCEEDED:
+                break
+            time.sleep(0.05)
+    finally:
+        runner.stop(timeout=5)
+
+    assert queue.get(run['id'])['status'] == SUCCEEDED
+
+
+def test_tail_log_returns_last_complete_lines(tmp_path):
+    log_path = tmp_path / 'run.log'
+    log_path.write_text(''.join(f"línea {i}\n" for i in range(1000)), encoding='utf-8')
+
+    tail = tail_log(str(log_path), max_bytes=100)
+
+    assert tail.endswith('línea 999\n')
+    assert tail.startswith('línea ')
+    assert tail_log(str(tmp_path / 'missing.log')) == ''
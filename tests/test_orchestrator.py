@@ -0,0 +1,163 @@
+import sys
+import time
+import threading
+import pytest
+import main
+from database.spool import WriteSpool
+from runner import orchestrator
+from runner.fanout import LeaseStore, SPOOL_REPLAY_LEASE
+from runner.orchestrator import Orchestrator, PipelineLedger, Step, SKIPPED, build_daily_pipeline, flush_write_spool
+from runner.job_runner import SUCCEEDED, FAILED
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return PipelineLedger(db_path=str(tmp_path / 'pipeline.sqlite3'))
+
+
+def make_orchestrator(steps, ledger, tmp_path, **kwargs):
+    return Orchestrator(steps, ledger=ledger, log_dir=str(tmp_path / 'logs'), **kwargs)
+
+
+# --- Tests para Orchestrator ---
+def test_steps_run_after_their_dependencies(ledger, tmp_path):
+    order = []
+    steps = [
+        Step('trends', func=lambda: order.append('trends'), depends_on=['rollups']),
+        Step('rollups', func=lambda: order.append('rollups'), depends_on=['etl_flush']),
+        Step('etl_flush', func=lambda: order.append('etl_flush')),
+    ]
+
+    statuses = make_orchestrator(steps, ledger, tmp_path).run()
+
+    assert order == ['etl_flush', 'rollups', 'trends']
+    assert set(statuses.values()) == {SUCCEEDED}
+    run = ledger.list_runs()[0]
+    assert run['status'] == SUCCEEDED and run['duration_s'] is not None
+    assert all(step['duration_s'] is not None and step['attempts'] == 1 for step in ledger.list_steps(run['id']))
+
+
+def test_pool_limit_caps_parallel_shards(ledger, tmp_path):
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def shard():
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+
+    steps = [Step(f'scrape_{i}', func=shard, pool='scrape') for i in range(6)]
+
+    make_orchestrator(steps, ledger, tmp_path, max_workers=6, pool_limits={'scrape': 2}).run()
+
+    assert active['max'] == 2
+
+
+def test_retries_until_success(ledger, tmp_path):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("Supabase no responde")
+
+    statuses = make_orchestrator([Step('etl_flush', func=flaky, retries=2, retry_delay=0)], ledger, tmp_path).run()
+
+    assert statuses['etl_flush'] == SUCCEEDED
+    assert ledger.list_steps(ledger.list_runs()[0]['id'])[0]['attempts'] == 3
+
+
+def test_failed_dependency_skips_dependents_unless_allowed(ledger, tmp_path):
+    def fail():
+        raise RuntimeError("scraping bloqueado")
+
+    steps = [
+        Step('scrape_a', func=fail),
+        Step('scrape_b', func=lambda: None),
+        Step('etl_flush', func=lambda: None, depends_on=['scrape_a', 'scrape_b'], allow_failed_deps=True),
+        Step('report', func=lambda: None, depends_on=['scrape_a']),
+    ]
+
+    statuses = make_orchestrator(steps, ledger, tmp_path).run()
+
+    assert statuses == {'scrape_a': FAILED, 'scrape_b': SUCCEEDED, 'etl_flush': SUCCEEDED, 'report': SKIPPED}
+    run = ledger.list_runs()[0]
+    assert run['status'] == FAILED
+    errors = {step['step']: step['error'] for step in ledger.list_steps(run['id'])}
+    assert 'scraping bloqueado' in errors['scrape_a']
+
+
+def test_command_timeout_kills_process_and_retries(ledger, tmp_path):
+    step = Step('scrape_slow', command=[sys.executable, '-c', 'import time; time.sleep(30)'], timeout=0.5, retries=1, retry_delay=0)
+
+    start = time.perf_counter()
+    statuses = make_orchestrator([step], ledger, tmp_path).run()
+
+    assert statuses['scrape_slow'] == FAILED
+    assert time.perf_counter() - start < 10
+    recorded = ledger.list_steps(ledger.list_runs()[0]['id'])[0]
+    assert recorded['attempts'] == 2 and 'tiempo límite' in recorded['error']
+
+
+def test_command_output_goes_to_step_log(ledger, tmp_path):
+    step = Step('scrape_ok', command=[sys.executable, '-c', "print('vacantes guardadas: 12')"])
+
+    make_orchestrator([step], ledger, tmp_path).run()
+
+    log_path = ledger.list_steps(ledger.list_runs()[0]['id'])[0]['log_path']
+    with open(log_path, encoding='utf-8') as f:
+        assert 'vacantes guardadas: 12' in f.read()
+
+
+def test_invalid_graphs_are_rejected(ledger, tmp_path):
+    with pytest.raises(ValueError):
+        make_orchestrator([Step('a', func=lambda: None, depends_on=['missing'])], ledger, tmp_path)
+    with pytest.raises(ValueError):
+        make_orchestrator([
+            Step('a', func=lambda: None, depends_on=['b']),
+            Step('b', func=lambda: None, depends_on=['a']),
+        ], ledger, tmp_path)
+
+
+# --- Tests para build_daily_pipeline ---
+def test_daily_pipeline_shape():
+    steps = {step.name: step for step in build_daily_pipeline(['Colombia', 'Costa Rica'], ['linkedin', 'computrabajo'])}
+
+    shards = [name for name in steps if name.startswith('scrape_')]
+    assert len(shards) == 4 and 'scrape_linkedin_Costa_Rica' in shards
+    assert all('--no-cube' in steps[name].command for name in shards)
+    assert steps['scrape_linkedin_Colombia'].pool == 'linkedin' and steps['scrape_computrabajo_Colombia'].pool == 'computrabajo'
+    assert sorted(steps['etl_flush'].depends_on) == sorted(shards) and steps['etl_flush'].allow_failed_deps
+    assert steps['trends'].depends_on == ['rollups'] and steps['report'].depends_on == ['trends']
+
+
+# --- Tests para los pasos del pipeline diario ---
+def test_flush_write_spool_reports_leftovers_without_failing(tmp_path, monkeypatch):
+    spool_path = str(tmp_path / 'spool' / 'failed_writes.jsonl')
+    WriteSpool(spool_path).append('job', {'title': 'Data Engineer'}, "Supabase no responde")
+    monkeypatch.setattr(orchestrator, 'WRITE_SPOOL_PATH', spool_path)
+    monkeypatch.setattr(main, 'replay_write_spool', lambda: False)
+
+    assert flush_write_spool() == 1
+
+
+def test_rebuild_cube_step_fails_when_supabase_fails(monkeypatch):
+    def unavailable():
+        raise ConnectionError("Supabase no responde")
+    monkeypatch.setattr('database.supabase_client.SupabaseClient', unavailable)
+
+    with pytest.raises(ConnectionError):
+        orchestrator.rebuild_cube()
+
+
+def test_spool_replay_is_skipped_while_another_one_holds_the_lease(tmp_path):
+    leases = LeaseStore(str(tmp_path / 'pipeline.sqlite3'))
+    owner = leases.acquire(SPOOL_REPLAY_LEASE, ttl_seconds=60)
+
+    assert main.replay_write_spool(leases=leases) is False
+    # El lease sigue siendo del reproceso en curso
+    assert leases.held([SPOOL_REPLAY_LEASE]) == [SPOOL_REPLAY_LEASE]
+    leases.release(SPOOL_REPLAY_LEASE, owner)
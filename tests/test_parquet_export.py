@@ -0,0 +1,97 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+from database.parquet_export import ParquetExporter
+
+
+class FakeJobsClient:
+    """Imita SupabaseClient.iter_jobs: filtra por posted_date y pagina en memoria."""
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.start_dates = []
+
+    def iter_jobs(self, columns="*", start_date=None, end_date=None, page_size=1000):
+        self.start_dates.append(start_date)
+        rows = [job for job in self.jobs if not start_date or (job['posted_date'] and job['posted_date'] >= start_date)]
+        for i in range(0, len(rows), page_size):
+            yield rows[i:i + page_size]
+
+
+def make_job(index, posted_date, country, skills=('Python',)):
+    return {
+        'id': f"db-{index}", 'job_id': str(index), 'source_platform': 'LinkedIn', 'title': 'Data Engineer',
+        'company_name': 'ACME', 'location': None, 'country': country, 'seniority_level': 'Senior',
+        'sector': 'Fintech', 'description': 'Descripción', 'posted_date': posted_date,
+        'source_url': f"https://example.com/{index}", 'scraped_at': '2024-03-30T10:00:00+00:00', 'is_active': True,
+        'skills': [{'skill_name': skill, 'skill_category': 'Lenguajes'} for skill in skills],
+    }
+
+
+@pytest.fixture
+def client():
+    return FakeJobsClient([
+        make_job(1, '2024-02-03', 'Colombia', skills=('Python', 'SQL')),
+        make_job(2, '2024-03-05', 'México'),
+        make_job(3, None, None, skills=()),
+    ])
+
+
+def partitions(export_dir, table_name):
+    return sorted(os.path.relpath(root, os.path.join(export_dir, table_name))
+                  for root, _, files in os.walk(os.path.join(export_dir, table_name)) if files)
+
+
+# --- Tests para ParquetExporter ---
+def test_export_partitions_by_month_and_country(client, tmp_path):
+    stats = ParquetExporter(client, export_dir=str(tmp_path), page_size=2).export()
+
+    assert stats['jobs'] == 3 and stats['skills'] == 3
+    assert partitions(tmp_path, 'jobs') == [
+        os.path.join('posted_month=2024-02', 'country=Colombia'),
+        os.path.join('posted_month=2024-03', 'country=M%C3%A9xico'),  # valores URL-encoded en la ruta
+        os.path.join('posted_month=sin-fecha', 'country=Desconocido'),
+    ]
+    jobs = pd.read_parquet(tmp_path / 'jobs')
+    assert sorted(jobs['id']) == ['db-1', 'db-2', 'db-3']
+    skills = pd.read_parquet(tmp_path / 'skills')
+    assert sorted(skills['skill_name'].astype(str)) == ['Python', 'Python', 'SQL']
+
+
+def test_export_dictionary_encodes_low_cardinality_columns(client, tmp_path):
+    ParquetExporter(client, export_dir=str(tmp_path)).export()
+
+    schema = ds.dataset(tmp_path / 'jobs', format='parquet').schema
+    assert pa.types.is_dictionary(schema.field('company_name').type)
+    assert pa.types.is_dictionary(schema.field('seniority_level').type)
+    assert schema.field('description').type == pa.string()
+    assert schema.field('posted_date').type == pa.date32()
+
+
+def test_incremental_export_rewrites_only_recent_partitions(client, tmp_path):
+    exporter = ParquetExporter(client, export_dir=str(tmp_path))
+    exporter.export()
+    old_partition = tmp_path / 'jobs' / 'posted_month=2024-02' / 'country=Colombia' / 'part-0.parquet'
+    old_mtime = os.path.getmtime(old_partition)
+
+    client.jobs.append(make_job(4, '2024-03-20', 'México'))
+    stats = exporter.export()
+
+    # Se retoma desde el primer día del último mes exportado; febrero no se vuelve a leer ni a escribir
+    assert client.start_dates == [None, '2024-03-01']
+    assert stats['jobs'] == 2
+    assert os.path.getmtime(old_partition) == old_mtime
+    jobs = pd.read_parquet(tmp_path / 'jobs')
+    assert sorted(jobs['id']) == ['db-1', 'db-2', 'db-3', 'db-4']
+    assert exporter.load_state()['max_posted_date'] == '2024-03-20'
+
+
+def test_full_export_replaces_previous_export(client, tmp_path):
+    exporter = ParquetExporter(client, export_dir=str(tmp_path))
+    exporter.export()
+    client.jobs = client.jobs[1:]
+
+    exporter.export(full=True)
+
+    assert sorted(pd.read_parquet(tmp_path / 'jobs')['id']) == ['db-2', 'db-3']
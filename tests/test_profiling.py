@@ -0,0 +1,52 @@
+import json
+import time
+from analysis.profiling import PhaseProfiler, load_profile_log, stop_memory_tracking
+
+
+# --- Tests para PhaseProfiler ---
+def test_phases_record_time_memory_and_depth():
+    profiler = PhaseProfiler(track_memory=True)
+    try:
+        with profiler.phase("Carga de datos"):
+            with profiler.phase("Cubo de agregados"):
+                buffer = [bytearray(1024) for _ in range(1024)]
+            time.sleep(0.01)
+    finally:
+        stop_memory_tracking()
+
+    profile_df = profiler.to_frame()
+    assert profile_df['phase'].tolist() == ["Cubo de agregados", "Carga de datos"]
+    assert profile_df['depth'].tolist() == [1, 0]
+    assert profile_df.loc[1, 'seconds'] >= profile_df.loc[0, 'seconds']
+    assert profile_df.loc[0, 'memory_delta_mb'] > 0.5
+    assert len(buffer) == 1024
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = PhaseProfiler(enabled=False)
+    with profiler.phase("Filtros"):
+        pass
+
+    log_path = tmp_path / "timings.jsonl"
+    profiler.append_log(str(log_path))
+    assert profiler.to_frame().empty
+    assert not log_path.exists()
+
+
+def test_append_log_and_load(tmp_path):
+    log_path = str(tmp_path / "profiling" / "timings.jsonl")
+    for view in ("sector", "country"):
+        profiler = PhaseProfiler(track_memory=False)
+        with profiler.phase("Filtros"):
+            pass
+        profiler.append_log(log_path, {'view': view, 'jobs': 10})
+
+    with open(log_path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['view'] for entry in entries] == ["sector", "country"]
+    assert entries[0]['run_id'] != entries[1]['run_id']
+    assert entries[0]['memory_delta_mb'] is None
+
+    profile_log = load_profile_log(log_path)
+    assert profile_log['phase'].tolist() == ["Filtros", "Filtros"]
+    assert load_profile_log(str(tmp_path / "missing.jsonl")).empty
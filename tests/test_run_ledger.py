@@ -0,0 +1,95 @@
+import pytest
+from runner.run_ledger import RunLedger, format_run_detail, format_runs_report, run_totals, spider_metrics
+from runner.job_runner import SUCCEEDED, FAILED
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return RunLedger(db_path=str(tmp_path / 'run_history.sqlite3'))
+
+
+def scrapy_stats(items, requests=10, seconds=0.5, calls=4):
+    return {
+        'downloader/request_count': requests,
+        'downloader/response_count': requests - 1,
+        'downloader/response_bytes': 2 * 1024 ** 2,
+        'item_scraped_count': items,
+        'item_dropped_count': 1,
+        'log_count/ERROR': 2,
+        'spider_exceptions/KeyError': 1,
+        'pipeline/CleaningPipeline/seconds': 0.25,
+        'db_write/calls': calls,
+        'db_write/seconds': seconds,
+        'jobs/new': items,
+        'finish_reason': 'finished',
+    }
+
+
+# --- Tests para spider_metrics ---
+def test_spider_metrics_maps_scrapy_and_pipeline_stats():
+    metrics = spider_metrics(scrapy_stats(items=8))
+
+    assert metrics['requests'] == 10 and metrics['responses'] == 9 and metrics['items'] == 8
+    assert metrics['dropped'] == 1 and metrics['bytes'] == 2 * 1024 ** 2
+    assert metrics['errors'] == 2 and metrics['spider_exceptions'] == 1 and metrics['download_errors'] == 0
+    assert metrics['stage/CleaningPipeline'] == 0.25
+    assert metrics['db_write/seconds'] == 0.5 and metrics['jobs/new'] == 8
+    assert 'finish_reason' not in metrics
+
+
+# --- Tests para RunLedger ---
+def test_track_stores_params_status_and_metrics(ledger):
+    with ledger.track('scrape', {'spiders': ['linkedin'], 'max_jobs': 50}) as recorder:
+        recorder.record('linkedin', spider_metrics(scrapy_stats(items=8)))
+        with recorder.timed('rebuild_cube'):
+            pass
+
+    run = ledger.list_runs()[0]
+    assert run['kind'] == 'scrape' and run['status'] == SUCCEEDED and run['duration_s'] is not None
+    assert run['params'] == {'spiders': ['linkedin'], 'max_jobs': 50}
+    metrics = ledger.get_metrics(run['id'])
+    assert metrics['linkedin']['items'] == 8
+    assert 'rebuild_cube' in metrics['phase']
+
+
+def test_failed_run_keeps_error_and_partial_metrics(ledger):
+    with pytest.raises(ConnectionError):
+        with ledger.track('trends', {}) as recorder:
+            with recorder.timed('rollups'):
+                raise ConnectionError("Supabase no responde")
+
+    run = ledger.list_runs(kind='trends')[0]
+    assert run['status'] == FAILED and 'Supabase no responde' in run['error']
+    assert 'rollups' in ledger.get_metrics(run['id'])['phase']
+
+
+def test_totals_sum_spiders_and_average_db_latency():
+    totals = run_totals({
+        'linkedin': spider_metrics(scrapy_stats(items=8, seconds=0.5, calls=4)),
+        'computrabajo': spider_metrics(scrapy_stats(items=2, seconds=0.5, calls=6)),
+    })
+
+    assert totals['items'] == 10 and totals['requests'] == 20
+    assert totals['db_write_avg_ms'] == pytest.approx(100.0)
+
+
+# --- Tests para el reporte ---
+def test_report_shows_last_runs_and_trend(ledger):
+    for items in (10, 20, 40):
+        with ledger.track('scrape', {}) as recorder:
+            recorder.record('linkedin', spider_metrics(scrapy_stats(items=items)))
+    with ledger.track('trends', {}) as recorder:
+        recorder.record('trends', {'records': 5})
+
+    report = format_runs_report(ledger, last=2, kind='scrape')
+    lines = report.splitlines()
+
+    assert lines[0].startswith('ID') and len([line for line in lines if ' scrape ' in line]) == 2
+    assert 'trends' not in report
+    # Mediana de la anterior (20 ítems) frente a la última (40)
+    assert 'Ítems: 20 → 40 (+100.0%)' in report
+
+
+def test_report_and_detail_without_runs(ledger):
+    assert 'No hay ejecuciones' in format_runs_report(ledger)
+    assert 'No existe' in format_run_detail(ledger, 99)
@@ -0,0 +1,183 @@
+import pytest
+from types import SimpleNamespace
+from scrapers.pipelines import SupabasePipeline
+from database.skill_sync import SkillSynchronizer, diff_skill_sets
+from database.spool import WriteSpool
+
+
+class FakeSupabaseClient:
+    """Cliente en memoria que registra las llamadas hechas por SupabasePipeline."""
+    def __init__(self, companies=None, skills=None):
+        self.companies = companies or []
+        self.skills = skills or []
+        self.calls = []
+        self.fail_writes = False
+
+    def get_companies(self):
+        return list(self.companies)
+
+    def upsert_company(self, company_data):
+        self.calls.append(('upsert_company', company_data['name']))
+        return SimpleNamespace(data=[{'id': f"company-{company_data['name']}"}])
+
+    def upsert_jobs(self, jobs_data):
+        if self.fail_writes:
+            raise ConnectionError("Supabase no responde")
+        for job_data in jobs_data:
+            self.calls.append(('upsert_job', job_data['job_id']))
+        return SimpleNamespace(data=[
+            {'id': f"db-{job_data['job_id']}", 'job_id': job_data['job_id'], 'source_platform': job_data['source_platform']}
+            for job_data in jobs_data
+        ])
+
+    def touch_jobs(self, job_db_ids, scraped_at):
+        self.calls.append(('touch_jobs', sorted(job_db_ids)))
+        return len(job_db_ids)
+
+    def get_skills_for_jobs(self, job_ids):
+        self.calls.append(('get_skills_for_jobs', len(job_ids)))
+        return [row for row in self.skills if row['job_id'] in job_ids]
+
+    def insert_skills(self, skill_records):
+        self.calls.append(('insert_skills', sorted((r['job_id'], r['skill_name']) for r in skill_records)))
+        return SimpleNamespace(data=skill_records)
+
+    def delete_skills(self, skill_ids):
+        self.calls.append(('delete_skills', sorted(skill_ids)))
+        return len(skill_ids)
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipe = SupabasePipeline()
+    pipe.spool = WriteSpool(str(tmp_path / 'spool' / 'failed_writes.jsonl'))
+    pipe.client = FakeSupabaseClient(companies=[{
+        'id': 'company-confidencial', 'name': 'Empresa Confidencial',
+        'industry': 'No especificado', 'country': None, 'website': None,
+        'size': 'Mediana (51-200)', 'type': 'No especificado',
+    }])
+    pipe._warm_company_cache()
+    pipe.skill_sync = SkillSynchronizer(pipe.client, pipe.skill_extractor.categorize_skill, on_error=pipe._spool_skill_batch)
+    return pipe
+
+
+def make_item(job_id, company_name='Empresa Confidencial', **overrides):
+    item = {
+        'job_id': job_id, 'source_platform': 'LinkedIn', 'title': 'Data Engineer',
+        'company_name': company_name, 'company_industry': 'No especificado',
+        'company_size': 'Mediana (51-200)', 'company_type': 'No especificado',
+        'skills': [],
+    }
+    item.update(overrides)
+    return item
+
+
+def company_upserts(client):
+    return [call for call in client.calls if call[0] == 'upsert_company']
+
+
+# --- Tests para la caché de compañías ---
+def test_known_company_skips_upsert(pipeline):
+    pipeline.process_item(make_item('1'), spider=None)
+    pipeline.process_item(make_item('2'), spider=None)
+    assert company_upserts(pipeline.client) == []
+    assert pipeline.company_cache_hits == 2
+
+
+def test_new_company_is_upserted_once(pipeline):
+    pipeline.process_item(make_item('1', company_name='Mercado Libre'), spider=None)
+    pipeline.process_item(make_item('2', company_name='Mercado Libre'), spider=None)
+    assert company_upserts(pipeline.client) == [('upsert_company', 'Mercado Libre')]
+    assert pipeline.company_cache_misses == 1
+
+
+def test_changed_enrichment_triggers_upsert(pipeline):
+    pipeline.process_item(make_item('1', company_size='Grande (201-1000)'), spider=None)
+    assert company_upserts(pipeline.client) == [('upsert_company', 'Empresa Confidencial')]
+    assert pipeline.company_cache['Empresa Confidencial']['size'] == 'Grande (201-1000)'
+
+
+# --- Tests para la sincronización de habilidades ---
+def test_diff_skill_sets():
+    existing = {'job-1': {'Python': 's1', 'SQL': 's2'}, 'job-2': {'Java': 's3'}}
+    desired = {'job-1': ['Python', 'AWS'], 'job-2': ['Java'], 'job-3': ['Go']}
+    additions, removals = diff_skill_sets(existing, desired)
+    assert additions == [('job-1', 'AWS'), ('job-3', 'Go')]
+    assert removals == ['s2']
+
+
+def test_skill_sync_writes_only_changes():
+    client = FakeSupabaseClient(skills=[
+        {'id': 's1', 'job_id': 'job-1', 'skill_name': 'Python'},
+        {'id': 's2', 'job_id': 'job-1', 'skill_name': 'SQL'},
+        {'id': 's3', 'job_id': 'job-2', 'skill_name': 'Java'},
+    ])
+    sync = SkillSynchronizer(client, lambda skill: 'Other', batch_size=2)
+    sync.queue('job-1', ['Python', 'AWS'])
+    sync.queue('job-2', ['Java'])  # Llena el lote y dispara la sincronización
+    assert client.calls == [
+        ('get_skills_for_jobs', 2),
+        ('insert_skills', [('job-1', 'AWS')]),
+        ('delete_skills', ['s2']),
+    ]
+    assert sync.stats['unchanged'] == 1
+    # Borrar y reinsertar: 3 filas borradas + 3 insertadas; ahora solo 2 escrituras
+    assert sync.stats['writes_avoided'] == 4
+
+
+def test_unchanged_skills_cause_no_writes(pipeline):
+    pipeline.client.skills = [{'id': 's1', 'job_id': 'db-1', 'skill_name': 'Python'}]
+    pipeline.process_item(make_item('1', skills=['Python']), spider=None)
+    pipeline.close_spider(spider=None)
+    assert not [call for call in pipeline.client.calls if call[0] in ('insert_skills', 'delete_skills')]
+
+
+# --- Tests para la detección de cambios por hash de contenido ---
+def test_content_hash_ignores_formatting_and_skill_order():
+    base = make_item('1', description='Buscamos  Data Engineer\n con Python', skills=['Python', 'SQL'])
+    reformatted = make_item('1', description='buscamos data engineer con python', skills=['SQL', 'Python'])
+    changed = make_item('1', description='Buscamos Data Engineer con Java', skills=['Python', 'SQL'])
+    assert SupabasePipeline.compute_content_hash(base) == SupabasePipeline.compute_content_hash(reformatted)
+    assert SupabasePipeline.compute_content_hash(base) != SupabasePipeline.compute_content_hash(changed)
+
+
+def test_unchanged_job_is_only_touched(pipeline):
+    item = make_item('1', description='Python y SQL', skills=['Python'])
+    pipeline.job_hash_index[('1', 'LinkedIn')] = ('db-1', SupabasePipeline.compute_content_hash(item))
+    pipeline.process_item(make_item('1', description='Python y SQL', skills=['Python']), spider=None)
+    pipeline.process_item(make_item('2', description='Go'), spider=None)
+    pipeline.close_spider(spider=None)
+    upserted = [call[1] for call in pipeline.client.calls if call[0] == 'upsert_job']
+    assert upserted == ['2']
+    assert ('touch_jobs', ['db-1']) in pipeline.client.calls
+    assert pipeline.job_write_stats == {'new': 1, 'updated': 0, 'unchanged': 1}
+
+
+# --- Tests para el spool local de escrituras fallidas ---
+def test_failed_write_is_spooled_and_replayed(pipeline):
+    pipeline.client.fail_writes = True
+    pipeline.process_item(make_item('1', skills=['Python']), spider=None)
+    assert len(pipeline.spool) == 1
+
+    pipeline.client.fail_writes = False
+    assert pipeline.replay_spool(batch_size=10) == 1
+    assert len(pipeline.spool) == 0
+    assert ('upsert_job', '1') in pipeline.client.calls
+    assert ('insert_skills', [('db-1', 'Python')]) in pipeline.client.calls
+
+
+def test_replay_failure_keeps_entry_with_attempts(pipeline):
+    pipeline.client.fail_writes = True
+    pipeline.process_item(make_item('1'), spider=None)
+    pipeline.replay_spool()
+    entries = pipeline.spool.claim()
+    assert len(entries) == 1
+    assert entries[0]['attempts'] == 2
+    assert entries[0]['last_error'] == 'Supabase no responde'
+    assert '_spool_entry' not in entries[0]['payload']
+
+
+def test_items_are_spooled_without_client(pipeline):
+    pipeline.client = None
+    pipeline.process_item(make_item('1'), spider=None)
+    assert len(pipeline.spool) == 1
@@ -0,0 +1,233 @@
+import datetime
+import pytest
+from types import SimpleNamespace
+from analysis.trend_analyzer import TrendAnalyzer
+from analysis.engines import PandasEngine, create_engine, write_snapshot
+from runner.run_ledger import RunLedger
+
+ANALYSIS_DATE = datetime.date(2024, 3, 31)
+
+
+def make_job(job_id, days_ago, title, skills, sector='Fintech', country='Colombia', scraped_at=None):
+    posted = ANALYSIS_DATE - datetime.timedelta(days=days_ago)
+    return {
+        'id': job_id, 'title': title, 'sector': sector, 'country': country,
+        'posted_date': posted.isoformat(), 'scraped_at': scraped_at or f"{posted.isoformat()}T10:00:00+00:00",
+        'skills': [{'id': f"{job_id}-{name}", 'skill_name': name, 'skill_category': 'Other'} for name in skills],
+    }
+
+
+class FakeTrendsDB:
+    """Base de datos en memoria con la interfaz de SupabaseClient que usa TrendAnalyzer."""
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.rollups = {}
+        self.watermarks = {}
+        self.jobs_read = 0
+        self.trend_upserts = []
+
+    def iter_jobs(self, columns="*", start_date=None, end_date=None, page_size=1000, scraped_since=None, posted_dates=None):
+        rows = [
+            job for job in self.jobs
+            if (not start_date or job['posted_date'] >= start_date) and (not end_date or job['posted_date'] <= end_date)
+            and (not scraped_since or job['scraped_at'] >= scraped_since)
+            and (posted_dates is None or job['posted_date'] in posted_dates)
+        ]
+        self.jobs_read += len(rows)
+        for i in range(0, len(rows), page_size):
+            yield rows[i:i + page_size]
+
+    def get_rollup_watermarks(self):
+        return dict(self.watermarks)
+
+    def set_rollup_watermark(self, table, scraped_through):
+        self.watermarks[table] = scraped_through
+
+    def get_rollups(self, table, key_columns, start_date=None, end_date=None):
+        return [
+            row for row in self.rollups.get(table, [])
+            if (not start_date or row['date'] >= start_date) and (not end_date or row['date'] <= end_date)
+        ]
+
+    def replace_rollups(self, table, rows, key_columns, dates=None):
+        # Upsert por clave y borrado de las claves de esos días que ya no aparecen, como SupabaseClient
+        by_key = {tuple(row[column] for column in key_columns): row for row in self.rollups.get(table, [])}
+        fresh = {tuple(row[column] for column in key_columns): row for row in rows}
+        by_key = {key: row for key, row in by_key.items() if key in fresh or (dates is not None and row['date'] not in dates)}
+        by_key.update(fresh)
+        self.rollups[table] = list(by_key.values())
+        return len(rows)
+
+    def upsert_trends(self, trends_data):
+        self.trend_upserts.append(list(trends_data))
+        return SimpleNamespace(data=trends_data)
+
+
+@pytest.fixture
+def jobs():
+    return [
+        make_job('j1', 1, 'Senior Data Scientist', ['Python', 'SQL']),
+        make_job('j2', 3, 'Desarrollador Backend', ['Python', 'Docker'], sector='Edtech'),
+        make_job('j3', 10, 'Data Analyst', ['SQL', 'Power BI'], country='México'),
+        make_job('j4', 45, 'Desarrollador Java', ['Java'], sector='Edtech'),
+        make_job('j5', 50, 'Data Scientist', ['Python'], country='México'),
+    ]
+
+
+@pytest.fixture
+def analyzer(jobs, tmp_path):
+    return make_analyzer(jobs, RunLedger(db_path=str(tmp_path / 'run_history.sqlite3')))
+
+
+def make_analyzer(jobs, run_ledger):
+    trend_analyzer = TrendAnalyzer.__new__(TrendAnalyzer)
+    trend_analyzer.db = FakeTrendsDB(jobs)
+    trend_analyzer.run_ledger = run_ledger
+    trend_analyzer.engine = PandasEngine(trend_analyzer._fetch_jobs_frames)
+    return trend_analyzer
+
+
+def trends_by_metric(records, metric_name):
+    return {record['metric_value']: record for record in records if record['metric_name'] == metric_name}
+
+
+# --- Tests para el almacenamiento de tendencias ---
+def test_trends_are_stored_in_one_bulk_upsert(analyzer):
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    assert len(analyzer.db.trend_upserts) == 1
+    records = analyzer.db.trend_upserts[0]
+    demanded = trends_by_metric(records, 'most_demanded_skill')
+    assert demanded['Python']['count'] == 2
+    assert demanded['SQL']['count'] == 2
+    assert 'Java' not in demanded
+    assert all(record['date'] == '2024-03-31' for record in records)
+
+
+def test_growth_is_stored_as_numbers(analyzer):
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    growing = trends_by_metric(analyzer.db.trend_upserts[0], 'growing_skill')
+    # El nombre de la habilidad va limpio en metric_value; la tasa va en columnas numéricas
+    assert growing['Python']['value'] == 2
+    assert growing['Python']['previous_value'] == 1
+    assert growing['Python']['change_rate'] == 100.0
+
+
+# --- Tests para los agregados diarios ---
+def test_rollups_count_jobs_per_day_and_key(analyzer):
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    skill_rows = analyzer.db.rollups['daily_skill_counts']
+    assert {'date': '2024-03-30', 'skill_name': 'Python', 'country': 'Colombia', 'sector': 'Fintech', 'count': 1} in skill_rows
+    role_rows = analyzer.db.rollups['daily_role_counts']
+    assert {'date': '2024-03-28', 'role': 'Software Engineer / Developer', 'country': 'Colombia', 'sector': 'Edtech', 'count': 1} in role_rows
+
+
+def sorted_rollups(db):
+    return {table: sorted(rows, key=lambda row: sorted(row.items())) for table, rows in db.rollups.items()}
+
+
+def test_rollup_update_recomputes_the_days_of_newly_scraped_jobs(analyzer, jobs, tmp_path):
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    # Scrapeada hoy pero publicada hace 45 días, el mismo día que j4
+    analyzer.db.jobs.append(make_job('j6', 45, 'Desarrollador Java', ['Java'], sector='Edtech', scraped_at=f"{ANALYSIS_DATE}T12:00:00+00:00"))
+    analyzer.db.jobs_read = 0
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+
+    # Vacantes scrapeadas desde la marca (j1, la última, y j6) y luego las de sus dos días (j1, j4 y j6)
+    assert analyzer.db.jobs_read == 5
+    rebuilt = make_analyzer(analyzer.db.jobs, RunLedger(db_path=str(tmp_path / 'rebuild.sqlite3')))
+    rebuilt.update_rollups(up_to_date=ANALYSIS_DATE)
+    assert sorted_rollups(analyzer.db) == sorted_rollups(rebuilt.db)
+    assert analyzer.db.watermarks['daily_skill_counts'] == f"{ANALYSIS_DATE}T12:00:00+00:00"
+
+
+def test_rollup_update_does_not_rebuild_tables_without_rows(tmp_path):
+    jobs = [make_job(f"j{days_ago}", days_ago, 'Data Analyst', ['SQL'], country=None) for days_ago in (1, 2, 3)]
+    analyzer = make_analyzer(jobs, RunLedger(db_path=str(tmp_path / 'run_history.sqlite3')))
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    analyzer.db.jobs_read = 0
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+
+    # Sin vacantes con país la tabla de países queda vacía, pero tiene marca: solo se relee el último día
+    assert analyzer.db.rollups['daily_country_counts'] == []
+    assert analyzer.db.jobs_read == 2
+
+
+def test_rollups_refuse_a_snapshot_older_than_the_requested_day(analyzer, tmp_path):
+    pytest.importorskip('duckdb')
+    snapshot_dir = str(tmp_path / 'snapshot')
+    write_snapshot(*analyzer._fetch_jobs_frames(), snapshot_dir=snapshot_dir)
+    analyzer.engine = create_engine('duckdb', load_frames=None, snapshot_dir=snapshot_dir)
+
+    with pytest.raises(RuntimeError, match='snapshot'):
+        analyzer.update_rollups(up_to_date=datetime.date.today() + datetime.timedelta(days=1))
+    assert analyzer.db.rollups == {}
+
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    assert analyzer.db.rollups['daily_skill_counts']
+
+
+def test_growth_compares_consecutive_windows(analyzer):
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    growth = analyzer.get_skills_growth_trend(period_days=30, end_date=ANALYSIS_DATE).set_index('skill_name')
+    assert growth.loc['Python', 'current_count'] == 2
+    assert growth.loc['Python', 'previous_count'] == 1
+    assert growth.loc['Python', 'growth_rate'] == 100.0
+    assert 'Java' not in growth.index
+
+
+def test_growth_table_compares_several_windows(analyzer):
+    analyzer.update_rollups(up_to_date=ANALYSIS_DATE)
+    table = analyzer.get_skills_growth_table(windows=(7, 30), end_date=ANALYSIS_DATE).set_index('skill_name')
+    assert table.loc['Python', 'current_count_7d'] == 2
+    assert table.loc['SQL', 'previous_count_7d'] == 1
+    assert table.loc['Java', 'previous_count_30d'] == 1
+
+
+# --- Tests para los segmentos por país y sector ---
+def test_slices_are_written_above_min_support(analyzer):
+    analyzer.MIN_SLICE_SUPPORT = 2
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    records = analyzer.db.trend_upserts[0]
+    slices = {(record['country'], record['sector']) for record in records if record['metric_name'] == 'most_demanded_skill'}
+    # Colombia (j1, j2) y Fintech (j1, j3) tienen 2 vacantes; México, Edtech y los cruces solo 1
+    assert slices == {(None, None), ('Colombia', None), (None, 'Fintech')}
+
+    colombia = [r for r in records if r['country'] == 'Colombia' and r['metric_name'] == 'most_demanded_skill']
+    assert {r['metric_value']: r['count'] for r in colombia} == {'Python': 2, 'Docker': 1, 'SQL': 1}
+    fintech_growth = {r['metric_value']: r for r in records if r['sector'] == 'Fintech' and r['metric_name'] == 'growing_skill'}
+    assert fintech_growth['SQL']['change_rate'] == 200.0
+
+
+def test_no_slices_below_min_support(analyzer):
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    assert all(record['country'] is None for record in analyzer.db.trend_upserts[0])
+
+
+# --- Tests para la co-ocurrencia de habilidades ---
+def test_cooccurrence_pairs_are_stored_with_lift(analyzer):
+    analyzer.COOCCURRENCE_MIN_PAIRS = 1
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    pairs = trends_by_metric(analyzer.db.trend_upserts[0], 'skill_cooccurrence')
+    # 3 vacantes en la ventana: Docker solo aparece con Python (j2), que está en 2 de las 3
+    assert pairs['Docker → Python']['count'] == 1
+    assert pairs['Docker → Python']['value'] == 1.5
+
+
+# --- Tests para el backfill histórico ---
+def test_backfill_matches_single_day_analysis(analyzer, jobs):
+    analyzer.analyze_and_store_trends(analysis_date=ANALYSIS_DATE)
+    single_day = analyzer.db.trend_upserts[0]
+
+    backfill_analyzer = make_analyzer(jobs, analyzer.run_ledger)
+    backfill_analyzer.backfill_trends(ANALYSIS_DATE - datetime.timedelta(days=6), ANALYSIS_DATE)
+    backfilled = [record for upsert in backfill_analyzer.db.trend_upserts for record in upsert]
+
+    assert {record['date'] for record in backfilled} == {
+        (ANALYSIS_DATE - datetime.timedelta(days=offset)).isoformat() for offset in range(7)
+    }
+    assert [record for record in backfilled if record['date'] == '2024-03-31'] == single_day
+
+
+def test_backfill_rejects_inverted_range(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.backfill_trends(ANALYSIS_DATE, ANALYSIS_DATE - datetime.timedelta(days=1))